@@ -0,0 +1,128 @@
+"""Terheléses teszt: szinkron (threadpool) és async (DB_ASYNC=1) adatbázis mód összehasonlítása.
+
+Módonként elindít egy uvicorn szervert friss SQLite adatbázissal, feltölt néhány
+jegyzőkönyvet, majd párhuzamos kliensekkel hívja a GET /api/protocols/{id} és
+GET /api/protocols végpontokat.
+
+Futtatás: python bench_async_db.py [kérések száma] [párhuzamos kliensek] [sorok jegyzőkönyvenként]
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+MODES = {"sync": "0", "async": "1"}
+PROTOCOLS = 20
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def protocol_payload(i: int, rows: int) -> dict:
+    return {
+        "serial_number": f"LOAD/{i:04d}",
+        "location_address": f"Budapest, Teszt utca {i}.",
+        "network_type": "TN-S",
+        "client_name": f"Ügyfél {i}",
+        "inspection_type": "Első ellenőrzés (VBF)",
+        "inspection_date": "2026-01-01",
+        "inspector_name": "Kovács Béla",
+        "rpe_measurements": [{"point_number": n, "location": f"Pont {n}", "value_ohm": 0.1, "passed": True} for n in range(rows)],
+        "insulation_measurements": [{"circuit_name": f"Kör {n}", "ln_value_mohm": 200, "passed": True} for n in range(rows)],
+    }
+
+
+async def wait_until_up(client: httpx.AsyncClient):
+    for _ in range(200):
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("A szerver nem indult el")
+
+
+async def load(base_url: str, requests: int, concurrency: int, rows: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await wait_until_up(client)
+        ids = []
+        for i in range(PROTOCOLS):
+            response = await client.post("/api/protocols", json=protocol_payload(i, rows))
+            response.raise_for_status()
+            ids.append(response.json()["id"])
+
+        latencies = []
+        errors = 0
+        queue = asyncio.Queue()
+        for n in range(requests):
+            # Every fifth request is a list page, the rest are full protocol reads
+            queue.put_nowait("/api/protocols?limit=50" if n % 5 == 4 else f"/api/protocols/{ids[n % len(ids)]}")
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        diagnostics = (await client.get("/api/diagnostics")).json()["database"]
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "errors": errors,
+        "pool_wait_max_ms": diagnostics["wait_max_ms"],
+    }
+
+
+def run_mode(mode: str, requests: int, concurrency: int, rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = dict(
+            os.environ,
+            DB_ASYNC=MODES[mode],
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'load.db'}",
+            UPLOAD_DIR=str(Path(tmp) / "uploads"),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=Path(__file__).parent, env=env,
+        )
+        try:
+            return asyncio.run(load(f"http://127.0.0.1:{port}", requests, concurrency, rows))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rows = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    print(f"{requests} kérés, {concurrency} párhuzamos kliens, {rows} sor mérési táblánként")
+    for mode in MODES:
+        result = run_mode(mode, requests, concurrency, rows)
+        print(
+            f"{mode:<6} {result['rps']:7.1f} kérés/s, p50 {result['p50'] * 1000:7.1f} ms, "
+            f"p99 {result['p99'] * 1000:7.1f} ms, hiba: {result['errors']}, "
+            f"max várakozás kapcsolatra: {result['pool_wait_max_ms']:.1f} ms"
+        )
@@ -0,0 +1,87 @@
+"""Mérési táblázatok generálása: python-docx cellánkénti kitöltés vs. docx_tables (egy w:tbl XML).
+
+Sorszámonként (10 ... 5000) a szigetelési tábla mindkét módszerrel, majd a teljes
+generate_protocol_docx (Rpe, szigetelés, hurok és FI táblák egyenként ennyi sorral).
+A cellánkénti kitöltés négyzetes, ezért csak LEGACY_MAX_ROWS sorig fut.
+
+Futtatás: python bench_docx_tables.py [sorszámok vesszővel]
+"""
+import sys
+import time
+from datetime import date
+
+from docx import Document
+from docx.shared import Pt
+
+import models
+from docx_generator import add_table_borders, generate_protocol_docx, insulation_row, set_cell_shading
+from docx_tables import add_measurement_table
+
+LEGACY_MAX_ROWS = 200
+
+HEADERS = ['Áramkör\nés helye', 'Túláramvéd.\n(Típus/A)', 'Vezeték\n(anyag/mm²)', 'Zs (Ω) / dU (%)', 'Tűz.o.', 'Riso (MΩ)', 'Eredmény']
+
+
+def make_protocol(rows: int) -> models.Protocol:
+    return models.Protocol(
+        serial_number="BENCH/001",
+        location_address="Budapest, Teszt utca 1.",
+        network_type="TN-S",
+        client_name="Ügyfél",
+        inspection_type="Első ellenőrzés (VBF)",
+        inspection_date=date(2026, 1, 1),
+        inspector_name="Kovács Béla",
+        rpe_measurements=[models.RpeMeasurement(point_number=n, location=f"Pont {n}", value_ohm=0.1, passed=True) for n in range(rows)],
+        insulation_measurements=[
+            models.InsulationMeasurement(
+                circuit_name=f"Elosztó / F{n}", breaker_type="B", breaker_value=16, wire_material="Cu",
+                wire_cross_section=2.5, zs_value_ohm=0.45, ln_value_mohm=199.9, lpe_value_mohm=199.9,
+                npe_value_mohm=199.9, passed=True,
+            )
+            for n in range(rows)
+        ],
+        loop_impedance_measurements=[models.LoopImpedanceMeasurement(point_number=n, location=f"Pont {n}", value_ohm=0.4, passed=True) for n in range(rows)],
+        rcd_tests=[models.RcdTest(circuit_name=f"F{n}", test_type="1×IΔn", rated_current_ma="30", trip_time_ms=18.2, passed=True) for n in range(rows)],
+    )
+
+
+def legacy_insulation_table(doc, data):
+    """A docx_tables előtti kitöltés (cellánként, run formázással)"""
+    table = doc.add_table(rows=len(data) + 1, cols=7)
+    add_table_borders(table)
+    for i, h in enumerate(HEADERS):
+        table.rows[0].cells[i].text = h
+        set_cell_shading(table.rows[0].cells[i], 'D9D9D9')
+        table.rows[0].cells[i].paragraphs[0].runs[0].font.size = Pt(9)
+    for i, ins in enumerate(data):
+        row = table.rows[i + 1]
+        for j, text in enumerate(insulation_row(ins)):
+            row.cells[j].text = text
+        for cell in row.cells:
+            for paragraph in cell.paragraphs:
+                for run in paragraph.runs:
+                    run.font.size = Pt(8.5)
+
+
+def fast_insulation_table(doc, data):
+    add_measurement_table(doc, HEADERS, map(insulation_row, data), font_size=8.5, header_font_size=9)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10, 100, 1000, 5000]
+    print(f"{'sorok':>6} {'cellánként':>12} {'w:tbl XML':>12} {'µs/sor (XML)':>13} {'teljes docx':>12} {'µs/sor':>8}")
+    for rows in sizes:
+        protocol = make_protocol(rows)
+        legacy = timed(legacy_insulation_table, Document(), protocol.insulation_measurements) if rows <= LEGACY_MAX_ROWS else None
+        fast = timed(fast_insulation_table, Document(), protocol.insulation_measurements)
+        full = timed(generate_protocol_docx, protocol)
+        print(
+            f"{rows:>6} {f'{legacy:.3f} s' if legacy is not None else '-':>12} {fast:>10.3f} s {fast / rows * 1e6:>13.0f} "
+            f"{full:>10.3f} s {full / (4 * rows) * 1e6:>8.0f}"
+        )
@@ -0,0 +1,103 @@
+"""crud.get_protocol benchmark 10 000 jegyzőkönyves SQLite adatbázison, indexekkel és nélkülük.
+
+Futtatás: python bench_get_protocol.py [jegyzőkönyvek száma] [sorok táblánként]
+"""
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+import models
+import crud
+import schema_check
+
+
+def build_database(engine, protocol_count: int, rows: int):
+    """Szintetikus adatbázis: jegyzőkönyvenként `rows` sor minden mérési táblában, egy hiba két képpel"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.DefectType), [{
+            "id": "HIBA-001", "name": "Hiányzó FI-relé", "category": "aramutes_veszelye", "severity": "kritikus",
+        }])
+        ids = [uuid.uuid4() for _ in range(protocol_count)]
+        conn.execute(insert(models.Protocol), [{
+            "id": protocol_id,
+            "serial_number": f"2026/{i:05d}",
+            "location_address": f"Budapest, Teszt utca {i}.",
+            "network_type": "TN-S",
+            "client_name": f"Ügyfél {i}",
+            "inspection_type": "Első ellenőrzés (VBF)",
+            "inspection_date": date(2026, 1, 1),
+            "inspector_name": "Kovács Béla",
+        } for i, protocol_id in enumerate(ids)])
+
+        children = {
+            models.RpeMeasurement: lambda i: {"point_number": i, "location": f"Pont {i}", "value_ohm": 0.1, "passed": True},
+            models.InsulationMeasurement: lambda i: {"circuit_name": f"Kör {i}", "ln_value_mohm": 200, "passed": True},
+            models.LoopImpedanceMeasurement: lambda i: {"point_number": i, "location": f"Pont {i}", "value_ohm": 0.4, "passed": True},
+            models.RcdTest: lambda i: {"test_type": "1×IΔn", "trip_time_ms": 20, "passed": True},
+            models.SummaryResult: lambda i: {"test_name": f"Vizsgálat {i}", "result": "MEGFELELT"},
+            models.EarthingMeasurement: lambda i: {"ra_value": 5, "passed": True},
+            models.EphMeasurement: lambda i: {"element_name": f"Elem {i}", "connection_point": "EPH sín", "passed": True},
+        }
+        for model, make_row in children.items():
+            conn.execute(insert(model), [
+                {"id": uuid.uuid4(), "protocol_id": protocol_id, **make_row(i)}
+                for protocol_id in ids for i in range(rows)
+            ])
+
+        defect_ids = [uuid.uuid4() for _ in ids]
+        conn.execute(insert(models.ProtocolDefect), [
+            {"id": defect_id, "protocol_id": protocol_id, "defect_type_id": "HIBA-001", "location": "Fürdő"}
+            for defect_id, protocol_id in zip(defect_ids, ids)
+        ])
+        conn.execute(insert(models.DefectImage), [
+            {"id": uuid.uuid4(), "protocol_defect_id": defect_id, "image_path": f"defect_images/{defect_id}{suffix}.jpg"}
+            for defect_id in defect_ids for suffix in ("", "b")
+        ])
+    return ids
+
+
+def drop_indexes(engine):
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+
+
+def bench(label, engine, ids, lookups: int):
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    sample = random.Random(42).sample(ids, lookups)
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        for protocol_id in sample:
+            crud.get_protocol(db, protocol_id)
+            db.expunge_all()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    print(f"{label:<20} {lookups} get_protocol: {elapsed:7.2f} s  ({elapsed / lookups * 1000:7.2f} ms / jegyzőkönyv)")
+
+
+if __name__ == "__main__":
+    protocol_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        print(f"Adatbázis építése: {protocol_count} jegyzőkönyv, {rows} sor táblánként...")
+        ids = build_database(engine, protocol_count, rows)
+
+        bench("indexekkel", engine, ids, 500)
+        drop_indexes(engine)
+        print(f"Hiányzó indexek: {len(schema_check.missing_indexes(engine))}")
+        bench("indexek nélkül", engine, ids, 50)
+        engine.dispose()
@@ -0,0 +1,74 @@
+"""Importer pluginok átviteli sebessége nagy szintetikus fájlokon (PADFX, CSV, XML).
+
+Minden formátumban ugyanannyi mérés. CSV és XML: áramkörönként Zs + Riso
+(szigetelés tábla) és Z-Line (hurokimpedancia tábla); PADFX: bench_padfx_parser.make_padfx.
+
+Futtatás: python bench_importers.py [mérések száma]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+from bench_padfx_parser import make_padfx
+from importers import IMPORTERS, import_file
+
+
+def circuit_readings(measurement_count: int):
+    """(tábla, áramkör, mezők) hármasok, áramkörönként három mérés"""
+    for c in range(measurement_count // 3):
+        circuit = f"Elosztó {c // 50} / F{c}"
+        yield "insulation_measurements", circuit, {"zs_value_ohm": f"0.{c % 97:02d}Ohm"}
+        yield "insulation_measurements", circuit, {"ln_value_mohm": ">199.9MOhm", "lpe_value_mohm": "550kOhm"}
+        yield "loop_impedance_measurements", circuit, {"value_ohm": f"0.{c % 7}Ohm"}
+
+
+def make_csv(measurement_count: int) -> bytes:
+    fields = ["zs_value_ohm", "ln_value_mohm", "lpe_value_mohm", "value_ohm"]
+    lines = [";".join(["table", "circuit", *fields])]
+    for table, circuit, values in circuit_readings(measurement_count):
+        lines.append(";".join([table, circuit, *(values.get(field, "") for field in fields)]))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def make_xml(measurement_count: int) -> bytes:
+    parts = ['<?xml version="1.0" encoding="utf-8"?><Readings>']
+    for table, circuit, values in circuit_readings(measurement_count):
+        attributes = "".join(f" {field}={quoteattr(value)}" for field, value in values.items())
+        parts.append(f'<Reading table="{table}" circuit={quoteattr(circuit)}{attributes}/>')
+    parts.append("</Readings>")
+    return "".join(parts).encode("utf-8")
+
+
+GENERATORS = {"padfx": make_padfx, "csv": make_csv, "xml": make_xml}
+
+
+def run(path: Path, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = import_file(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    import_file(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    print(f"{count} mérés formátumonként")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, importer in IMPORTERS.items():
+            path = Path(tmp) / f"bench{importer.extensions[0]}"
+            path.write_bytes(GENERATORS[name](count))
+            size = path.stat().st_size / 1024 / 1024
+            result, best, peak = run(path)
+            assert result["format"] == name
+            print(
+                f"{importer.label:<26} {size:6.1f} MB {best:6.2f} s {count / best:9.0f} mérés/s "
+                f"{size / best:5.1f} MB/s  csúcs memória {peak / 1024 / 1024:6.1f} MB  {result['counts']}"
+            )
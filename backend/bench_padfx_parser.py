@@ -0,0 +1,121 @@
+"""PADFX parser benchmark: régi (ET.parse + dict fa) vs. iterparse motor + MID leképezés.
+
+Futtatás: python bench_padfx_parser.py [mérések száma]
+"""
+import io
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+
+from padfx_parser import parse_padfx_content
+
+
+def legacy_parse_padfx_content(file_bytes: bytes):
+    """Az iterparse előtti parser (összehasonlításhoz)"""
+    with zipfile.ZipFile(io.BytesIO(file_bytes), 'r') as zip_ref:
+        xml_content = zip_ref.read('DataSource.padf')
+
+    root = ET.parse(io.BytesIO(xml_content)).getroot()
+    nodes = {}
+    for so in root.find('Data').findall('SO'):
+        node_id = so.get('Id')
+        measurements = []
+        ms_node = so.find('Ms')
+        if ms_node is not None:
+            for m in ms_node.findall('M'):
+                results = {}
+                rs_node = m.find('Rs')
+                if rs_node is not None:
+                    for r in rs_node.findall('R'):
+                        results[r.get('Id')] = r.findtext('V', default='')
+                measurements.append({'type': m.findtext('MID', default='Unknown'), 'results': results})
+        nodes[node_id] = {
+            'id': node_id,
+            'name': so.findtext('N', default='Unknown'),
+            'pid': so.findtext('PID', default='-1'),
+            'measurements': measurements,
+            'children': []
+        }
+
+    root_nodes = []
+    for node_id, node in nodes.items():
+        if node['pid'] in nodes:
+            nodes[node['pid']]['children'].append(node)
+        else:
+            root_nodes.append(node)
+
+    extracted_circuits = []
+
+    def walk_tree(node, path=""):
+        current_path = f"{path} / {node['name']}".strip(" / ")
+        for m in node['measurements']:
+            circuit_data = {"circuit_name": current_path, "raw_mid": m['type'], "raw_results": m['results']}
+            if m['type'] == '20':
+                circuit_data['zs_value_ohm'] = m['results'].get('43', '').replace('Ohm', '')
+            extracted_circuits.append(circuit_data)
+        for child in node['children']:
+            walk_tree(child, current_path)
+
+    for rn in root_nodes:
+        walk_tree(rn)
+
+    return {"status": "success", "circuits": extracted_circuits, "raw_nodes": root_nodes}
+
+
+def make_padfx(measurement_count: int, per_circuit: int = 4) -> bytes:
+    """Szintetikus PADFX: elosztók, alattuk áramkörök, áramkörönként per_circuit mérés"""
+    parts = ['<?xml version="1.0" encoding="utf-8"?><PADF><Data>']
+    circuits = measurement_count // per_circuit
+    boards = max(1, circuits // 50)
+    for b in range(boards):
+        parts.append(f'<SO Id="b{b}"><N>Elosztó {b}</N><PID>-1</PID></SO>')
+    for c in range(circuits):
+        ms = []
+        for j in range(per_circuit):
+            mid = ("20", "16", "2", "12")[j % 4]
+            ms.append(
+                f'<M><MID>{mid}</MID><Rs>'
+                f'<R Id="43"><V>0.{c % 97:02d}Ohm</V></R>'
+                f'<R Id="205"><V>0.{j}Ohm</V></R>'
+                f'<R Id="1"><V>&gt;199.9MOhm</V></R>'
+                f'</Rs></M>'
+            )
+        parts.append(f'<SO Id="c{c}"><N>F{c}</N><PID>b{c % boards}</PID><Ms>{"".join(ms)}</Ms></SO>')
+    parts.append('</Data></PADF>')
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("DataSource.padf", "".join(parts))
+    return buf.getvalue()
+
+
+def measure(label, func, *args, repeat: int = 3, **kwargs):
+    # Time without tracemalloc (it slows allocation-heavy code), then one traced run for the peak
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {best:7.2f} s   csúcs memória {peak / 1024 / 1024:8.1f} MB")
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data = make_padfx(count)
+    print(f"{count} mérés, PADFX méret: {len(data) / 1024 / 1024:.1f} MB")
+
+    legacy = measure("régi parser", legacy_parse_padfx_content, data)
+    measure("iterparse (raw=True)", parse_padfx_content, data, raw=True)
+    new = measure("iterparse (raw=False)", parse_padfx_content, data)
+
+    legacy_zs = sorted(float(c["zs_value_ohm"]) for c in legacy["circuits"] if "zs_value_ohm" in c)
+    new_zs = sorted(row.zs_value_ohm for row in new["tables"]["insulation_measurements"])
+    assert legacy_zs == new_zs
+    print(f"Táblasorok: {new['counts']} (Zs értékek egyeznek a régi parserrel)")
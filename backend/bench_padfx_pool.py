@@ -0,0 +1,98 @@
+"""/api/health késleltetése tíz párhuzamos PADFX import alatt, threadpool és process pool esetén.
+
+Módonként elindít egy uvicorn szervert (PADFX_WORKERS=0: feldolgozás a szerver
+folyamat threadpooljában, egyébként a padfx_pool worker folyamataiban), majd
+a párhuzamos importok alatt 50 ms-onként meghívja a /api/health végpontot.
+
+Futtatás: python bench_padfx_pool.py [mérések fájlonként] [párhuzamos importok]
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench_async_db import free_port, wait_until_up
+from bench_padfx_parser import make_padfx
+
+MODES = {"threadpool": "0", "process pool": os.environ.get("PADFX_WORKERS", "2")}
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def load(base_url: str, data: bytes, imports: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        await wait_until_up(client)
+        # Warm up the worker pool, so process start-up is not part of the measurement
+        (await client.post("/api/import-padfx", files={"file": ("warm.padfx", make_padfx(40))})).raise_for_status()
+
+        stop = asyncio.Event()
+        idle_stop = asyncio.Event()
+        idle = asyncio.create_task(probe_health(client, idle_stop))
+        await asyncio.sleep(1)
+        idle_stop.set()
+        idle_latencies = await idle
+
+        prober = asyncio.create_task(probe_health(client, stop))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/api/import-padfx", files={"file": (f"{i}.padfx", data)}) for i in range(imports)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        busy_latencies = sorted(await prober)
+
+    return {
+        "idle_p50": statistics.median(idle_latencies),
+        "p50": statistics.median(busy_latencies),
+        "max": busy_latencies[-1],
+        "elapsed": elapsed,
+        "failed": sum(response.status_code != 200 for response in responses),
+    }
+
+
+def run_mode(workers: str, data: bytes, imports: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = dict(
+            os.environ,
+            PADFX_WORKERS=workers,
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}",
+            UPLOAD_DIR=str(Path(tmp) / "uploads"),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=Path(__file__).parent, env=env,
+        )
+        try:
+            return asyncio.run(load(f"http://127.0.0.1:{port}", data, imports))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    measurements = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    imports = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    data = make_padfx(measurements)
+    print(f"{imports} párhuzamos import, {measurements} mérés fájlonként ({len(data) / 1024:.0f} KiB)")
+    for mode, workers in MODES.items():
+        result = run_mode(workers, data, imports)
+        print(
+            f"{mode:<13} /api/health üresjáratban p50 {result['idle_p50'] * 1000:6.1f} ms, "
+            f"import alatt p50 {result['p50'] * 1000:6.1f} ms, max {result['max'] * 1000:7.1f} ms | "
+            f"importok: {result['elapsed']:5.1f} s, hibás: {result['failed']}"
+        )
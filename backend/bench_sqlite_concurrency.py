@@ -0,0 +1,120 @@
+"""Olvasási késleltetés folyamatban lévő create_protocol írások mellett, SQLite profilonként.
+
+Minden profil külön adatbázison és folyamatokban fut (a profil a database.py importjakor
+dől el), mint két uvicorn worker: az író folyamat folyamatosan nagy jegyzőkönyveket hoz
+létre a POST /api/protocols kezelőjén keresztül, közben az olvasó folyamat szálai
+a GET /api/protocols/{id} kezelőt hívják.
+
+Futtatás: python bench_sqlite_concurrency.py [másodperc] [olvasó szálak] [sorok jegyzőkönyvenként]
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+PROFILES = ("default", "wal")
+
+
+def protocol_payload(schemas, i: int, rows: int):
+    return schemas.ProtocolCreate(
+        serial_number=f"BENCH/{i:06d}",
+        location_address=f"Budapest, Teszt utca {i}.",
+        network_type="TN-S",
+        client_name=f"Ügyfél {i}",
+        inspection_type="Első ellenőrzés (VBF)",
+        inspection_date=date(2026, 1, 1),
+        inspector_name="Kovács Béla",
+        rpe_measurements=[{"point_number": n, "location": f"Pont {n}", "value_ohm": 0.1, "passed": True} for n in range(rows)],
+        insulation_measurements=[{"circuit_name": f"Kör {n}", "ln_value_mohm": 200, "passed": True} for n in range(rows)],
+        loop_impedance_measurements=[{"point_number": n, "location": f"Pont {n}", "value_ohm": 0.4, "passed": True} for n in range(rows)],
+    )
+
+
+def _endpoints():
+    # Imported lazily: DATABASE_URL and SQLITE_PROFILE come from the parent process
+    import main
+    import schemas
+    from database import SessionLocal
+
+    def call(endpoint, *args):
+        db = SessionLocal()
+        try:
+            return asyncio.run(endpoint(*args, db))
+        finally:
+            db.close()
+
+    return main, schemas, call
+
+
+def run_writer(seconds: float, rows: int):
+    """Író worker: create_protocol hívások a megadott ideig"""
+    main, schemas, call = _endpoints()
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        call(main.create_protocol, protocol_payload(schemas, 1000 + count, rows))
+        count += 1
+    print(f"{os.environ['SQLITE_PROFILE']:<8} create_protocol: {count} db ({seconds / max(count, 1) * 1000:.0f} ms / db)")
+
+
+def run_readers(seconds: float, readers: int, rows: int):
+    """Olvasó worker: GET /api/protocols/{id} késleltetés egy párhuzamos író worker mellett"""
+    main, schemas, call = _endpoints()
+    ids = [call(main.create_protocol, protocol_payload(schemas, i, 5)).id for i in range(20)]
+
+    writer = subprocess.Popen([sys.executable, __file__, "--write", str(seconds), str(rows)])
+    time.sleep(1)  # Let the writer process import and start writing
+    stop = threading.Event()
+    latencies = []
+    errors = []
+
+    def reader(n: int):
+        k = n
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                call(main.get_protocol, ids[k % len(ids)])
+            except Exception as e:  # "database is locked" after busy_timeout
+                errors.append(e)
+            latencies.append(time.perf_counter() - start)
+            k += readers
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    writer.wait()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    ms = lambda value: f"{value * 1000:7.1f} ms"
+    print(
+        f"{os.environ['SQLITE_PROFILE']:<8} get_protocol: {len(latencies)} db, p50 {ms(statistics.median(latencies))}, "
+        f"p99 {ms(latencies[int(len(latencies) * 0.99)])}, max {ms(latencies[-1])}, hiba: {len(errors)}"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--write":
+        run_writer(float(sys.argv[2]), int(sys.argv[3]))
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "--read":
+        run_readers(float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+        sys.exit()
+
+    seconds = sys.argv[1] if len(sys.argv) > 1 else "10"
+    readers = sys.argv[2] if len(sys.argv) > 2 else "4"
+    rows = sys.argv[3] if len(sys.argv) > 3 else "200"
+    print(f"{seconds} s, {readers} olvasó szál, {rows} sor mérési táblánként")
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.db'}", SQLITE_PROFILE=profile,
+                       UPLOAD_DIR=str(Path(tmp) / "uploads"))
+            subprocess.run([sys.executable, __file__, "--read", seconds, readers, rows], env=env, cwd=tmp, check=True)
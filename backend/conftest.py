@@ -0,0 +1,41 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# database, docx_generator and docx_templates read these at import time, so they are set
+# before any test module is collected: the tests never touch vbf_database.db, uploads/ or cache/
+TEST_ROOT = Path(tempfile.mkdtemp(prefix="vbf_tests_"))
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_ROOT / 'test.db'}"
+os.environ["UPLOAD_DIR"] = str(TEST_ROOT / "uploads")
+os.environ["TEMPLATES_DIR"] = str(TEST_ROOT / "templates")
+os.environ["CACHE_DIR"] = str(TEST_ROOT / "cache")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """TestClient a teljes alkalmazáshoz, ideiglenes adatbázissal és feltöltési mappával"""
+    # main resolves uploads/ relative to the working directory
+    monkeypatch.chdir(TEST_ROOT)
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def protocol(client):
+    """Új VBF jegyzőkönyv egy-egy Rpe és szigetelési sorral"""
+    response = client.post("/api/protocols", json={
+        "serial_number": f"TEST/{os.urandom(4).hex()}",
+        "location_address": "Budapest, Teszt utca 1.",
+        "network_type": "TN-S",
+        "client_name": "Teszt Elek",
+        "inspection_type": "Első ellenőrzés (VBF)",
+        "inspection_date": "2026-02-20",
+        "inspector_name": "Kovács Béla",
+        "rpe_measurements": [{"point_number": 1, "location": "Konyha", "value_ohm": 0.12}],
+        "insulation_measurements": [{"circuit_name": "F1", "ln_value_mohm": 199.9}],
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,331 @@
+import base64
+from bisect import bisect_left
+from datetime import datetime
+
+from sqlalchemy import Numeric, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload, joinedload
+from typing import Sequence
+from uuid import UUID
+
+import models
+
+
+# Protocol relationship name -> measurement model
+MEASUREMENT_MODELS = {
+    'rpe_measurements': models.RpeMeasurement,
+    'insulation_measurements': models.InsulationMeasurement,
+    'loop_impedance_measurements': models.LoopImpedanceMeasurement,
+    'rcd_tests': models.RcdTest,
+    'summary_results': models.SummaryResult,
+    'earthing_measurements': models.EarthingMeasurement,
+    'eph_measurements': models.EphMeasurement,
+}
+
+# Loader options for every endpoint that returns a full protocol.
+# Each collection is fetched with one SELECT ... WHERE protocol_id IN (...),
+# so the statement count does not depend on the number of rows.
+PROTOCOL_LOAD_OPTIONS = (
+    selectinload(models.Protocol.rpe_measurements),
+    selectinload(models.Protocol.insulation_measurements),
+    selectinload(models.Protocol.loop_impedance_measurements),
+    selectinload(models.Protocol.rcd_tests),
+    selectinload(models.Protocol.summary_results),
+    selectinload(models.Protocol.earthing_measurements),
+    selectinload(models.Protocol.eph_measurements),
+    selectinload(models.Protocol.protocol_defects).options(
+        joinedload(models.ProtocolDefect.defect_type),
+        selectinload(models.ProtocolDefect.images),
+    ),
+)
+
+# Loader options for defect lists (defect type and images in fixed round trips)
+DEFECT_LOAD_OPTIONS = (
+    joinedload(models.ProtocolDefect.defect_type),
+    selectinload(models.ProtocolDefect.images),
+)
+
+
+def get_protocol(db: Session, protocol_id: UUID):
+    """Jegyzőkönyv betöltése az összes mérésével és hibájával együtt"""
+    return (
+        db.query(models.Protocol)
+        .options(*PROTOCOL_LOAD_OPTIONS)
+        .filter(models.Protocol.id == protocol_id)
+        .execution_options(populate_existing=True)
+        .first()
+    )
+
+
+def get_protocol_defects(db: Session, protocol_id: UUID):
+    """Jegyzőkönyvhöz rendelt hibák betöltése típussal és képekkel"""
+    return (
+        db.query(models.ProtocolDefect)
+        .options(*DEFECT_LOAD_OPTIONS)
+        .filter(models.ProtocolDefect.protocol_id == protocol_id)
+        .all()
+    )
+
+
+def get_protocol_defect(db: Session, protocol_id: UUID, defect_id: UUID):
+    """Egy hiba betöltése típussal és képekkel"""
+    return (
+        db.query(models.ProtocolDefect)
+        .options(*DEFECT_LOAD_OPTIONS)
+        .filter(
+            models.ProtocolDefect.id == defect_id,
+            models.ProtocolDefect.protocol_id == protocol_id
+        )
+        .execution_options(populate_existing=True)
+        .first()
+    )
+
+
+def filter_protocols(query, client_name=None, protocol_type=None, status=None, date_from=None, date_to=None,
+                     location_address=None, serial_number=None):
+    """Jegyzőkönyv lekérdezés szűrése (None értékű feltételek kimaradnak)"""
+    if client_name:
+        query = query.filter(models.Protocol.client_name.icontains(client_name, autoescape=True))
+    if location_address:
+        query = query.filter(models.Protocol.location_address.icontains(location_address, autoescape=True))
+    if serial_number:
+        # Prefix match (LIKE 'prefix%' ESCAPE '/'): PostgreSQL serves it from the text_pattern_ops
+        # index idx_protocols_serial_pattern; SQLite does not use an index for LIKE ... ESCAPE
+        query = query.filter(models.Protocol.serial_number.startswith(serial_number, autoescape=True))
+    if protocol_type:
+        query = query.filter(models.Protocol.protocol_type == protocol_type)
+    if status:
+        query = query.filter(models.Protocol.status == status)
+    if date_from:
+        query = query.filter(models.Protocol.inspection_date >= date_from)
+    if date_to:
+        query = query.filter(models.Protocol.inspection_date <= date_to)
+    return query
+
+
+def encode_cursor(protocol: models.Protocol) -> str:
+    """Lapozási kurzor a lista utolsó eleméből (created_at, id)"""
+    raw = f"{protocol.created_at.isoformat()}|{protocol.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Kurzor visszaalakítása (created_at, id) párrá; hibás kurzornál ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, protocol_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(protocol_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Érvénytelen lapozási kurzor") from e
+
+
+def list_protocols_page(query, limit: int, cursor: str = None):
+    """Egy oldal a (created_at, id) szerint csökkenő listából, kulcs alapú lapozással.
+
+    Visszatérés: (sorok, következő kurzor vagy None)
+    """
+    order = (models.Protocol.created_at.desc(), models.Protocol.id.desc())
+    if cursor:
+        created_at, protocol_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Protocol.created_at, models.Protocol.id)
+            < tuple_(literal(created_at, models.Protocol.created_at.type), literal(protocol_id, models.Protocol.id.type))
+        )
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def measurement_row(name: str, item, protocol_id: UUID) -> dict:
+    """Mérési séma átalakítása táblasorrá (földelésnél automatikus Ra ellenőrzés)"""
+    data = item.model_dump(exclude={'id'})
+    if name == 'earthing_measurements':
+        # Auto-check passed if Ra <= limit
+        if data.get('ra_value') is not None and data.get('passed') is None:
+            data['passed'] = data['ra_value'] <= data.get('limit_value', 10.0)
+    data['protocol_id'] = protocol_id
+    return data
+
+
+def bulk_insert_measurements(db: Session, protocol_id: UUID, name: str, items: Sequence, start: int = 0):
+    """Egy mérési tábla összes sorának beszúrása egyetlen INSERT utasítással (pozíció: start-tól)"""
+    if not items:
+        return
+    rows = [
+        {**measurement_row(name, item, protocol_id), 'position': start + i * models.POSITION_STEP}
+        for i, item in enumerate(items)
+    ]
+    db.execute(insert(MEASUREMENT_MODELS[name]), rows)
+
+
+def next_position(db: Session, protocol_id: UUID, name: str) -> int:
+    """A tábla végére fűzött következő sor pozíciója"""
+    model = MEASUREMENT_MODELS[name]
+    return db.scalar(
+        select(func.coalesce(func.max(model.position) + models.POSITION_STEP, 0)).where(model.protocol_id == protocol_id)
+    )
+
+
+def _increasing_run(values: Sequence) -> set:
+    """A nem None értékek leghosszabb szigorúan növekvő részsorozatának indexei"""
+    tails, tail_index, parent = [], [], {}
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        k = bisect_left(tails, value)
+        parent[i] = tail_index[k - 1] if k else None
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[k] = value
+            tail_index[k] = i
+    run, i = set(), tail_index[-1] if tail_index else None
+    while i is not None:
+        run.add(i)
+        i = parent[i]
+    return run
+
+
+def assign_positions(current: Sequence) -> list:
+    """Pozíciók a lista sorrendjében; `current` a sorok tárolt pozíciója (új sornál None).
+
+    A már sorrendben lévő sorok megtartják a pozíciójukat, a beszúrt vagy áthelyezett
+    sorok a szomszédaik közé kerülnek. Ha két szomszéd között nincs szabad érték,
+    a teljes lista újraszámozódik.
+    """
+    positions = list(current)
+    run = _increasing_run(current)
+    for i in range(len(positions)):
+        if i not in run:
+            positions[i] = None
+
+    i = 0
+    while i < len(positions):
+        if positions[i] is not None:
+            i += 1
+            continue
+        end = i
+        while end < len(positions) and positions[end] is None:
+            end += 1
+        lower = positions[i - 1] if i else None
+        upper = positions[end] if end < len(positions) else None
+        count = end - i
+        if lower is None and upper is None:
+            step, lower = models.POSITION_STEP, -models.POSITION_STEP
+        elif upper is None:
+            step = models.POSITION_STEP
+        elif lower is None:
+            step, lower = models.POSITION_STEP, upper - (count + 1) * models.POSITION_STEP
+        else:
+            step = (upper - lower) // (count + 1)
+            if step == 0:
+                return [n * models.POSITION_STEP for n in range(len(positions))]
+        for n in range(count):
+            positions[i + n] = lower + (n + 1) * step
+        i = end
+    return positions
+
+
+def import_measurements(db: Session, protocol_id: UUID, tables: dict) -> dict:
+    """Importált sorok hozzáfűzése a mérési táblák végére (commit nélkül, a hívó tranzakciójában).
+
+    A pontszámozott táblákban (pl. hurokimpedancia) a számozás a meglévő sorok után folytatódik.
+    """
+    counts = {}
+    for name, items in tables.items():
+        if not items:
+            continue
+        model = MEASUREMENT_MODELS[name]
+        if "point_number" in model.__table__.columns:
+            offset = db.scalar(
+                select(func.coalesce(func.max(model.point_number), 0)).where(model.protocol_id == protocol_id)
+            )
+            items = [item.model_copy(update={"point_number": item.point_number + offset}) for item in items]
+        bulk_insert_measurements(db, protocol_id, name, items, start=next_position(db, protocol_id, name))
+        counts[name] = len(items)
+    return counts
+
+
+def _values_differ(column, old, new) -> bool:
+    """Két oszlopérték összehasonlítása (Numeric esetén a tárolt pontosságon)"""
+    if old is None or new is None:
+        return old is not new
+    if isinstance(column.type, Numeric) and column.type.scale is not None:
+        return round(float(old), column.type.scale) != round(float(new), column.type.scale)
+    return old != new
+
+
+def sync_measurements(db: Session, protocol_id: UUID, name: str, items: Sequence):
+    """Mérési tábla összevetése a beküldött listával: csak a változott sorok íródnak.
+
+    Az `id` nélküli (vagy ismeretlen `id`-jű) elemek új sorok lesznek, a meglévő
+    azonosítójú elemek csak eltérés esetén frissülnek, a listából hiányzó sorok
+    törlődnek. A sorrend a lista sorrendje (lásd assign_positions).
+    Visszatérési érték: (beszúrt, frissített, törölt) darabszám.
+    """
+    model = MEASUREMENT_MODELS[name]
+    table = model.__table__
+    existing = {
+        row['id']: row
+        for row in db.execute(select(table).where(table.c.protocol_id == protocol_id)).mappings()
+    }
+
+    # A repeated id only matches its first occurrence, the rest become new rows
+    matched, kept = [], set()
+    for item in items:
+        row_id = item.id if item.id in existing and item.id not in kept else None
+        if row_id is not None:
+            kept.add(row_id)
+        matched.append(row_id)
+    positions = assign_positions([existing[row_id]['position'] if row_id else None for row_id in matched])
+
+    inserts, updates = [], []
+    for item, row_id, position in zip(items, matched, positions):
+        data = {**measurement_row(name, item, protocol_id), 'position': position}
+        if row_id is not None:
+            current = existing[row_id]
+            if any(_values_differ(table.c[key], current[key], value) for key, value in data.items()):
+                updates.append({'id': row_id, **data})
+        else:
+            inserts.append(data)
+
+    deleted = [row_id for row_id in existing if row_id not in kept]
+    if deleted:
+        db.execute(delete(model).where(model.id.in_(deleted)))
+    if updates:
+        db.execute(update(model), updates)
+    if inserts:
+        db.execute(insert(model), inserts)
+    return len(inserts), len(updates), len(deleted)
+
+
+def get_measurement(db: Session, protocol_id: UUID, name: str, row_id: UUID):
+    """Egy mérési sor lekérdezése a jegyzőkönyvön belül"""
+    model = MEASUREMENT_MODELS[name]
+    return db.query(model).filter(model.id == row_id, model.protocol_id == protocol_id).first()
+
+
+def create_measurement(db: Session, protocol_id: UUID, name: str, item):
+    """Egy mérési sor hozzáadása a tábla végére"""
+    db_row = MEASUREMENT_MODELS[name](
+        **measurement_row(name, item, protocol_id), position=next_position(db, protocol_id, name)
+    )
+    db.add(db_row)
+    db.commit()
+    db.refresh(db_row)
+    return db_row
+
+
+def update_measurement(db: Session, db_row, name: str, changes: dict):
+    """Egy mérési sor részleges frissítése"""
+    for key, value in changes.items():
+        setattr(db_row, key, value)
+    if name == 'earthing_measurements' and 'passed' not in changes:
+        # Re-check passed when Ra or its limit changed
+        if ('ra_value' in changes or 'limit_value' in changes) and db_row.ra_value is not None:
+            limit = db_row.limit_value if db_row.limit_value is not None else 10.0
+            db_row.passed = float(db_row.ra_value) <= float(limit)
+    db.commit()
+    db.refresh(db_row)
+    return db_row
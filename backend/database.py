@@ -1,23 +1,284 @@
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Union
 import os
+import threading
+import time
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./vbf_database.db")
 
-# SQLite esetén szükséges a connect_args beállítása
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+# SQLite profil: "wal" (alapértelmezett) = WAL napló és hangolt PRAGMA-k minden új kapcsolaton,
+# "default" = a meghajtó alapbeállításai (rollback napló, az írás blokkolja az olvasókat)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "wal")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+
+# Kapcsolatkészlet: a keret az összes uvicorn worker (WEB_CONCURRENCY) között oszlik el,
+# mert az írások úgyis egyetlen adatbázis fájlon sorakoznak fel
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+SQLITE_MAX_CONNECTIONS = int(os.getenv("SQLITE_MAX_CONNECTIONS", "32"))
+SQLITE_POOL_TIMEOUT = int(os.getenv("SQLITE_POOL_TIMEOUT", "30"))
+
+# PostgreSQL kapcsolatkészlet (workerenként). A NAS konténer újraindulása után a régi
+# kapcsolatokat a pre-ping szűri ki, a recycle pedig a tűzfal/NAT időkorlátja előtt zárja őket.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(max(2, 20 // max(1, WEB_CONCURRENCY)))))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# Async mód: a végpontok AsyncSession-t kapnak (aiosqlite / asyncpg), a szinkron ORM kód
+# a run_sync-kel az eseményhurokban fut, nem a Starlette threadpool 40 szálán
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE) -> dict:
+    """Az új SQLite kapcsolatokon beállítandó PRAGMA-k a profil szerint"""
+    if profile == "default":
+        return {}
+    if profile != "wal":
+        raise ValueError(f"Ismeretlen SQLITE_PROFILE: {profile}")
+    return {
+        "journal_mode": "WAL",
+        # In WAL mode NORMAL only syncs at checkpoints; a crash can lose the last commits but never corrupts
+        "synchronous": "NORMAL",
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": SQLITE_MMAP_MB * 1024 * 1024,
+        # Negative value: size in KiB instead of pages
+        "cache_size": -SQLITE_CACHE_MB * 1024,
+        "temp_store": "MEMORY",
+    }
+
+
+def create_sqlite_engine(url: str, profile: str = SQLITE_PROFILE, workers: int = WEB_CONCURRENCY,
+                         factory=create_engine):
+    """SQLite engine a profil PRAGMA-ival és a workerek számához méretezett kapcsolatkészlettel"""
+    kwargs = {}
+    if ":memory:" not in url and url.rstrip("/") != "sqlite:":
+        kwargs.update(
+            pool_size=max(2, SQLITE_MAX_CONNECTIONS // max(1, workers)),
+            max_overflow=0,
+            pool_timeout=SQLITE_POOL_TIMEOUT,
+        )
+        if factory is create_async_engine:
+            # aiosqlite defaults to NullPool: a new connection (and thread) per checkout
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+    engine = factory(url, connect_args={"check_same_thread": False}, **kwargs)
+    pragmas = sqlite_pragmas(profile)
+
+    if pragmas:
+        @event.listens_for(getattr(engine, "sync_engine", engine), "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    return engine
+
+
+def create_postgres_engine(url: str, factory=create_engine):
+    """PostgreSQL engine a DB_* környezeti változók szerinti kapcsolatkészlettel"""
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS and "+asyncpg" in url:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    elif DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return factory(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+class PoolMetrics:
+    """Kapcsolatkészlet számlálók és a kapcsolatra várás ideje (a /api/diagnostics végponthoz)"""
+
+    # Upper bounds of the wait time histogram, in seconds
+    WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_histogram = [0] * (len(self.WAIT_BUCKETS) + 1)
+
+    def install(self, engine):
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        # Stale connections found by pre-ping and connections dropped after an error
+        event.listen(engine, "invalidate", self._on_invalidate)
+        # No pool event fires before a checkout starts waiting, so every checkout the engine
+        # makes (the first query of a request, not the request itself) is timed here
+        raw_connection = engine.raw_connection
+
+        def timed_raw_connection():
+            start = time.perf_counter()
+            try:
+                connection = raw_connection()
+            except PoolTimeoutError:
+                self.record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            self.record_wait(time.perf_counter() - start)
+            return connection
+
+        engine.raw_connection = timed_raw_connection
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        bucket = next((i for i, bound in enumerate(self.WAIT_BUCKETS) if seconds < bound), len(self.WAIT_BUCKETS))
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_histogram[bucket] += 1
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"<{bound * 1000:g}ms" for bound in self.WAIT_BUCKETS] + [f">={self.WAIT_BUCKETS[-1] * 1000:g}ms"]
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.waits,
+                "wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_histogram": dict(zip(labels, self.wait_histogram)),
+            }
+
 
+def pool_stats(engine, metrics: PoolMetrics) -> dict:
+    """A kapcsolatkészlet aktuális állapota és a számlálók"""
+    pool = engine.pool
+    stats = {"dialect": engine.dialect.name, "pool": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+        )
+    stats.update(metrics.snapshot())
+    return stats
+
+
+def async_database_url(url: str) -> str:
+    """A DATABASE_URL async meghajtós változata (aiosqlite / asyncpg)"""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    raise ValueError(f"Nem támogatott adatbázis async módban: {scheme}")
+
+
+def create_db_engine(url: str, factory=create_engine):
+    # SQLite esetén szükséges a connect_args beállítása
+    if url.startswith("sqlite"):
+        return create_sqlite_engine(url, factory=factory)
+    return create_postgres_engine(url, factory=factory)
+
+
+# The sync engine is always there: migrations, render workers and the export use it
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+if DB_ASYNC:
+    async_engine = create_db_engine(async_database_url(DATABASE_URL), factory=create_async_engine)
+    # Same Session subclass as SessionLocal, so its event listeners (search index) apply here too.
+    # Nothing is expired on commit: attributes must not be lazily reloaded outside run_sync.
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False, sync_session_class=SessionLocal.class_
+    )
+    request_engine = async_engine.sync_engine
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+    request_engine = engine
+
+# Metrics of the engine that serves the requests
+pool_metrics = PoolMetrics()
+pool_metrics.install(request_engine)
+
+# The session type the endpoints receive from get_db
+RequestSession = Union[Session, AsyncSession]
+
+
+def database_stats() -> dict:
+    return {"async": DB_ASYNC, **pool_stats(request_engine, pool_metrics)}
+
 
-def get_db():
+def get_sync_db():
+    # The connection is checked out by the first query (and its pool wait measured there):
+    # an upload spooling its body or waiting for a parse worker holds none
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# FastAPI dependency of the endpoints
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+
+async def run_sync(db: RequestSession, fn, *args, **kwargs):
+    """Szinkron ORM kód futtatása a kérés sessionjével: fn(session, *args).
+
+    Async módban az AsyncSession.run_sync greenletjében (az eseményhurokban),
+    egyébként a threadpoolban, mint a sima `def` végpontok.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def release(db: RequestSession):
+    """A kérés sessionjének lezárása, a kapcsolat visszakerül a poolba (pl. hosszú streaming válasz előtt)"""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+async def dispose_engines():
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,99 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+import models
+from crud import MEASUREMENT_MODELS
+from docx_generator import UPLOADS_BASE_PATH, generate_protocol_docx, generate_eph_docx
+from docx_templates import render_template_docx, template_fingerprint
+from file_cache import CACHE_DIR, DiskLRUCache
+from image_processing import JPEG_QUALITY, PRINT_MAX_PX
+
+# Bump when the generated document layout changes, so old cache entries are not served
+RENDERER_VERSION = "3"
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Rendered documents, capped at DOCX_CACHE_MAX_MB
+docx_cache = DiskLRUCache(
+    CACHE_DIR / "docx",
+    max_bytes=int(os.environ.get("DOCX_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    suffix=".docx",
+)
+
+# Columns that do not affect the rendered document
+_IGNORED_COLUMNS = {"created_at", "updated_at"}
+
+
+def _row_values(row) -> tuple:
+    return tuple(
+        (column.key, getattr(row, column.key))
+        for column in row.__table__.columns
+        if column.key not in _IGNORED_COLUMNS
+    )
+
+
+def _image_stamp(image) -> tuple:
+    try:
+        stat = (UPLOADS_BASE_PATH / image.image_path).stat()
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return (None, None)
+
+
+def protocol_cache_key(protocol: models.Protocol) -> str:
+    """Tartalom hash a jegyzőkönyv sorából, a gyereksoraiból, a képfájlok mtime értékéből és a sablonból"""
+    digest = hashlib.sha256()
+    digest.update(f"renderer:{RENDERER_VERSION}:{PRINT_MAX_PX}:{JPEG_QUALITY}".encode())
+    digest.update(f"template:{template_fingerprint(protocol.protocol_type)}".encode())
+    digest.update(repr(_row_values(protocol)).encode())
+    for name in MEASUREMENT_MODELS:
+        for row in getattr(protocol, name):
+            digest.update(repr((name, _row_values(row))).encode())
+    for defect in protocol.protocol_defects:
+        digest.update(repr(("defect", _row_values(defect))).encode())
+        if defect.defect_type:
+            digest.update(repr(("defect_type", _row_values(defect.defect_type))).encode())
+        for image in defect.images:
+            digest.update(repr(("image", _row_values(image), _image_stamp(image))).encode())
+    return digest.hexdigest()
+
+
+def protocol_filename(protocol: models.Protocol) -> str:
+    prefix = "EPH" if protocol.protocol_type == "eph" else "VBF"
+    return f"{prefix}_jegyzokonyv_{protocol.serial_number.replace('/', '_')}.docx"
+
+
+def _render(protocol: models.Protocol) -> bytes:
+    docx_bytes = render_template_docx(protocol)
+    if docx_bytes is None:
+        if protocol.protocol_type == "eph":
+            docx_bytes = generate_eph_docx(protocol)
+        else:
+            docx_bytes = generate_protocol_docx(protocol)
+    return docx_bytes
+
+
+def render_protocol_docx(protocol: models.Protocol, key: str = None) -> Path:
+    """Word dokumentum a gyorsítótárból, vagy generálás és mentés a gyorsítótárba"""
+    key = key or protocol_cache_key(protocol)
+    path = docx_cache.get(key)
+    if path is not None:
+        return path
+    return docx_cache.put(key, _render(protocol))
+
+
+def open_protocol_docx(protocol: models.Protocol, key: str = None) -> BinaryIO:
+    """Word dokumentum megnyitva: a gyorsítótárból, vagy a frissen generált bájtokból.
+
+    Letöltéshez ezt kell használni: a megnyitott fájlt egy közbeni kiürítés sem veszi el.
+    """
+    key = key or protocol_cache_key(protocol)
+    cached = docx_cache.open(key)
+    if cached is not None:
+        return cached
+    docx_bytes = _render(protocol)
+    docx_cache.put(key, docx_bytes)
+    return io.BytesIO(docx_bytes)
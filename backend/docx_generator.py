@@ -1,5 +1,5 @@
 from docx import Document
-from docx.shared import Inches, Pt, Cm, RGBColor
+from docx.shared import Cm, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml.ns import qn
@@ -8,6 +8,9 @@ from io import BytesIO
 from pathlib import Path
 import os
 
+from docx_tables import add_measurement_table
+from image_processing import print_image_path
+
 # Check environment for explicit upload path (Docker), fallback to local relative
 ENV_UPLOADS = os.environ.get("UPLOAD_DIR")
 if ENV_UPLOADS:
@@ -195,8 +198,8 @@ def add_defects_section(doc, protocol):
                 try:
                     img_path = UPLOADS_BASE_PATH / img.image_path
                     if img_path.exists():
-                        # Add image with max width of 15cm
-                        doc.add_picture(str(img_path), width=Cm(15))
+                        # Add the print-sized derivative with max width of 15cm (original stays archived)
+                        doc.add_picture(str(print_image_path(img_path)), width=Cm(15))
                         
                         # Add image caption
                         caption = doc.add_paragraph()
@@ -209,6 +212,85 @@ def add_defects_section(doc, protocol):
         doc.add_paragraph()  # Spacing between defects
 
 
+def point_row(measurement) -> list:
+    """Pontszámozott mérés (Rpe, hurokimpedancia) sor cellaszövegei"""
+    return [
+        str(measurement.point_number),
+        measurement.location,
+        f"{float(measurement.value_ohm):.2f}",
+        'Igen' if measurement.passed else 'Nem',
+    ]
+
+
+def insulation_row(ins) -> list:
+    """Szigetelési / áramköri lista sor cellaszövegei"""
+    br_val_str = f"{float(ins.breaker_value):.1f}".rstrip('0').rstrip('.') if ins.breaker_value else ""
+    breaker = f"{ins.breaker_type or ''}{br_val_str}"
+
+    wire_cross_str = f"{float(ins.wire_cross_section):.1f}".rstrip('0').rstrip('.') if ins.wire_cross_section else ""
+    wire = f"{ins.wire_material or ''} {wire_cross_str}"
+
+    zs_val_str = f"{float(ins.zs_value_ohm):.2f}" if ins.zs_value_ohm else "-"
+    du_val_str = f"{float(ins.du_value_percent):.1f}" if ins.du_value_percent else "-"
+    zs_du = f"{zs_val_str} / {du_val_str}"
+
+    ln = f"{float(ins.ln_value_mohm):.1f}" if ins.ln_value_mohm else '-'
+    lpe = f"{float(ins.lpe_value_mohm):.1f}" if ins.lpe_value_mohm else '-'
+    npe = f"{float(ins.npe_value_mohm):.1f}" if ins.npe_value_mohm else '-'
+
+    return [
+        ins.circuit_name,
+        breaker if breaker else '-',
+        wire.strip() if wire.strip() else '-',
+        zs_du if zs_du != "- / -" else "-",
+        ins.fire_rating or '-',
+        f"L-N: {ln}\nL-PE: {lpe}\nN-PE: {npe}",
+        'Megfelel' if ins.passed else 'Nem mf.',
+    ]
+
+
+def rcd_row(rcd) -> list:
+    """FI-relé vizsgálat sor cellaszövegei"""
+    breaker = f"{rcd.breaker_type or 'B'} {rcd.breaker_value or '-'}" if rcd.breaker_type or rcd.breaker_value else '-'
+    wire = f"{rcd.wire_material or 'Cu'} {rcd.wire_cross_section or '-'} mm²" if rcd.wire_material or rcd.wire_cross_section else '-'
+    return [
+        rcd.circuit_name or '-',
+        breaker,
+        wire,
+        rcd.test_type or '-',
+        str(rcd.rated_current_ma) if rcd.rated_current_ma else '30',
+        f"{float(rcd.trip_time_ms):.2f}" if rcd.trip_time_ms else '-',
+        'Igen' if rcd.passed else 'Nem',
+    ]
+
+
+EPH_ELEMENT_TYPES = {
+    'water_pipe': 'Vízcső',
+    'gas_pipe_metered': 'Gázcső (mérő előtt)',
+    'gas_pipe_unmetered': 'Gázcső (mérő után)',
+    'heating_pipe': 'Fűtéscső',
+    'metal_bathtub': 'Fémkád',
+    'shower_tray': 'Zuhanytálca',
+    'lightning_conductor': 'Villámhárító',
+    'cable_tray': 'Kábeltálca',
+    'other': 'Egyéb'
+}
+
+
+def eph_row(i, eph) -> list:
+    """EPH bekötés sor cellaszövegei (i: sorszám, ha nincs pontszám)"""
+    elem_display = eph.element_name
+    if eph.element_type and eph.element_type != 'other':
+        elem_display = EPH_ELEMENT_TYPES.get(eph.element_type, eph.element_name)
+    return [
+        str(eph.point_number or i + 1),
+        elem_display,
+        eph.connection_point or 'EPH sín',
+        f"{float(eph.continuity_resistance):.2f}" if eph.continuity_resistance else '-',
+        '✓' if eph.passed else '✗',
+    ]
+
+
 def generate_protocol_docx(protocol) -> bytes:
     """Generate Word document from protocol data"""
     doc = Document()
@@ -330,20 +412,7 @@ A megfelelőség határértékei:
     
     rpe_data = protocol.rpe_measurements if protocol.rpe_measurements else []
     if rpe_data:
-        rpe_table = doc.add_table(rows=len(rpe_data) + 1, cols=4)
-        add_table_borders(rpe_table)
-        
-        headers = ['Pont', 'Hely', 'Rpe (Ω)', 'Megfelel']
-        for i, h in enumerate(headers):
-            rpe_table.rows[0].cells[i].text = h
-            set_cell_shading(rpe_table.rows[0].cells[i], 'D9D9D9')
-        
-        for i, rpe in enumerate(rpe_data):
-            row = rpe_table.rows[i + 1]
-            row.cells[0].text = str(rpe.point_number)
-            row.cells[1].text = rpe.location
-            row.cells[2].text = f"{float(rpe.value_ohm):.2f}"
-            row.cells[3].text = 'Igen' if rpe.passed else 'Nem'
+        add_measurement_table(doc, ['Pont', 'Hely', 'Rpe (Ω)', 'Megfelel'], map(point_row, rpe_data))
     else:
         doc.add_paragraph('Nincs mérési adat.')
     
@@ -354,48 +423,9 @@ A megfelelőség határértékei:
     
     ins_data = protocol.insulation_measurements if protocol.insulation_measurements else []
     if ins_data:
-        ins_table = doc.add_table(rows=len(ins_data) + 1, cols=7)
-        add_table_borders(ins_table)
-        
         headers = ['Áramkör\nés helye', 'Túláramvéd.\n(Típus/A)', 'Vezeték\n(anyag/mm²)', 'Zs (Ω) / dU (%)', 'Tűz.o.', 'Riso (MΩ)', 'Eredmény']
-        for i, h in enumerate(headers):
-            ins_table.rows[0].cells[i].text = h
-            set_cell_shading(ins_table.rows[0].cells[i], 'D9D9D9')
-            # Optional: set smaller font size for headers
-            if ins_table.rows[0].cells[i].paragraphs[0].runs:
-                ins_table.rows[0].cells[i].paragraphs[0].runs[0].font.size = Pt(9)
-        
-        for i, ins in enumerate(ins_data):
-            row = ins_table.rows[i + 1]
-            row.cells[0].text = ins.circuit_name
-            
-            br_val_str = f"{float(ins.breaker_value):.1f}".rstrip('0').rstrip('.') if ins.breaker_value else ""
-            breaker = f"{ins.breaker_type or ''}{br_val_str}"
-            row.cells[1].text = breaker if breaker else '-'
-            
-            wire_cross_str = f"{float(ins.wire_cross_section):.1f}".rstrip('0').rstrip('.') if ins.wire_cross_section else ""
-            wire = f"{ins.wire_material or ''} {wire_cross_str}"
-            row.cells[2].text = wire.strip() if wire.strip() else '-'
-            
-            zs_val_str = f"{float(ins.zs_value_ohm):.2f}" if ins.zs_value_ohm else "-"
-            du_val_str = f"{float(ins.du_value_percent):.1f}" if ins.du_value_percent else "-"
-            zs_du = f"{zs_val_str} / {du_val_str}"
-            row.cells[3].text = zs_du if zs_du != "- / -" else "-"
-            
-            row.cells[4].text = ins.fire_rating or '-'
-            
-            ln = f"{float(ins.ln_value_mohm):.1f}" if ins.ln_value_mohm else '-'
-            lpe = f"{float(ins.lpe_value_mohm):.1f}" if ins.lpe_value_mohm else '-'
-            npe = f"{float(ins.npe_value_mohm):.1f}" if ins.npe_value_mohm else '-'
-            row.cells[5].text = f"L-N: {ln}\nL-PE: {lpe}\nN-PE: {npe}"
-            
-            row.cells[6].text = 'Megfelel' if ins.passed else 'Nem mf.'
-            
-            # Reduce font size for measurement rows to fit
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        run.font.size = Pt(8.5)
+        # Smaller fonts so the seven columns fit
+        add_measurement_table(doc, headers, map(insulation_row, ins_data), font_size=8.5, header_font_size=9)
     else:
         doc.add_paragraph('Nincs mérési adat.')
     
@@ -406,20 +436,7 @@ A megfelelőség határértékei:
     
     loop_data = protocol.loop_impedance_measurements if protocol.loop_impedance_measurements else []
     if loop_data:
-        loop_table = doc.add_table(rows=len(loop_data) + 1, cols=4)
-        add_table_borders(loop_table)
-        
-        headers = ['Pont', 'Hely', 'Zs (Ω)', 'Megfelel']
-        for i, h in enumerate(headers):
-            loop_table.rows[0].cells[i].text = h
-            set_cell_shading(loop_table.rows[0].cells[i], 'D9D9D9')
-        
-        for i, loop in enumerate(loop_data):
-            row = loop_table.rows[i + 1]
-            row.cells[0].text = str(loop.point_number)
-            row.cells[1].text = loop.location
-            row.cells[2].text = f"{float(loop.value_ohm):.2f}"
-            row.cells[3].text = 'Igen' if loop.passed else 'Nem'
+        add_measurement_table(doc, ['Pont', 'Hely', 'Zs (Ω)', 'Megfelel'], map(point_row, loop_data))
     else:
         doc.add_paragraph('Nincs mérési adat.')
     
@@ -430,26 +447,9 @@ A megfelelőség határértékei:
     
     rcd_data = protocol.rcd_tests if protocol.rcd_tests else []
     if rcd_data:
-        rcd_table = doc.add_table(rows=len(rcd_data) + 1, cols=8)
-        add_table_borders(rcd_table)
-        
         headers = ['Áramkör', 'Megszakító', 'Vezeték', 'Vizsgálat',
                    'IΔn (mA)', 'Idő (ms)', 'Megfelel']
-        for i, h in enumerate(headers):
-            rcd_table.rows[0].cells[i].text = h
-            set_cell_shading(rcd_table.rows[0].cells[i], 'D9D9D9')
-        
-        for i, rcd in enumerate(rcd_data):
-            row = rcd_table.rows[i + 1]
-            row.cells[0].text = rcd.circuit_name or '-'
-            breaker = f"{rcd.breaker_type or 'B'} {rcd.breaker_value or '-'}" if rcd.breaker_type or rcd.breaker_value else '-'
-            row.cells[1].text = breaker
-            wire = f"{rcd.wire_material or 'Cu'} {rcd.wire_cross_section or '-'} mm²" if rcd.wire_material or rcd.wire_cross_section else '-'
-            row.cells[2].text = wire
-            row.cells[3].text = rcd.test_type or '-'
-            row.cells[4].text = str(rcd.rated_current_ma) if rcd.rated_current_ma else '30'
-            row.cells[5].text = f"{float(rcd.trip_time_ms):.2f}" if rcd.trip_time_ms else '-'
-            row.cells[6].text = 'Igen' if rcd.passed else 'Nem'
+        add_measurement_table(doc, headers, map(rcd_row, rcd_data))
     else:
         doc.add_paragraph('Nincs mérési adat.')
     
@@ -638,39 +638,8 @@ def generate_eph_docx(protocol) -> bytes:
     eph_data = protocol.eph_measurements if protocol.eph_measurements else []
     
     if eph_data:
-        element_types = {
-            'water_pipe': 'Vízcső',
-            'gas_pipe_metered': 'Gázcső (mérő előtt)',
-            'gas_pipe_unmetered': 'Gázcső (mérő után)',
-            'heating_pipe': 'Fűtéscső',
-            'metal_bathtub': 'Fémkád',
-            'shower_tray': 'Zuhanytálca',
-            'lightning_conductor': 'Villámhárító',
-            'cable_tray': 'Kábeltálca',
-            'other': 'Egyéb'
-        }
-        
-        eph_table = doc.add_table(rows=len(eph_data) + 1, cols=5)
-        add_table_borders(eph_table)
-        
-        # Header row
         headers = ['#', 'Bekötött elem', 'Bekötési pont', 'R (Ω)', 'Megfelelő']
-        for i, h in enumerate(headers):
-            eph_table.rows[0].cells[i].text = h
-            set_cell_shading(eph_table.rows[0].cells[i], 'D9D9D9')
-        
-        for i, eph in enumerate(eph_data):
-            row = eph_table.rows[i + 1]
-            row.cells[0].text = str(eph.point_number or i + 1)
-            
-            elem_display = eph.element_name
-            if eph.element_type and eph.element_type != 'other':
-                elem_display = element_types.get(eph.element_type, eph.element_name)
-            row.cells[1].text = elem_display
-            
-            row.cells[2].text = eph.connection_point or 'EPH sín'
-            row.cells[3].text = f"{float(eph.continuity_resistance):.2f}" if eph.continuity_resistance else '-'
-            row.cells[4].text = '✓' if eph.passed else '✗'
+        add_measurement_table(doc, headers, (eph_row(i, eph) for i, eph in enumerate(eph_data)))
     else:
         doc.add_paragraph('Nincs EPH bekötési adat.')
     
@@ -0,0 +1,75 @@
+from typing import Optional, Sequence
+from xml.sax.saxutils import escape
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Emu, Pt
+
+HEADER_FILL = 'D9D9D9'
+
+_BORDERS = ''.join(
+    f'<w:{name} w:val="single" w:sz="4" w:space="0" w:color="000000"/>'
+    for name in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+)
+
+
+def table_paragraph_style(doc, size: float) -> str:
+    """A megadott betűméretű táblázat bekezdésstílus azonosítója (első használatkor létrejön)"""
+    name = f'Táblázat {size:g} pt'
+    try:
+        style = doc.styles[name]
+    except KeyError:
+        style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = doc.styles['Normal']
+        style.font.size = Pt(size)
+    return style.style_id
+
+
+def _paragraph(text: str, style_id: Optional[str]) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ''
+    if not text:
+        return f'<w:p>{ppr}</w:p>'
+    # Line breaks inside a cell become <w:br/>, like python-docx's cell.text setter
+    content = '<w:br/>'.join(f'<w:t xml:space="preserve">{escape(line)}</w:t>' for line in text.split('\n'))
+    return f'<w:p>{ppr}<w:r>{content}</w:r></w:p>'
+
+
+def _row(cells: Sequence[str], tcpr: str, style_id: Optional[str]) -> str:
+    return '<w:tr>' + ''.join(f'<w:tc>{tcpr}{_paragraph(text, style_id)}</w:tc>' for text in cells) + '</w:tr>'
+
+
+def add_measurement_table(doc, headers: Sequence[str], rows, font_size: float = None, header_font_size: float = None):
+    """Keretezett mérési táblázat (szürke fejléc) a dokumentum végére, egyetlen w:tbl elemként.
+
+    A table.rows[i].cells[j] minden hívásnál újraépíti a cellarácsot, így a cellánkénti
+    kitöltés a sorok számában négyzetes; itt a teljes tábla XML egy menetben készül.
+    A betűméret cellánkénti run formázás helyett bekezdésstílusból jön.
+    """
+    section = doc.sections[-1]
+    col_width = Emu((section.page_width - section.left_margin - section.right_margin) // len(headers)).twips
+    header_style = table_paragraph_style(doc, header_font_size) if header_font_size else None
+    body_style = table_paragraph_style(doc, font_size) if font_size else None
+
+    cell_width = f'<w:tcW w:type="dxa" w:w="{col_width}"/>'
+    parts = [
+        f'<w:tbl {nsdecls("w")}><w:tblPr><w:tblW w:type="auto" w:w="0"/>',
+        f'<w:tblBorders>{_BORDERS}</w:tblBorders>',
+        '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" w:lastColumn="0" w:noHBand="0" w:noVBand="1"/>',
+        '</w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{col_width}"/>' * len(headers),
+        '</w:tblGrid>',
+        _row(headers, f'<w:tcPr>{cell_width}<w:shd w:val="clear" w:color="auto" w:fill="{HEADER_FILL}"/></w:tcPr>', header_style),
+    ]
+    body_tcpr = f'<w:tcPr>{cell_width}</w:tcPr>'
+    parts.extend(_row(cells, body_tcpr, body_style) for cells in rows)
+    parts.append('</w:tbl>')
+
+    body = doc.element.body
+    table = parse_xml(''.join(parts))
+    # The body ends with the section properties: the table goes right before them
+    sect_pr = body.find(qn('w:sectPr'))
+    if sect_pr is not None:
+        sect_pr.addprevious(table)
+    else:
+        body.append(table)
@@ -0,0 +1,359 @@
+import copy
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docx import Document
+from docx.oxml.ns import qn
+from lxml import etree
+
+from docx_generator import add_defects_section, eph_row, insulation_row, point_row, rcd_row
+
+# Word templates (docker-compose mounts ./templates here): vbf.docx and eph.docx.
+# A protocol type without a template is generated in code (docx_generator).
+TEMPLATES_DIR = Path(os.environ.get("TEMPLATES_DIR", "templates"))
+TEMPLATE_FILES = {"vbf": "vbf.docx", "eph": "eph.docx"}
+
+# {{serial_number}}, {{ins.circuit_name}}; a table row with {{<collection>.<field>}} repeats per item
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][\w.]*)\s*\}\}")
+# A paragraph holding only this placeholder is replaced by the defects section
+DEFECTS_MARKER = "{{defects_section}}"
+
+# Field names of the repeating row collections, in the cell order of docx_generator's row functions
+ROW_FIELDS = {
+    "rpe": ("point_number", "location", "value_ohm", "passed"),
+    "ins": ("circuit_name", "breaker", "wire", "zs_du", "fire_rating", "riso", "passed"),
+    "loop": ("point_number", "location", "value_ohm", "passed"),
+    "rcd": ("circuit_name", "breaker", "wire", "test_type", "rated_current_ma", "trip_time_ms", "passed"),
+    "eph": ("point_number", "element", "connection_point", "resistance", "passed"),
+    "summary": ("test_name", "result", "comment"),
+}
+
+_W_P, _W_T, _W_BR, _W_TR = qn("w:p"), qn("w:t"), qn("w:br"), qn("w:tr")
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+_FILLED_PART_RE = re.compile(r"word/(document|header\d*|footer\d*)\.xml")
+_STYLES_PART = "word/styles.xml"
+_W_STYLE, _W_STYLE_ID, _W_NAME, _W_VAL = qn("w:style"), qn("w:styleId"), qn("w:name"), qn("w:val")
+# Style references in the defects section, and the styles a copied style depends on
+_STYLE_REFS = (qn("w:pStyle"), qn("w:rStyle"), qn("w:tblStyle"))
+_STYLE_LINKS = (qn("w:basedOn"), qn("w:next"), qn("w:link"))
+
+
+def _format(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Igen" if value else "Nem"
+    if isinstance(value, date):
+        return value.strftime("%Y.%m.%d.")
+    return str(value)
+
+
+def protocol_values(protocol) -> Dict[str, str]:
+    """Egyszerű helyőrzők: a jegyzőkönyv oszlopai szövegként"""
+    return {column.key: _format(getattr(protocol, column.key)) for column in protocol.__table__.columns}
+
+
+def protocol_rows(protocol) -> Dict[str, List[Dict[str, str]]]:
+    """Ismétlődő sorok gyűjteményenként, ugyanazokkal a cellaszövegekkel, mint a kódból generált táblák"""
+    cells = {
+        "rpe": map(point_row, protocol.rpe_measurements),
+        "ins": map(insulation_row, protocol.insulation_measurements),
+        "loop": map(point_row, protocol.loop_impedance_measurements),
+        "rcd": map(rcd_row, protocol.rcd_tests),
+        "eph": (eph_row(i, eph) for i, eph in enumerate(protocol.eph_measurements)),
+        "summary": ([item.test_name, item.result, item.comment or ""] for item in protocol.summary_results),
+    }
+    rows = {}
+    for name, items in cells.items():
+        keys = [f"{name}.index", *(f"{name}.{field}" for field in ROW_FIELDS[name])]
+        rows[name] = [dict(zip(keys, (str(i), *texts))) for i, texts in enumerate(items, start=1)]
+    return rows
+
+
+def _set_text(t, text: str):
+    """w:t szövegének beállítása; a sortörésekből <w:br/> lesz"""
+    lines = text.split("\n")
+    t.text = lines[0]
+    t.set(_XML_SPACE, "preserve")
+    anchor = t
+    for line in lines[1:]:
+        br = etree.Element(_W_BR)
+        anchor.addnext(br)
+        anchor = etree.Element(_W_T)
+        anchor.text = line
+        anchor.set(_XML_SPACE, "preserve")
+        br.addnext(anchor)
+
+
+def fill_paragraph(p, values: Dict[str, str]):
+    """Helyőrzők cseréje egy bekezdésben, akkor is, ha Word több run-ra bontotta őket.
+
+    Az érték a helyőrző első karakterét tartalmazó w:t-be kerül (annak formázásával),
+    a helyőrző többi része kikerül a következő w:t elemekből.
+    """
+    ts = list(p.iter(_W_T))
+    texts = [t.text or "" for t in ts]
+    full = "".join(texts)
+    if "{{" not in full:
+        return
+    matches = [m for m in PLACEHOLDER_RE.finditer(full) if m.group(1) in values]
+    if not matches:
+        return
+
+    lengths = [len(text) for text in texts]
+    starts = [sum(lengths[:i]) for i in range(len(lengths))]
+
+    def node_at(position: int) -> int:
+        return next(i for i in range(len(texts)) if starts[i] <= position < starts[i] + lengths[i])
+
+    changed = set()
+    # Right to left, so the offsets of earlier matches stay valid
+    for match in reversed(matches):
+        start, end = match.span()
+        first, last = node_at(start), node_at(end - 1)
+        value = values[match.group(1)]
+        if first == last:
+            texts[first] = texts[first][:start - starts[first]] + value + texts[first][end - starts[first]:]
+        else:
+            texts[first] = texts[first][:start - starts[first]] + value
+            for i in range(first + 1, last):
+                texts[i] = ""
+            texts[last] = texts[last][end - starts[last]:]
+        changed.update(range(first, last + 1))
+
+    for i in changed:
+        _set_text(ts[i], texts[i])
+
+
+def _text(element) -> str:
+    return "".join(t.text or "" for t in element.iter(_W_T))
+
+
+@lru_cache(maxsize=1)
+def _default_styles() -> Dict[str, etree._Element]:
+    """A python-docx alapsablon stílusai azonosító szerint (ezekkel készül a hibák fejezet)"""
+    return {style.get(_W_STYLE_ID): style for style in Document().styles.element.iter(_W_STYLE)}
+
+
+def _style_name(style) -> Optional[str]:
+    name = style.find(_W_NAME)
+    return name.get(_W_VAL).lower() if name is not None else None
+
+
+@dataclass
+class DocxTemplate:
+    """Betöltött sablon: a ZIP tagok nyers bájtjai és a helyőrzőket tartalmazó XML részek fái"""
+    path: Path
+    data: bytes
+    fingerprint: str
+    members: List[Tuple[zipfile.ZipInfo, bytes]]
+    parts: Dict[str, etree._Element]
+    has_defects_marker: bool
+    styles: Optional[etree._Element] = None  # word/styles.xml, if there is a defects section
+    style_names: Dict[str, Optional[str]] = field(default_factory=dict)  # styleId -> lower-case name
+    _styles_with: Dict[frozenset, bytes] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "DocxTemplate":
+        return cls.from_bytes(path, path.read_bytes())
+
+    @classmethod
+    def from_bytes(cls, path: Path, data: bytes) -> "DocxTemplate":
+        members = []
+        parts = {}
+        styles = None
+        with zipfile.ZipFile(io.BytesIO(data)) as package:
+            for info in package.infolist():
+                content = package.read(info)
+                members.append((info, content))
+                if _FILLED_PART_RE.fullmatch(info.filename):
+                    parts[info.filename] = etree.fromstring(content)
+                elif info.filename == _STYLES_PART:
+                    styles = etree.fromstring(content)
+        if "word/document.xml" not in parts:
+            raise ValueError(f"A sablon nem Word dokumentum: {path}")
+        has_marker = any(
+            _text(p).strip() == DEFECTS_MARKER
+            for p in parts["word/document.xml"].iter(_W_P)
+        )
+        if has_marker and styles is None:
+            # The defects section needs its heading styles defined in the package
+            raise ValueError(f"A sablonból hiányzik a {_STYLES_PART}: {path}")
+        if not has_marker:
+            styles = None  # Only the defects section needs them
+        style_names = {}
+        for style in styles.iter(_W_STYLE) if styles is not None else ():
+            style_names[style.get(_W_STYLE_ID)] = _style_name(style)
+        return cls(path, data, hashlib.sha256(data).hexdigest(), members, parts, has_marker, styles, style_names)
+
+    def _style_id(self, style_id: str) -> Optional[str]:
+        """Az alapsablon stílusának megfelelője a sablonban: azonos azonosító vagy azonos név
+        (pl. magyar Wordben a "heading 2" azonosítója "Cmsor2"); None, ha nincs ilyen."""
+        if style_id in self.style_names:
+            return style_id
+        default = _default_styles().get(style_id)
+        name = _style_name(default) if default is not None else None
+        return next((template_id for template_id, template_name in self.style_names.items()
+                     if name and template_name == name), None)
+
+    def adopt_styles(self, element, missing: set):
+        """A hibák fejezet stílushivatkozásai a sablon stílusaira; amelyik nincs meg, a missing-be kerül"""
+        for ref in element.iter(*_STYLE_REFS):
+            style_id = self._style_id(ref.get(_W_VAL))
+            if style_id is None:
+                missing.add(ref.get(_W_VAL))
+            else:
+                ref.set(_W_VAL, style_id)
+
+    def styles_with(self, missing: set) -> bytes:
+        """word/styles.xml a hiányzó stílusokkal (és amire azok épülnek) az alapsablonból kiegészítve"""
+        key = frozenset(missing)
+        content = self._styles_with.get(key)
+        if content is None:
+            root = copy.deepcopy(self.styles)
+            defaults = _default_styles()
+            pending = sorted(missing)
+            added = set()
+            while pending:
+                style_id = pending.pop(0)
+                if style_id in added or style_id not in defaults:
+                    continue
+                added.add(style_id)
+                style = copy.deepcopy(defaults[style_id])
+                for link in style.iter(*_STYLE_LINKS):
+                    linked = self._style_id(link.get(_W_VAL))
+                    if linked is None:
+                        pending.append(link.get(_W_VAL))
+                    else:
+                        link.set(_W_VAL, linked)
+                root.append(style)
+            content = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+            self._styles_with[key] = content
+        return content
+
+    def fill(self, root, protocol, values: Dict[str, str], rows: Dict[str, List[Dict[str, str]]],
+             missing_styles: set):
+        # Repeating rows: clone the template row for every item of its collection
+        for tr in list(root.iter(_W_TR)):
+            names = {m.group(1).split(".", 1)[0] for m in PLACEHOLDER_RE.finditer(_text(tr))}
+            collection = next((name for name in names if name in rows), None)
+            if collection is None:
+                continue
+            for item in rows[collection]:
+                clone = copy.deepcopy(tr)
+                item_values = {**values, **item}
+                for p in clone.iter(_W_P):
+                    fill_paragraph(p, item_values)
+                tr.addprevious(clone)
+            tr.getparent().remove(tr)
+
+        for p in list(root.iter(_W_P)):
+            if self.has_defects_marker and _text(p).strip() == DEFECTS_MARKER:
+                for element in defects_elements(protocol):
+                    self.adopt_styles(element, missing_styles)
+                    p.addprevious(element)
+                p.getparent().remove(p)
+            else:
+                fill_paragraph(p, values)
+
+    def render(self, protocol) -> bytes:
+        values = protocol_values(protocol)
+        rows = protocol_rows(protocol)
+        missing_styles = set()
+        filled = {}
+        for name, root in self.parts.items():
+            # Only the parsed XML is copied per render; every other part is reused as bytes
+            root = copy.deepcopy(root)
+            self.fill(root, protocol, values, rows, missing_styles)
+            filled[name] = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        if missing_styles:
+            filled[_STYLES_PART] = self.styles_with(missing_styles)
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as out:
+            for info, content in self.members:
+                out.writestr(info, filled.get(info.filename, content))
+        return buf.getvalue()
+
+
+def defects_elements(protocol) -> list:
+    """A hibák fejezet elemei (a kódból generált dokumentummal azonos tartalom, képek nélkül)"""
+    scratch = Document()
+    add_defects_section(scratch, protocol)
+    return [element for element in scratch.element.body if element.tag != qn("w:sectPr")]
+
+
+_templates: Dict[str, Optional[DocxTemplate]] = {}
+_lock = threading.Lock()
+
+
+def _load(name: str) -> Optional[DocxTemplate]:
+    path = TEMPLATES_DIR / TEMPLATE_FILES[name]
+    if not path.is_file():
+        return None
+    return DocxTemplate.load(path)
+
+
+def load_templates():
+    """Sablonok betöltése induláskor"""
+    with _lock:
+        for name in TEMPLATE_FILES:
+            _templates[name] = _load(name)
+            if _templates[name] is not None:
+                print(f"DOCX sablon betöltve: {_templates[name].path}")
+
+
+def template_sources() -> Dict[str, Optional[Tuple[Path, bytes]]]:
+    """A betöltött sablonok (útvonal, tartalom) párjai a render workereknek"""
+    sources = {}
+    for name in TEMPLATE_FILES:
+        template = get_template(name)
+        sources[name] = (template.path, template.data) if template is not None else None
+    return sources
+
+
+def install_templates(sources: Dict[str, Optional[Tuple[Path, bytes]]]):
+    """Render worker inicializáló: a szerver sablonpéldányai, nem a lemezen lévő (esetleg újabb) fájlok.
+
+    Így a worker ugyanazzal a sablonnal renderel, amelynek a hash értéke a szerver
+    gyorsítótár kulcsában van.
+    """
+    with _lock:
+        for name, source in sources.items():
+            _templates[name] = DocxTemplate.from_bytes(*source) if source is not None else None
+
+
+def get_template(protocol_type: Optional[str]) -> Optional[DocxTemplate]:
+    name = "eph" if protocol_type == "eph" else "vbf"
+    with _lock:
+        if name not in _templates:
+            _templates[name] = _load(name)
+        return _templates[name]
+
+
+def template_fingerprint(protocol_type: Optional[str]) -> str:
+    """A sablonfájl hash értéke (üres, ha nincs sablon) a DOCX gyorsítótár kulcsához"""
+    template = get_template(protocol_type)
+    return template.fingerprint if template is not None else ""
+
+
+def render_template_docx(protocol) -> Optional[bytes]:
+    """Word dokumentum a sablonból, vagy None, ha a kódból generált dokumentum kell.
+
+    Hibákhoz csatolt képek esetén (ha a sablonban van hibák fejezet) is None: a képek
+    beágyazását csak a docx_generator kezeli.
+    """
+    template = get_template(protocol.protocol_type)
+    if template is None:
+        return None
+    if template.has_defects_marker and any(defect.images for defect in protocol.protocol_defects):
+        return None
+    return template.render(protocol)
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+# Server-side caches live here, outside uploads/ (which /api/uploads serves publicly)
+CACHE_DIR = Path(os.environ.get("CACHE_DIR", "cache"))
+
+
+class DiskLRUCache:
+    """Méretkorlátos, fájlrendszer alapú LRU gyorsítótár.
+
+    Minden bejegyzés egy fájl a gyorsítótár mappájában, a kulcs a fájlnév.
+    A legutóbbi használat időpontja a fájl mtime értéke (találatkor frissül),
+    a méretkorlát túllépésekor a legrégebben használt fájlok törlődnek.
+    Az írás atomi (ideiglenes fájl + átnevezés), így több worker folyamat is
+    használhatja ugyanazt a mappát.
+    """
+
+    def __init__(self, directory, max_bytes: int, suffix: str = ""):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Bejegyzés útvonala, vagy None ha nincs a gyorsítótárban"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Bejegyzés megnyitása olvasásra, vagy None ha nincs a gyorsítótárban.
+
+        A get() útvonalát egy másik kérés kiürítése a használat előtt törölheti,
+        a megnyitott fájl viszont a törlés után is végigolvasható.
+        """
+        path = self.path_for(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return f
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Bejegyzés mentése, majd a méretkorlát érvényesítése.
+
+        Az új bejegyzés akkor is megmarad, ha egymagában nagyobb a korlátnál
+        (a következő mentés kiüríti), így a visszaadott útvonal mindig létezik.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None):
+        """Legrégebben használt bejegyzések törlése a méretkorlát alá (a `keep` fájl kivételével)"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            if keep is None or entry.path != str(keep):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "max_bytes": self.max_bytes}
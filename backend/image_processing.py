@@ -0,0 +1,105 @@
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+# Defect photos are embedded 15 cm wide; the print derivative has just enough pixels for that
+PRINT_WIDTH_CM = 15
+PRINT_DPI = int(os.environ.get("IMAGE_PRINT_DPI", "200"))
+PRINT_MAX_PX = round(PRINT_WIDTH_CM / 2.54 * PRINT_DPI)
+JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
+
+# Bounding box sizes (px) served by /api/uploads/{path}?size=; 256 is made at upload time
+THUMBNAIL_SIZES = (128, 256, 512)
+DEFAULT_THUMBNAIL_SIZE = 256
+
+
+def derivative_path(original: Path, variant: str) -> Path:
+    """Származtatott kép útvonala az eredeti mellett (pl. <uuid>.print.jpg)"""
+    return original.with_name(f"{original.stem}.{variant}.jpg")
+
+
+_DERIVATIVE_RE = re.compile(r"\.(print|thumb\d+)\.jpg$")
+
+
+def is_derivative(path: Path) -> bool:
+    """Származtatott kép-e (nyomtatási változat vagy bélyegkép), nem eredeti feltöltés"""
+    return _DERIVATIVE_RE.search(path.name) is not None
+
+
+def _normalized(img: Image.Image) -> Image.Image:
+    """EXIF tájolás alkalmazása és RGB-re alakítás (átlátszóság fehér háttérre)"""
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _save_jpeg(img: Image.Image, target: Path):
+    # Unique temp name + rename: concurrent requests may generate the same variant
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-", suffix=".jpg")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def create_print_derivative(original: Path) -> Path:
+    """Nyomtatási méretre kicsinyített, újratömörített JPEG készítése"""
+    target = derivative_path(original, "print")
+    with Image.open(original) as img:
+        img = _normalized(img)
+        # Only the width is fixed by the document; portrait photos keep their height ratio
+        img.thumbnail((PRINT_MAX_PX, PRINT_MAX_PX * 4), Image.LANCZOS)
+        _save_jpeg(img, target)
+    return target
+
+
+def create_thumbnail(original: Path, size: int) -> Path:
+    """Bélyegkép készítése (size x size képpontba illesztve)"""
+    target = derivative_path(original, f"thumb{size}")
+    with Image.open(original) as img:
+        img.draft("RGB", (size, size))  # JPEG: decode at a reduced scale
+        img = _normalized(img)
+        img.thumbnail((size, size), Image.LANCZOS)
+        _save_jpeg(img, target)
+    return target
+
+
+def thumbnail_path(original: Path, size: int) -> Path:
+    """Bélyegkép útvonala, első kéréskor legenerálva"""
+    target = derivative_path(original, f"thumb{size}")
+    if target.exists():
+        return target
+    return create_thumbnail(original, size)
+
+
+def print_image_path(original: Path) -> Path:
+    """A dokumentumba ágyazandó kép: a nyomtatási változat, szükség esetén legenerálva.
+
+    Ha a változat nem készíthető el (pl. sérült fájl), az eredeti kép útvonala tér vissza.
+    """
+    target = derivative_path(original, "print")
+    if target.exists():
+        return target
+    try:
+        return create_print_derivative(original)
+    except Exception:
+        return original
+
+
+def remove_image_files(original: Path):
+    """Eredeti kép és az összes származtatott változat törlése"""
+    for path in [original, *original.parent.glob(f"{original.stem}.*.jpg")]:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            pass  # Ignore file deletion errors
@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from padfx_mapping import Reading, TABLE_SCHEMAS, import_result
+from padfx_parser import read_padfx
+
+# Bytes read from the start of an upload to recognise its format
+HEAD_BYTES = 4096
+
+_BOM = b"\xef\xbb\xbf"
+
+
+@dataclass(frozen=True)
+class Importer:
+    """Mérési fájlformátum: felismerés a fájl elejéből és a mérések olvasása Reading folyamként"""
+    name: str
+    label: str
+    extensions: Tuple[str, ...]
+    detect: Callable[[bytes], bool]  # First HEAD_BYTES bytes -> is it this format
+    read: Callable[..., Iterator[Reading]]  # (binary file, raw_nodes) -> readings
+
+
+# Importer registry, in detection order
+IMPORTERS: Dict[str, Importer] = {}
+
+
+def register(importer: Importer) -> Importer:
+    IMPORTERS[importer.name] = importer
+    return importer
+
+
+def supported_extensions() -> Tuple[str, ...]:
+    return tuple(ext for importer in IMPORTERS.values() for ext in importer.extensions)
+
+
+def detect_format(head: bytes) -> Importer:
+    """Formátum felismerése a fájl első bájtjaiból (ValueError, ha egyik importer sem ismeri fel)"""
+    for importer in IMPORTERS.values():
+        if importer.detect(head):
+            return importer
+    raise ValueError("Ismeretlen mérési fájlformátum.")
+
+
+def import_file(path, raw: bool = False) -> dict:
+    """Mérési fájl feldolgozása a felismert importerrel, mentésre kész táblasorokká"""
+    raw_nodes = [] if raw else None
+    with open(path, "rb") as f:
+        importer = detect_format(f.read(HEAD_BYTES))
+        f.seek(0)
+        result = import_result(importer.read(f, raw_nodes), raw_nodes)
+    result["format"] = importer.name
+    return result
+
+
+def import_file_json(path, raw: bool = False) -> bytes:
+    """Feldolgozás és JSON kódolás egyben (a padfx_pool worker folyamatban)"""
+    return json.dumps(jsonable_encoder(import_file(path, raw)), ensure_ascii=False).encode("utf-8")
+
+
+# ==================== PADFX (Metrel) ====================
+
+register(Importer(
+    name="padfx",
+    label="Metrel PADFX",
+    extensions=(".padfx",),
+    detect=lambda head: head.startswith(b"PK\x03\x04"),
+    read=read_padfx,
+))
+
+
+# ==================== CSV ====================
+# One reading per line. The header names the target table ("table"), the circuit
+# or location ("circuit") and schemas.*Create fields; numbers may carry a unit
+# ("0.45Ohm", ">199.9MOhm") or are read in the unit of the field.
+
+def _csv_delimiter(first_line: str) -> Optional[str]:
+    """A fejléc elválasztója (; , vagy tab), ha a fejlécben van table és circuit oszlop"""
+    for delimiter in ";,\t":
+        columns = [column.strip().lower() for column in first_line.split(delimiter)]
+        if "table" in columns and "circuit" in columns:
+            return delimiter
+    return None
+
+
+def _detect_csv(head: bytes) -> bool:
+    first_line = head.removeprefix(_BOM).split(b"\n", 1)[0]
+    return _csv_delimiter(first_line.decode("utf-8", errors="replace")) is not None
+
+
+def read_csv(source, raw_nodes=None) -> Iterator[Reading]:
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        first_line = text.readline()
+        delimiter = _csv_delimiter(first_line) or ";"
+        header = [column.strip().lower() for column in next(csv.reader([first_line], delimiter=delimiter))]
+        for line in csv.reader(text, delimiter=delimiter):
+            values = {field: value.strip() for field, value in zip(header, line) if value.strip()}
+            if not values:
+                continue
+            table = values.pop("table", "")
+            circuit = values.pop("circuit", "")
+            if table not in TABLE_SCHEMAS:
+                yield Reading(circuit, None, {}, table)
+                continue
+            yield Reading(circuit, table, values, table)
+    finally:
+        text.detach()  # The caller closes the binary file
+
+
+register(Importer(
+    name="csv",
+    label="CSV (table;circuit;mezők)",
+    extensions=(".csv",),
+    detect=_detect_csv,
+    read=read_csv,
+))
+
+
+# ==================== XML ====================
+# <Readings><Reading table="..." circuit="..." zs_value_ohm="0.45Ohm" .../></Readings>
+
+def read_xml(source, raw_nodes=None) -> Iterator[Reading]:
+    """A <Readings> gyökér közvetlen <Reading> gyerekei; a feldolgozott elemek lekerülnek a fáról"""
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == "Reading" and root.tag == "Readings":
+            values = dict(elem.attrib)
+            table = values.pop("table", "")
+            circuit = values.pop("circuit", "")
+            if table not in TABLE_SCHEMAS:
+                yield Reading(circuit, None, {}, table)
+            else:
+                yield Reading(circuit, table, values, table)
+        root.remove(elem)
+    if root is None or root.tag != "Readings":
+        raise ValueError("Az XML fájl nem tartalmaz <Readings> elemet.")
+
+
+register(Importer(
+    name="xml",
+    label="XML (<Readings>)",
+    extensions=(".xml",),
+    detect=lambda head: head.removeprefix(_BOM).lstrip().startswith(b"<") and b"<Readings" in head,
+    read=read_xml,
+))
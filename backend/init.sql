@@ -34,6 +34,7 @@ CREATE TABLE IF NOT EXISTS rpe_measurements (
     location VARCHAR(255),
     value_ohm DECIMAL(10,4),
     passed BOOLEAN,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -46,6 +47,7 @@ CREATE TABLE IF NOT EXISTS insulation_measurements (
     lpe_value_mohm DECIMAL(10,2),
     npe_value_mohm DECIMAL(10,2),
     passed BOOLEAN,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -57,6 +59,7 @@ CREATE TABLE IF NOT EXISTS loop_impedance_measurements (
     location VARCHAR(255),
     value_ohm DECIMAL(10,4),
     passed BOOLEAN,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -68,6 +71,7 @@ CREATE TABLE IF NOT EXISTS rcd_tests (
     current_description VARCHAR(100),
     trip_time_ms DECIMAL(10,2),
     passed BOOLEAN,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -78,6 +82,7 @@ CREATE TABLE IF NOT EXISTS summary_results (
     test_name VARCHAR(100),
     result VARCHAR(50),
     comment TEXT,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -97,6 +102,7 @@ CREATE TABLE IF NOT EXISTS earthing_measurements (
     humidity DECIMAL(5, 2),
     weather_conditions VARCHAR(100),
     notes TEXT,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -111,6 +117,7 @@ CREATE TABLE IF NOT EXISTS eph_measurements (
     passed BOOLEAN,
     point_number INTEGER,
     notes TEXT,
+    position INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -157,9 +164,21 @@ CREATE TABLE IF NOT EXISTS template_texts (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Teljes szöveges keresés: jegyzőkönyvenként egy dokumentum (saját mezők + hibák),
+-- az alkalmazás tartja karban minden íráskor (search.py)
+CREATE TABLE IF NOT EXISTS protocol_search (
+    protocol_id UUID PRIMARY KEY REFERENCES protocols(id) ON DELETE CASCADE,
+    document TEXT NOT NULL,
+    document_tsv TSVECTOR NOT NULL
+);
+
 -- Indexek a gyorsabb lekérdezésekhez
-CREATE INDEX IF NOT EXISTS idx_protocols_serial ON protocols(serial_number);
 CREATE INDEX IF NOT EXISTS idx_protocols_date ON protocols(inspection_date);
+CREATE INDEX IF NOT EXISTS idx_protocols_created ON protocols(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_protocols_type_created ON protocols(protocol_type, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_protocols_status_created ON protocols(status, created_at, id);
+-- Sorozatszám előtag keresés (LIKE 'előtag%') nem "C" kollációval is
+CREATE INDEX IF NOT EXISTS idx_protocols_serial_pattern ON protocols(serial_number text_pattern_ops);
 CREATE INDEX IF NOT EXISTS idx_rpe_protocol ON rpe_measurements(protocol_id);
 CREATE INDEX IF NOT EXISTS idx_insulation_protocol ON insulation_measurements(protocol_id);
 CREATE INDEX IF NOT EXISTS idx_loop_protocol ON loop_impedance_measurements(protocol_id);
@@ -171,6 +190,7 @@ CREATE INDEX IF NOT EXISTS idx_protocol_defects_protocol ON protocol_defects(pro
 CREATE INDEX IF NOT EXISTS idx_protocol_defects_type ON protocol_defects(defect_type_id);
 CREATE INDEX IF NOT EXISTS idx_defect_images_defect ON defect_images(protocol_defect_id);
 CREATE INDEX IF NOT EXISTS idx_template_texts_category ON template_texts(category);
+CREATE INDEX IF NOT EXISTS idx_protocol_search_tsv ON protocol_search USING GIN(document_tsv);
 
 -- Hibatípusok alapadatok feltöltése
 INSERT INTO defect_types (id, name, category, severity, description, template_text, recommended_action, standard_reference) VALUES 
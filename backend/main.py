@@ -1,29 +1,52 @@
-from fastapi import FastAPI, Depends, HTTPException, Response, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, UploadFile, File, Form, Header
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
+import hashlib
 import os
 import shutil
 import uuid as uuid_module
+from datetime import date, datetime
 from pathlib import Path
+from urllib.parse import quote
 
-from database import get_db, engine, Base
+import aiofiles
+
+from database import RequestSession, SessionLocal, database_stats, dispose_engines, engine, get_db, release, run_sync
 import models
 import schemas
-from docx_generator import generate_protocol_docx, generate_eph_docx
-from padfx_parser import parse_padfx_content
-from update_db import update_database
+import crud
+import docx_templates
+import importers
+import render_jobs
+import migrate_db
+import padfx_cache
+import padfx_pool
+import search
+import uploads
+from image_processing import (
+    DEFAULT_THUMBNAIL_SIZE, THUMBNAIL_SIZES,
+    create_print_derivative, create_thumbnail, is_derivative, remove_image_files, thumbnail_path
+)
+from docx_cache import DOCX_MEDIA_TYPE, docx_cache, open_protocol_docx, protocol_cache_key, protocol_filename
+from padfx_mapping import circuit_summary
 
 # Uploads directory
 UPLOADS_DIR = Path("uploads/defect_images")
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
-# Create tables and run schema updates
-Base.metadata.create_all(bind=engine)
-update_database()
+# Bring the schema to the current Alembic revision (no-op when it is already there)
+migrate_db.ensure_schema(engine)
+search.install(SessionLocal)
+# Word templates are parsed once; renders only copy and fill them
+docx_templates.load_templates()
+# Rendered documents and parse results used to be cached inside the publicly served uploads tree
+for _old_cache in ("docx_cache", "padfx_cache"):
+    shutil.rmtree(Path("uploads") / _old_cache, ignore_errors=True)
 
 app = FastAPI(
     title="VBF Jegyzőkönyv API",
@@ -31,6 +54,21 @@ app = FastAPI(
     version="1.0.0"
 )
 
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    render_jobs.shutdown()
+    padfx_pool.shutdown()
+    await dispose_engines()
+
+
+# Oversized uploads are refused before their body is read (added first, so CORS still wraps the 413)
+app.add_middleware(uploads.UploadLimitMiddleware, limits=[
+    (r"/api/import(-padfx)?", uploads.PADFX_MAX_BYTES),
+    (r"/api/protocols/[^/]+/import(-padfx)?", uploads.PADFX_MAX_BYTES),
+    (r"/api/protocols/[^/]+/defects/[^/]+/images", uploads.IMAGE_MAX_BYTES),
+])
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +76,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 # Static files
@@ -51,213 +90,399 @@ if os.path.exists(STATIC_DIR):
 async def root():
     html_path = "static/index.html"
     if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+        async with aiofiles.open(html_path, "r", encoding="utf-8") as f:
+            return HTMLResponse(content=await f.read())
     return HTMLResponse(content="<h1>VBF Jegyzőkönyv Alkalmazás</h1><p>Frontend nem található.</p>")
 
 
-# PADFX Import Endpoint
+# Measurement file import endpoints (PADFX, CSV, XML; see importers.py)
+PADFX_BUSY_DETAIL = "Túl sok folyamatban lévő PADFX feldolgozás, próbálja újra később."
+PADFX_WORKER_DETAIL = "A fájl feldolgozása szerverhiba miatt megszakadt, próbálja újra később."
+
+
+def check_import_filename(filename: str):
+    extensions = importers.supported_extensions()
+    if not filename.lower().endswith(extensions):
+        raise HTTPException(status_code=400, detail=f"Csak {', '.join(extensions)} fájlok tölthetők fel.")
+
+
+@app.post("/api/import")
 @app.post("/api/import-padfx")
-async def import_padfx(file: UploadFile = File(...)):
-    """Metrel PADFX mérési adatfájl feldolgozása és JSON-né alakítása"""
-    if not file.filename.endswith('.padfx'):
-        raise HTTPException(status_code=400, detail="Csak .padfx fájlok tölthetők fel.")
+async def import_padfx(file: UploadFile = File(...), raw: bool = False):
+    """Mérési fájl (Metrel PADFX, CSV, XML) feldolgozása mentésre kész táblasorokká (raw=true: nyers fával)"""
+    check_import_filename(file.filename)
+    # Spool to a temp file in chunks instead of reading the whole upload into memory,
+    # hashing it on the way: a repeated upload of the same export is served from the parse cache
+    digest = hashlib.sha256()
+    tmp_path = await uploads.spool_upload(file, uploads.PADFX_MAX_BYTES, Path(file.filename).suffix, digest)
     try:
-        content = await file.read()
-        parsed_data = parse_padfx_content(content)
-        return parsed_data
+        body = await padfx_cache.parse_json(tmp_path, digest.hexdigest(), raw)
+        return Response(content=body, media_type="application/json")
+    except padfx_pool.ParseQueueFull:
+        raise HTTPException(status_code=503, detail=PADFX_BUSY_DETAIL)
+    except padfx_pool.ParseWorkerDied:
+        raise HTTPException(status_code=503, detail=PADFX_WORKER_DETAIL)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+@app.post("/api/protocols/{protocol_id}/import")
+@app.post("/api/protocols/{protocol_id}/import-padfx")
+async def import_padfx_into_protocol(protocol_id: UUID, file: UploadFile = File(...), db: RequestSession = Depends(get_db)):
+    """Mérési fájl (PADFX, CSV, XML) közvetlen importálása egy jegyzőkönyvbe (egy tranzakcióban)"""
+    check_import_filename(file.filename)
+    if not await run_sync(db, Session.get, models.Protocol, protocol_id):
+        raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+
+    digest = hashlib.sha256()
+    tmp_path = await uploads.spool_upload(file, uploads.PADFX_MAX_BYTES, Path(file.filename).suffix, digest)
+    try:
+        parsed_data = await padfx_cache.parse(tmp_path, digest.hexdigest())
+    except padfx_pool.ParseQueueFull:
+        raise HTTPException(status_code=503, detail=PADFX_BUSY_DETAIL)
+    except padfx_pool.ParseWorkerDied:
+        raise HTTPException(status_code=503, detail=PADFX_WORKER_DETAIL)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    def save(db: Session):
+        try:
+            counts = crud.import_measurements(db, protocol_id, parsed_data["tables"])
+            db.commit()
+            return counts
+        except Exception:
+            db.rollback()
+            raise
+
+    counts = await run_sync(db, save)
+    return {
+        "status": "success",
+        "format": parsed_data["format"],
+        "counts": counts,
+        "unmapped": parsed_data["unmapped"],
+        "invalid": parsed_data["invalid"],
+        "out_of_range": parsed_data["out_of_range"],
+        "circuits": circuit_summary(parsed_data["tables"]),
+    }
 
 
 # Protocol CRUD endpoints
 @app.get("/api/protocols", response_model=List[schemas.ProtocolList])
-def list_protocols(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista összes jegyzőkönyv"""
-    protocols = db.query(models.Protocol).order_by(models.Protocol.created_at.desc()).offset(skip).limit(limit).all()
-    return protocols
+async def list_protocols(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    client_name: Optional[str] = None,
+    location_address: Optional[str] = None,
+    serial_number: Optional[str] = None,
+    protocol_type: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: RequestSession = Depends(get_db)
+):
+    """Jegyzőkönyvek listája szűréssel és kurzoros lapozással (legújabb elöl).
+
+    A következő oldal kurzora az X-Next-Cursor, a szűrt találatok száma az X-Total-Count fejlécben.
+    """
+    def load(db: Session):
+        query = crud.filter_protocols(
+            db.query(models.Protocol),
+            client_name=client_name,
+            location_address=location_address,
+            serial_number=serial_number,
+            protocol_type=protocol_type,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        try:
+            protocols, next_cursor = crud.list_protocols_page(query, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        response.headers["X-Total-Count"] = str(query.order_by(None).count())
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return [schemas.ProtocolList.model_validate(p) for p in protocols]
+
+    return await run_sync(db, load)
+
+
+@app.get("/api/search", response_model=List[schemas.ProtocolList])
+async def search_protocols(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=200),
+    db: RequestSession = Depends(get_db)
+):
+    """Teljes szöveges keresés (helyszín, megrendelő, összegzés, hibák), relevancia szerint"""
+    def load(db: Session):
+        ids = search.search_protocol_ids(db, q, limit)
+        if not ids:
+            return []
+        protocols = {p.id: p for p in db.query(models.Protocol).filter(models.Protocol.id.in_(ids))}
+        return [schemas.ProtocolList.model_validate(protocols[protocol_id]) for protocol_id in ids if protocol_id in protocols]
+
+    return await run_sync(db, load)
 
 
 @app.post("/api/protocols", response_model=schemas.Protocol)
-def create_protocol(protocol: schemas.ProtocolCreate, db: Session = Depends(get_db)):
+async def create_protocol(protocol: schemas.ProtocolCreate, db: RequestSession = Depends(get_db)):
     """Új jegyzőkönyv létrehozása"""
-    # Check if serial number exists
-    existing = db.query(models.Protocol).filter(models.Protocol.serial_number == protocol.serial_number).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Ez a sorszám már létezik")
-    
-    # Create protocol with EPH fields
-    db_protocol = models.Protocol(
-        serial_number=protocol.serial_number,
-        certificate_number=protocol.certificate_number,
-        location_address=protocol.location_address,
-        network_type=protocol.network_type,
-        client_name=protocol.client_name,
-        inspection_type=protocol.inspection_type,
-        inspection_date=protocol.inspection_date,
-        instrument_model=protocol.instrument_model,
-        calibration_valid_until=protocol.calibration_valid_until,
-        inspector_name=protocol.inspector_name,
-        professional_summary=protocol.professional_summary,
-        defect_list=protocol.defect_list,
-        status=protocol.status,
-        # EPH specific fields
-        protocol_type=protocol.protocol_type,
-        gas_provider_required=protocol.gas_provider_required,
-        gas_meter_number=protocol.gas_meter_number,
-        gas_appliance_type=protocol.gas_appliance_type,
-        pe_conductor_size=protocol.pe_conductor_size,
-        eph_conductor_size=protocol.eph_conductor_size,
-        pen_separation_point=protocol.pen_separation_point
+    def save(db: Session):
+        # Check if serial number exists
+        existing = db.query(models.Protocol).filter(models.Protocol.serial_number == protocol.serial_number).first()
+        if existing:
+            raise HTTPException(status_code=400, detail="Ez a sorszám már létezik")
+
+        # Create protocol with EPH fields
+        db_protocol = models.Protocol(
+            serial_number=protocol.serial_number,
+            certificate_number=protocol.certificate_number,
+            location_address=protocol.location_address,
+            network_type=protocol.network_type,
+            client_name=protocol.client_name,
+            inspection_type=protocol.inspection_type,
+            inspection_date=protocol.inspection_date,
+            instrument_model=protocol.instrument_model,
+            calibration_valid_until=protocol.calibration_valid_until,
+            inspector_name=protocol.inspector_name,
+            professional_summary=protocol.professional_summary,
+            defect_list=protocol.defect_list,
+            status=protocol.status,
+            # EPH specific fields
+            protocol_type=protocol.protocol_type,
+            gas_provider_required=protocol.gas_provider_required,
+            gas_meter_number=protocol.gas_meter_number,
+            gas_appliance_type=protocol.gas_appliance_type,
+            pe_conductor_size=protocol.pe_conductor_size,
+            eph_conductor_size=protocol.eph_conductor_size,
+            pen_separation_point=protocol.pen_separation_point
+        )
+        db.add(db_protocol)
+        db.flush()
+
+        # Add measurements, one INSERT statement per table
+        for name in crud.MEASUREMENT_MODELS:
+            crud.bulk_insert_measurements(db, db_protocol.id, name, getattr(protocol, name))
+
+        db.commit()
+        return schemas.Protocol.model_validate(crud.get_protocol(db, db_protocol.id))
+
+    return await run_sync(db, save)
+
+
+@app.post("/api/protocols/export")
+async def export_protocols(export: schemas.ProtocolExportRequest, db: RequestSession = Depends(get_db)):
+    """Több jegyzőkönyv Word dokumentumainak letöltése egy ZIP archívumban"""
+    if not any(export.model_dump().values()):
+        raise HTTPException(status_code=400, detail="Adjon meg azonosítókat vagy legalább egy szűrőfeltételt")
+
+    def load_ids(db: Session):
+        query = db.query(models.Protocol.id)
+        if export.ids:
+            query = query.filter(models.Protocol.id.in_(export.ids))
+        query = crud.filter_protocols(
+            query,
+            client_name=export.client_name,
+            protocol_type=export.protocol_type,
+            status=export.status,
+            date_from=export.date_from,
+            date_to=export.date_to
+        )
+        query = query.order_by(models.Protocol.serial_number).limit(render_jobs.EXPORT_MAX_PROTOCOLS + 1)
+        return [row.id for row in query.all()]
+
+    protocol_ids = await run_sync(db, load_ids)
+    # The workers load the protocols themselves: no connection is held while the archive streams
+    await release(db)
+    if not protocol_ids:
+        raise HTTPException(status_code=404, detail="Nincs a szűrésnek megfelelő jegyzőkönyv")
+    if len(protocol_ids) > render_jobs.EXPORT_MAX_PROTOCOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Egyszerre legfeljebb {render_jobs.EXPORT_MAX_PROTOCOLS} jegyzőkönyv exportálható, szűkítse a feltételeket"
+        )
+    
+    filename = f"jegyzokonyvek_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        render_jobs.export_zip(protocol_ids),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
-    db.add(db_protocol)
-    db.flush()
-    
-    # Add VBF measurements
-    for rpe in protocol.rpe_measurements:
-        db.add(models.RpeMeasurement(protocol_id=db_protocol.id, **rpe.model_dump()))
-    
-    for ins in protocol.insulation_measurements:
-        db.add(models.InsulationMeasurement(protocol_id=db_protocol.id, **ins.model_dump()))
-    
-    for loop in protocol.loop_impedance_measurements:
-        db.add(models.LoopImpedanceMeasurement(protocol_id=db_protocol.id, **loop.model_dump()))
-    
-    for rcd in protocol.rcd_tests:
-        db.add(models.RcdTest(protocol_id=db_protocol.id, **rcd.model_dump()))
-    
-    for summary in protocol.summary_results:
-        db.add(models.SummaryResult(protocol_id=db_protocol.id, **summary.model_dump()))
-    
-    # Add EPH/Earthing measurements
-    for earthing in protocol.earthing_measurements:
-        data = earthing.model_dump()
-        # Auto-check passed if Ra <= limit
-        if data.get('ra_value') is not None and data.get('passed') is None:
-            data['passed'] = data['ra_value'] <= data.get('limit_value', 10.0)
-        db.add(models.EarthingMeasurement(protocol_id=db_protocol.id, **data))
-    
-    for eph in protocol.eph_measurements:
-        db.add(models.EphMeasurement(protocol_id=db_protocol.id, **eph.model_dump()))
-    
-    db.commit()
-    db.refresh(db_protocol)
-    return db_protocol
 
 
-@app.get("/api/protocols/{protocol_id}", response_model=schemas.Protocol)
-def get_protocol(protocol_id: UUID, db: Session = Depends(get_db)):
-    """Jegyzőkönyv lekérdezése"""
-    protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
+def load_protocol(db: Session, protocol_id: UUID) -> models.Protocol:
+    protocol = crud.get_protocol(db, protocol_id)
     if not protocol:
         raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
     return protocol
 
 
+@app.get("/api/protocols/{protocol_id}", response_model=schemas.Protocol)
+async def get_protocol(protocol_id: UUID, db: RequestSession = Depends(get_db)):
+    """Jegyzőkönyv lekérdezése"""
+    def load(db: Session):
+        return schemas.Protocol.model_validate(load_protocol(db, protocol_id))
+
+    return await run_sync(db, load)
+
+
 @app.put("/api/protocols/{protocol_id}", response_model=schemas.Protocol)
-def update_protocol(protocol_id: UUID, protocol_update: schemas.ProtocolUpdate, db: Session = Depends(get_db)):
+async def update_protocol(protocol_id: UUID, protocol_update: schemas.ProtocolUpdate, db: RequestSession = Depends(get_db)):
     """Jegyzőkönyv frissítése"""
-    db_protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
-    if not db_protocol:
-        raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
-    
-    # Update basic fields (excluding measurement lists)
-    exclude_fields = {'rpe_measurements', 'insulation_measurements', 'loop_impedance_measurements', 
-                      'rcd_tests', 'summary_results', 'earthing_measurements', 'eph_measurements'}
-    update_data = protocol_update.model_dump(exclude_unset=True, exclude=exclude_fields)
-    for key, value in update_data.items():
-        if value is not None:
-            setattr(db_protocol, key, value)
-    
-    # Update VBF measurements if provided
-    if protocol_update.rpe_measurements is not None:
-        db.query(models.RpeMeasurement).filter(models.RpeMeasurement.protocol_id == protocol_id).delete()
-        for rpe in protocol_update.rpe_measurements:
-            db.add(models.RpeMeasurement(protocol_id=protocol_id, **rpe.model_dump()))
-    
-    if protocol_update.insulation_measurements is not None:
-        db.query(models.InsulationMeasurement).filter(models.InsulationMeasurement.protocol_id == protocol_id).delete()
-        for ins in protocol_update.insulation_measurements:
-            db.add(models.InsulationMeasurement(protocol_id=protocol_id, **ins.model_dump()))
-    
-    if protocol_update.loop_impedance_measurements is not None:
-        db.query(models.LoopImpedanceMeasurement).filter(models.LoopImpedanceMeasurement.protocol_id == protocol_id).delete()
-        for loop in protocol_update.loop_impedance_measurements:
-            db.add(models.LoopImpedanceMeasurement(protocol_id=protocol_id, **loop.model_dump()))
-    
-    if protocol_update.rcd_tests is not None:
-        db.query(models.RcdTest).filter(models.RcdTest.protocol_id == protocol_id).delete()
-        for rcd in protocol_update.rcd_tests:
-            db.add(models.RcdTest(protocol_id=protocol_id, **rcd.model_dump()))
-    
-    if protocol_update.summary_results is not None:
-        db.query(models.SummaryResult).filter(models.SummaryResult.protocol_id == protocol_id).delete()
-        for summary in protocol_update.summary_results:
-            db.add(models.SummaryResult(protocol_id=protocol_id, **summary.model_dump()))
-    
-    # Update EPH/Earthing measurements if provided
-    if protocol_update.earthing_measurements is not None:
-        db.query(models.EarthingMeasurement).filter(models.EarthingMeasurement.protocol_id == protocol_id).delete()
-        for earthing in protocol_update.earthing_measurements:
-            data = earthing.model_dump()
-            if data.get('ra_value') is not None and data.get('passed') is None:
-                data['passed'] = data['ra_value'] <= data.get('limit_value', 10.0)
-            db.add(models.EarthingMeasurement(protocol_id=protocol_id, **data))
-    
-    if protocol_update.eph_measurements is not None:
-        db.query(models.EphMeasurement).filter(models.EphMeasurement.protocol_id == protocol_id).delete()
-        for eph in protocol_update.eph_measurements:
-            db.add(models.EphMeasurement(protocol_id=protocol_id, **eph.model_dump()))
-    
-    db.commit()
-    db.refresh(db_protocol)
-    return db_protocol
+    def save(db: Session):
+        db_protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
+        if not db_protocol:
+            raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+
+        # Update basic fields (excluding measurement lists)
+        update_data = protocol_update.model_dump(exclude_unset=True, exclude=set(crud.MEASUREMENT_MODELS))
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(db_protocol, key, value)
+
+        # Sync measurement tables that were provided (only changed rows are written)
+        for name in crud.MEASUREMENT_MODELS:
+            items = getattr(protocol_update, name)
+            if items is not None:
+                crud.sync_measurements(db, protocol_id, name, items)
+
+        db.commit()
+        return schemas.Protocol.model_validate(crud.get_protocol(db, protocol_id))
+
+    return await run_sync(db, save)
 
 
 @app.delete("/api/protocols/{protocol_id}")
-def delete_protocol(protocol_id: UUID, db: Session = Depends(get_db)):
+async def delete_protocol(protocol_id: UUID, db: RequestSession = Depends(get_db)):
     """Jegyzőkönyv törlése"""
-    db_protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
-    if not db_protocol:
-        raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
-    
-    db.delete(db_protocol)
-    db.commit()
+    def remove(db: Session):
+        db_protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
+        if not db_protocol:
+            raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+
+        db.delete(db_protocol)
+        db.commit()
+
+    await run_sync(db, remove)
     return {"message": "Jegyzőkönyv törölve"}
 
 
 @app.get("/api/protocols/{protocol_id}/download")
-def download_protocol(protocol_id: UUID, db: Session = Depends(get_db)):
-    """Word dokumentum letöltése"""
-    protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
-    if not protocol:
-        raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+async def download_protocol(protocol_id: UUID, if_none_match: Optional[str] = Header(None), db: RequestSession = Depends(get_db)):
+    """Word dokumentum letöltése (tartalom hash alapú gyorsítótárral és ETag támogatással)"""
+    def load(db: Session):
+        protocol = load_protocol(db, protocol_id)
+        return protocol, protocol_cache_key(protocol)
+
+    # Every collection is loaded eagerly, so rendering can run outside the session
+    protocol, key = await run_sync(db, load)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    # Generate DOCX based on protocol type, unless already cached
+    docx_file = await run_in_threadpool(open_protocol_docx, protocol, key)
+    return docx_response(docx_file, protocol_filename(protocol), headers)
+
+
+def docx_response(docx_file, filename: str, headers: dict = None) -> StreamingResponse:
+    """Megnyitott Word fájl küldése (a gyorsítótár kiürítése közben is végigolvasható)"""
+    size = docx_file.seek(0, os.SEEK_END)
+    docx_file.seek(0)
+    quoted = quote(filename)
+    disposition = f'attachment; filename="{filename}"' if quoted == filename else f"attachment; filename*=utf-8''{quoted}"
+
+    def chunks():
+        with docx_file:
+            while chunk := docx_file.read(64 * 1024):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=DOCX_MEDIA_TYPE,
+        headers={**(headers or {}), "Content-Length": str(size), "Content-Disposition": disposition}
+    )
+
+
+def render_job_response(job: render_jobs.RenderJob) -> schemas.RenderJob:
+    return schemas.RenderJob(
+        id=job.id,
+        protocol_id=job.protocol_id,
+        status=job.status,
+        error=job.error,
+        download_url=f"/api/render-jobs/{job.id}/download" if job.status == "done" else None
+    )
+
+
+@app.post("/api/protocols/{protocol_id}/render", response_model=schemas.RenderJob, status_code=202)
+async def render_protocol(protocol_id: UUID, db: RequestSession = Depends(get_db)):
+    """Word dokumentum generálása háttérben (a job állapota lekérdezhető)"""
+    def load(db: Session):
+        protocol = load_protocol(db, protocol_id)
+        return protocol_cache_key(protocol), protocol_filename(protocol)
+
+    key, filename = await run_sync(db, load)
     
-    # Generate DOCX based on protocol type
-    if protocol.protocol_type == "eph":
-        docx_bytes = generate_eph_docx(protocol)
-        filename = f"EPH_jegyzokonyv_{protocol.serial_number.replace('/', '_')}.docx"
-    else:
-        docx_bytes = generate_protocol_docx(protocol)
-        filename = f"VBF_jegyzokonyv_{protocol.serial_number.replace('/', '_')}.docx"
+    # Already rendered documents need no worker
+    cached_path = docx_cache.get(key)
+    if cached_path is not None:
+        return render_job_response(render_jobs.completed(protocol_id, (str(cached_path), filename)))
     
-    return Response(
-        content=docx_bytes,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-    )
+    try:
+        job = render_jobs.submit(protocol_id)
+    except render_jobs.RenderQueueFull:
+        raise HTTPException(status_code=503, detail="Túl sok folyamatban lévő dokumentum generálás, próbálja újra később.")
+    return render_job_response(job)
+
+
+@app.get("/api/render-jobs/{job_id}", response_model=schemas.RenderJob)
+def get_render_job(job_id: str):
+    """Dokumentum generálási job állapota"""
+    job = render_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generálási feladat nem található")
+    return render_job_response(job)
+
+
+@app.get("/api/render-jobs/{job_id}/download")
+def download_render_job(job_id: str):
+    """Háttérben generált Word dokumentum letöltése"""
+    job = render_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generálási feladat nem található")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"A dokumentum generálása sikertelen: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="A dokumentum még nem készült el")
+    
+    docx_path, filename = job.result
+    try:
+        docx_file = open(docx_path, "rb")
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="A dokumentum már nem érhető el, indítsa újra a generálást")
+    return docx_response(docx_file, filename)
 
 
 @app.get("/api/next-serial")
-def get_next_serial(db: Session = Depends(get_db)):
+async def get_next_serial(db: RequestSession = Depends(get_db)):
     """Következő sorszám generálása"""
     from datetime import datetime
     year = datetime.now().year
     
     # Find last serial number for this year
-    last_protocol = db.query(models.Protocol).filter(
-        models.Protocol.serial_number.like(f"{year}/%")
-    ).order_by(models.Protocol.serial_number.desc()).first()
+    def load(db: Session):
+        return db.query(models.Protocol).filter(
+            models.Protocol.serial_number.like(f"{year}/%")
+        ).order_by(models.Protocol.serial_number.desc()).first()
+
+    last_protocol = await run_sync(db, load)
     
     if last_protocol:
         try:
@@ -277,120 +502,217 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/diagnostics")
+def diagnostics():
+    """Üzemeltetési számlálók: adatbázis kapcsolatkészlet, dokumentum és PADFX gyorsítótár"""
+    return {
+        "database": database_stats(),
+        "docx_cache": docx_cache.stats(),
+        "padfx_cache": padfx_cache.parse_cache.stats(),
+    }
+
+
+# ==================== MEASUREMENT ROWS API ====================
+
+# URL path segment -> (Protocol relationship, create, update and response schema)
+MEASUREMENT_ROUTES = {
+    "rpe-measurements": ("rpe_measurements", schemas.RpeMeasurementCreate, schemas.RpeMeasurementUpdate, schemas.RpeMeasurement),
+    "insulation-measurements": ("insulation_measurements", schemas.InsulationMeasurementCreate, schemas.InsulationMeasurementUpdate, schemas.InsulationMeasurement),
+    "loop-impedance-measurements": ("loop_impedance_measurements", schemas.LoopImpedanceMeasurementCreate, schemas.LoopImpedanceMeasurementUpdate, schemas.LoopImpedanceMeasurement),
+    "rcd-tests": ("rcd_tests", schemas.RcdTestCreate, schemas.RcdTestUpdate, schemas.RcdTest),
+    "summary-results": ("summary_results", schemas.SummaryResultCreate, schemas.SummaryResultUpdate, schemas.SummaryResult),
+    "earthing-measurements": ("earthing_measurements", schemas.EarthingMeasurementCreate, schemas.EarthingMeasurementUpdate, schemas.EarthingMeasurement),
+    "eph-measurements": ("eph_measurements", schemas.EphMeasurementCreate, schemas.EphMeasurementUpdate, schemas.EphMeasurement),
+}
+
+
+def register_measurement_routes(path: str, name: str, create_schema, update_schema, response_schema):
+    """Soronkénti végpontok (lista, hozzáadás, módosítás, törlés) egy mérési táblához"""
+    model = crud.MEASUREMENT_MODELS[name]
+
+    def require_protocol(db: Session, protocol_id: UUID):
+        if not db.query(models.Protocol.id).filter(models.Protocol.id == protocol_id).first():
+            raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+
+    def require_row(db: Session, protocol_id: UUID, row_id: UUID):
+        db_row = crud.get_measurement(db, protocol_id, name, row_id)
+        if not db_row:
+            raise HTTPException(status_code=404, detail="Mérési sor nem található")
+        return db_row
+
+    @app.get(f"/api/protocols/{{protocol_id}}/{path}", response_model=List[response_schema], name=f"list_{name}")
+    async def list_rows(protocol_id: UUID, db: RequestSession = Depends(get_db)):
+        """Mérési sorok listázása"""
+        def load(db: Session):
+            require_protocol(db, protocol_id)
+            rows = db.query(model).filter(model.protocol_id == protocol_id).order_by(model.position).all()
+            return [response_schema.model_validate(row) for row in rows]
+
+        return await run_sync(db, load)
+
+    @app.post(f"/api/protocols/{{protocol_id}}/{path}", response_model=response_schema, name=f"create_{name}")
+    async def create_row(protocol_id: UUID, item: create_schema, db: RequestSession = Depends(get_db)):
+        """Mérési sor hozzáadása"""
+        def save(db: Session):
+            require_protocol(db, protocol_id)
+            return response_schema.model_validate(crud.create_measurement(db, protocol_id, name, item))
+
+        return await run_sync(db, save)
+
+    @app.patch(f"/api/protocols/{{protocol_id}}/{path}/{{row_id}}", response_model=response_schema, name=f"update_{name}")
+    async def update_row(protocol_id: UUID, row_id: UUID, changes: update_schema, db: RequestSession = Depends(get_db)):
+        """Mérési sor részleges módosítása (csak a módosított sort adja vissza)"""
+        def save(db: Session):
+            db_row = require_row(db, protocol_id, row_id)
+            db_row = crud.update_measurement(db, db_row, name, changes.model_dump(exclude_unset=True))
+            return response_schema.model_validate(db_row)
+
+        return await run_sync(db, save)
+
+    @app.delete(f"/api/protocols/{{protocol_id}}/{path}/{{row_id}}", name=f"delete_{name}")
+    async def delete_row(protocol_id: UUID, row_id: UUID, db: RequestSession = Depends(get_db)):
+        """Mérési sor törlése"""
+        def remove(db: Session):
+            db.delete(require_row(db, protocol_id, row_id))
+            db.commit()
+
+        await run_sync(db, remove)
+        return {"message": "Mérési sor törölve"}
+
+
+for _path, (_name, _create_schema, _update_schema, _response_schema) in MEASUREMENT_ROUTES.items():
+    register_measurement_routes(_path, _name, _create_schema, _update_schema, _response_schema)
+
+
 # ==================== DEFECT TYPES API ====================
 
 @app.get("/api/defect-types", response_model=List[schemas.DefectType])
-def list_defect_types(db: Session = Depends(get_db)):
+async def list_defect_types(db: RequestSession = Depends(get_db)):
     """Lista összes előre definiált hibatípus"""
-    defect_types = db.query(models.DefectType).order_by(models.DefectType.id).all()
-    return defect_types
+    def load(db: Session):
+        defect_types = db.query(models.DefectType).order_by(models.DefectType.id).all()
+        return [schemas.DefectType.model_validate(d) for d in defect_types]
+
+    return await run_sync(db, load)
 
 
 @app.get("/api/defect-types/{defect_type_id}", response_model=schemas.DefectType)
-def get_defect_type(defect_type_id: str, db: Session = Depends(get_db)):
+async def get_defect_type(defect_type_id: str, db: RequestSession = Depends(get_db)):
     """Hibatípus lekérdezése"""
-    defect_type = db.query(models.DefectType).filter(models.DefectType.id == defect_type_id).first()
-    if not defect_type:
-        raise HTTPException(status_code=404, detail="Hibatípus nem található")
-    return defect_type
+    def load(db: Session):
+        defect_type = db.query(models.DefectType).filter(models.DefectType.id == defect_type_id).first()
+        if not defect_type:
+            raise HTTPException(status_code=404, detail="Hibatípus nem található")
+        return schemas.DefectType.model_validate(defect_type)
+
+    return await run_sync(db, load)
 
 
 # ==================== TEMPLATE TEXTS API ====================
 
 @app.get("/api/template-texts", response_model=List[schemas.TemplateText])
-def list_template_texts(category: Optional[str] = None, db: Session = Depends(get_db)):
+async def list_template_texts(category: Optional[str] = None, db: RequestSession = Depends(get_db)):
     """Lista sablon szövegek, opcionálisan kategória szerint szűrve"""
-    query = db.query(models.TemplateText)
-    if category:
-        query = query.filter(models.TemplateText.category == category)
-    return query.order_by(models.TemplateText.id).all()
+    def load(db: Session):
+        query = db.query(models.TemplateText)
+        if category:
+            query = query.filter(models.TemplateText.category == category)
+        return [schemas.TemplateText.model_validate(t) for t in query.order_by(models.TemplateText.id).all()]
+
+    return await run_sync(db, load)
 
 
 @app.get("/api/template-texts/{template_id}", response_model=schemas.TemplateText)
-def get_template_text(template_id: str, db: Session = Depends(get_db)):
+async def get_template_text(template_id: str, db: RequestSession = Depends(get_db)):
     """Sablon szöveg lekérdezése"""
-    template = db.query(models.TemplateText).filter(models.TemplateText.id == template_id).first()
-    if not template:
-        raise HTTPException(status_code=404, detail="Sablon szöveg nem található")
-    return template
+    def load(db: Session):
+        template = db.query(models.TemplateText).filter(models.TemplateText.id == template_id).first()
+        if not template:
+            raise HTTPException(status_code=404, detail="Sablon szöveg nem található")
+        return schemas.TemplateText.model_validate(template)
+
+    return await run_sync(db, load)
 
 
 # ==================== PROTOCOL DEFECTS API ====================
 
+def require_defect(db: Session, protocol_id: UUID, defect_id: UUID) -> models.ProtocolDefect:
+    db_defect = db.query(models.ProtocolDefect).filter(
+        models.ProtocolDefect.id == defect_id,
+        models.ProtocolDefect.protocol_id == protocol_id
+    ).first()
+    if not db_defect:
+        raise HTTPException(status_code=404, detail="Hiba nem található")
+    return db_defect
+
+
 @app.get("/api/protocols/{protocol_id}/defects", response_model=List[schemas.ProtocolDefect])
-def list_protocol_defects(protocol_id: UUID, db: Session = Depends(get_db)):
+async def list_protocol_defects(protocol_id: UUID, db: RequestSession = Depends(get_db)):
     """Lista jegyzőkönyvhöz rendelt hibák"""
-    protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
-    if not protocol:
-        raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
-    return protocol.protocol_defects
+    def load(db: Session):
+        protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
+        if not protocol:
+            raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+        return [schemas.ProtocolDefect.model_validate(d) for d in crud.get_protocol_defects(db, protocol_id)]
+
+    return await run_sync(db, load)
 
 
 @app.post("/api/protocols/{protocol_id}/defects", response_model=schemas.ProtocolDefect)
-def add_protocol_defect(protocol_id: UUID, defect: schemas.ProtocolDefectCreate, db: Session = Depends(get_db)):
+async def add_protocol_defect(protocol_id: UUID, defect: schemas.ProtocolDefectCreate, db: RequestSession = Depends(get_db)):
     """Hiba hozzáadása jegyzőkönyvhöz"""
-    protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
-    if not protocol:
-        raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
-    
-    # Check if defect type exists (if provided)
-    if defect.defect_type_id:
-        defect_type = db.query(models.DefectType).filter(models.DefectType.id == defect.defect_type_id).first()
-        if not defect_type:
-            raise HTTPException(status_code=400, detail="Hibatípus nem található")
-    
-    db_defect = models.ProtocolDefect(
-        protocol_id=protocol_id,
-        defect_type_id=defect.defect_type_id,
-        custom_description=defect.custom_description,
-        location=defect.location,
-        severity_override=defect.severity_override
-    )
-    db.add(db_defect)
-    db.commit()
-    db.refresh(db_defect)
-    return db_defect
+    def save(db: Session):
+        protocol = db.query(models.Protocol).filter(models.Protocol.id == protocol_id).first()
+        if not protocol:
+            raise HTTPException(status_code=404, detail="Jegyzőkönyv nem található")
+
+        # Check if defect type exists (if provided)
+        if defect.defect_type_id:
+            defect_type = db.query(models.DefectType).filter(models.DefectType.id == defect.defect_type_id).first()
+            if not defect_type:
+                raise HTTPException(status_code=400, detail="Hibatípus nem található")
+
+        db_defect = models.ProtocolDefect(
+            protocol_id=protocol_id,
+            defect_type_id=defect.defect_type_id,
+            custom_description=defect.custom_description,
+            location=defect.location,
+            severity_override=defect.severity_override
+        )
+        db.add(db_defect)
+        db.commit()
+        return schemas.ProtocolDefect.model_validate(crud.get_protocol_defect(db, protocol_id, db_defect.id))
+
+    return await run_sync(db, save)
 
 
 @app.put("/api/protocols/{protocol_id}/defects/{defect_id}", response_model=schemas.ProtocolDefect)
-def update_protocol_defect(protocol_id: UUID, defect_id: UUID, defect: schemas.ProtocolDefectCreate, db: Session = Depends(get_db)):
+async def update_protocol_defect(protocol_id: UUID, defect_id: UUID, defect: schemas.ProtocolDefectCreate, db: RequestSession = Depends(get_db)):
     """Hiba frissítése"""
-    db_defect = db.query(models.ProtocolDefect).filter(
-        models.ProtocolDefect.id == defect_id,
-        models.ProtocolDefect.protocol_id == protocol_id
-    ).first()
-    if not db_defect:
-        raise HTTPException(status_code=404, detail="Hiba nem található")
-    
-    for key, value in defect.model_dump(exclude_unset=True).items():
-        setattr(db_defect, key, value)
-    
-    db.commit()
-    db.refresh(db_defect)
-    return db_defect
+    def save(db: Session):
+        db_defect = require_defect(db, protocol_id, defect_id)
+        for key, value in defect.model_dump(exclude_unset=True).items():
+            setattr(db_defect, key, value)
+
+        db.commit()
+        return schemas.ProtocolDefect.model_validate(crud.get_protocol_defect(db, protocol_id, defect_id))
+
+    return await run_sync(db, save)
 
 
 @app.delete("/api/protocols/{protocol_id}/defects/{defect_id}")
-def delete_protocol_defect(protocol_id: UUID, defect_id: UUID, db: Session = Depends(get_db)):
+async def delete_protocol_defect(protocol_id: UUID, defect_id: UUID, db: RequestSession = Depends(get_db)):
     """Hiba törlése (és a hozzá tartozó képek is)"""
-    db_defect = db.query(models.ProtocolDefect).filter(
-        models.ProtocolDefect.id == defect_id,
-        models.ProtocolDefect.protocol_id == protocol_id
-    ).first()
-    if not db_defect:
-        raise HTTPException(status_code=404, detail="Hiba nem található")
-    
-    # Delete associated images from filesystem
-    for image in db_defect.images:
-        try:
-            image_path = UPLOADS_DIR / image.image_path.replace("defect_images/", "")
-            if image_path.exists():
-                image_path.unlink()
-        except Exception:
-            pass  # Ignore file deletion errors
-    
-    db.delete(db_defect)
-    db.commit()
+    def remove(db: Session):
+        db_defect = require_defect(db, protocol_id, defect_id)
+        image_paths = [image.image_path for image in db_defect.images]
+        db.delete(db_defect)
+        db.commit()
+        return image_paths
+
+    # Delete associated images (and their derivatives) from filesystem
+    for image_path in await run_sync(db, remove):
+        await run_in_threadpool(remove_image_files, UPLOADS_DIR / image_path.replace("defect_images/", ""))
     return {"message": "Hiba törölve"}
 
 
@@ -402,16 +724,11 @@ async def upload_defect_image(
     defect_id: UUID,
     file: UploadFile = File(...),
     description: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: RequestSession = Depends(get_db)
 ):
     """Kép feltöltése hibához"""
     # Verify defect exists and belongs to protocol
-    db_defect = db.query(models.ProtocolDefect).filter(
-        models.ProtocolDefect.id == defect_id,
-        models.ProtocolDefect.protocol_id == protocol_id
-    ).first()
-    if not db_defect:
-        raise HTTPException(status_code=404, detail="Hiba nem található")
+    await run_sync(db, require_defect, protocol_id, defect_id)
     
     # Validate file type
     allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
@@ -427,49 +744,84 @@ async def upload_defect_image(
     
     # Save file
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await uploads.save_upload(file, file_path, uploads.IMAGE_MAX_BYTES)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fájl mentése sikertelen: {str(e)}")
     
-    # Create database record
-    db_image = models.DefectImage(
-        protocol_defect_id=defect_id,
-        image_path=f"defect_images/{unique_filename}",
-        original_filename=file.filename,
-        description=description
-    )
-    db.add(db_image)
-    db.commit()
-    db.refresh(db_image)
+    # Print-sized derivative for the Word document and the list thumbnail; the original is kept for archive
+    try:
+        await run_in_threadpool(create_print_derivative, file_path)
+        await run_in_threadpool(create_thumbnail, file_path, DEFAULT_THUMBNAIL_SIZE)
+    except Exception:
+        await run_in_threadpool(remove_image_files, file_path)
+        raise HTTPException(status_code=400, detail="A kép nem dolgozható fel (sérült vagy nem támogatott formátum)")
     
-    return db_image
+    # Create database record
+    def save(db: Session):
+        db_image = models.DefectImage(
+            protocol_defect_id=defect_id,
+            image_path=f"defect_images/{unique_filename}",
+            original_filename=file.filename,
+            description=description
+        )
+        db.add(db_image)
+        db.commit()
+        db.refresh(db_image)
+        return schemas.DefectImage.model_validate(db_image)
+
+    return await run_sync(db, save)
 
 
 @app.get("/api/uploads/{path:path}")
-async def get_uploaded_file(path: str):
-    """Feltöltött fájl lekérdezése"""
-    file_path = Path("uploads") / path
-    if not file_path.exists():
+async def get_uploaded_file(
+    path: str,
+    size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Feltöltött fájl lekérdezése (size megadásakor bélyegkép)"""
+    uploads_root = Path("uploads").resolve()
+    file_path = (uploads_root / path).resolve()
+    if not file_path.is_relative_to(uploads_root) or not file_path.is_file():
         raise HTTPException(status_code=404, detail="Fájl nem található")
-    return FileResponse(file_path)
+    
+    if size is not None:
+        if is_derivative(file_path):
+            raise HTTPException(status_code=400, detail="Bélyegkép csak az eredeti képhez kérhető")
+        if size not in THUMBNAIL_SIZES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Érvénytelen bélyegkép méret. Engedélyezett: {', '.join(map(str, THUMBNAIL_SIZES))}"
+            )
+        try:
+            file_path = await run_in_threadpool(thumbnail_path, file_path, size)
+        except Exception:
+            raise HTTPException(status_code=415, detail="A fájlhoz nem készíthető bélyegkép")
+    
+    # Uploaded files get unique names and are never rewritten, so clients may keep them
+    stat = file_path.stat()
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(file_path, headers=headers)
 
 
 @app.delete("/api/defect-images/{image_id}")
-def delete_defect_image(image_id: UUID, db: Session = Depends(get_db)):
+async def delete_defect_image(image_id: UUID, db: RequestSession = Depends(get_db)):
     """Kép törlése"""
-    db_image = db.query(models.DefectImage).filter(models.DefectImage.id == image_id).first()
-    if not db_image:
-        raise HTTPException(status_code=404, detail="Kép nem található")
-    
-    # Delete file from filesystem
-    try:
-        image_path = UPLOADS_DIR / db_image.image_path.replace("defect_images/", "")
-        if image_path.exists():
-            image_path.unlink()
-    except Exception:
-        pass  # Ignore file deletion errors
-    
-    db.delete(db_image)
-    db.commit()
+    def remove(db: Session):
+        db_image = db.query(models.DefectImage).filter(models.DefectImage.id == image_id).first()
+        if not db_image:
+            raise HTTPException(status_code=404, detail="Kép nem található")
+
+        image_path = db_image.image_path
+        db.delete(db_image)
+        db.commit()
+        return image_path
+
+    # Delete file (and its derivatives) from filesystem
+    image_path = await run_sync(db, remove)
+    await run_in_threadpool(remove_image_files, UPLOADS_DIR / image_path.replace("defect_images/", ""))
     return {"message": "Kép törölve"}
@@ -1,26 +1,70 @@
-import sqlite3
-
-db_path = r"c:\Users\User\Downloads\Villamos_biztons_gi_ellen_rz_s (1)\vbf_jegyzokonyv\backend\vbf_database.db"
-conn = sqlite3.connect(db_path)
-c = conn.cursor()
-
-columns = [
-    ("breaker_type", "VARCHAR(50)"),
-    ("breaker_value", "NUMERIC(10, 2)"),
-    ("wire_material", "VARCHAR(50)"),
-    ("wire_cross_section", "NUMERIC(10, 2)"),
-    ("zs_value_ohm", "NUMERIC(10, 4)"),
-    ("du_value_percent", "NUMERIC(10, 2)"),
-    ("fire_rating", "VARCHAR(100)")
-]
-
-for col_name, col_type in columns:
-    try:
-        c.execute(f"ALTER TABLE insulation_measurements ADD COLUMN {col_name} {col_type}")
-        print(f"Added {col_name}")
-    except sqlite3.OperationalError as e:
-        print(f"Skipped {col_name} ({e})")
-
-conn.commit()
-conn.close()
-print("Migration done.")
+"""Adatbázis séma verziókezelés (Alembic).
+
+Indításkor csak a tárolt revíziót olvassuk ki; ha az megegyezik a SCHEMA_VERSION-nel,
+semmilyen további munka nem történik. Új revízió: alembic revision -m "leírás"
+(a backend mappából), utána a SCHEMA_VERSION átírása.
+
+Futtatás kézzel: python migrate_db.py
+"""
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+
+import schema_check
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = "0005_serial_pattern"
+ALEMBIC_INI = Path(__file__).with_name("alembic.ini")
+
+# Maintained by search.py (SQLite FTS5 also creates protocol_search_* shadow tables)
+_UNMANAGED_TABLE_PREFIX = "protocol_search"
+# PostgreSQL-only operator class index, created by migration 0005 (not in models.py)
+_UNMANAGED_INDEXES = {"idx_protocols_serial_pattern"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Alembic szűrő: a keresési index táblái és a csak PostgreSQL indexek nem részei a modelleknek"""
+    if type_ == "index" and name in _UNMANAGED_INDEXES:
+        return False
+    table_name = name if type_ == "table" else getattr(obj.table, "name", "")
+    return not (table_name or "").startswith(_UNMANAGED_TABLE_PREFIX)
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def current_revision(engine):
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def ensure_schema(engine) -> bool:
+    """Séma frissítése a SCHEMA_VERSION-re; True, ha futott migráció"""
+    revision = current_revision(engine)
+    if revision == SCHEMA_VERSION:
+        return False
+
+    logger.warning("Adatbázis séma frissítése: %s -> %s", revision or "(nincs verzió)", SCHEMA_VERSION)
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(conn), SCHEMA_VERSION)
+    # The revisions are written out by hand: report anything the models have that they missed
+    schema_check.check_indexes(engine, create=False)
+    return True
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    print("Adatbázis séma ellenőrzése...")
+    if ensure_schema(engine):
+        print(f"Séma frissítve: {SCHEMA_VERSION}")
+    else:
+        print(f"Az adatbázis már naprakész ({SCHEMA_VERSION}).")
@@ -0,0 +1,56 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from database import Base, DATABASE_URL
+import models  # noqa: F401 - registers the tables
+from migrate_db import include_object
+
+config = context.config
+
+# Called from the application (migrate_db.ensure_schema) the connection is passed in
+# and the app's logging setup is left alone
+connection = config.attributes.get("connection")
+if connection is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """SQL szkript generálása adatbázis kapcsolat nélkül (alembic upgrade head --sql)"""
+    configure(
+        url=DATABASE_URL,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online(conn) -> None:
+    # SQLite cannot ALTER most constraints: batch mode recreates the table instead
+    configure(connection=conn, render_as_batch=conn.dialect.name == "sqlite")
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif connection is not None:
+    run_migrations_online(connection)
+else:
+    engine = create_engine(DATABASE_URL)
+    with engine.connect() as conn:
+        run_migrations_online(conn)
+    engine.dispose()
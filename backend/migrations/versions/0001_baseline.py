@@ -0,0 +1,217 @@
+"""Kiinduló séma: a models.py / init.sql szerinti táblák
+
+Idempotens: a hiányzó táblákat létrehozza, a meglévő (régebbi, create_all vagy
+init.sql által létrehozott) táblákba csak a hiányzó oszlopokat veszi fel.
+Ez váltja ki az update_db.py és a migrate_db.py kézi ALTER TABLE lépéseit.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'defect_types', 'protocols', 'template_texts', 'earthing_measurements', 'eph_measurements',
+    'insulation_measurements', 'loop_impedance_measurements', 'protocol_defects', 'rcd_tests',
+    'rpe_measurements', 'summary_results', 'defect_images',
+)
+
+
+def _create_or_complete(name, *elements):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(name):
+        op.create_table(name, *elements)
+        return
+    existing = {column['name'] for column in inspector.get_columns(name)}
+    for element in elements:
+        if isinstance(element, sa.Column) and element.name not in existing:
+            op.add_column(name, element)
+
+
+def upgrade() -> None:
+    _create_or_complete('defect_types',
+        sa.Column('id', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('severity', sa.String(length=20), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('template_text', sa.Text(), nullable=True),
+        sa.Column('recommended_action', sa.Text(), nullable=True),
+        sa.Column('standard_reference', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('protocols',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('serial_number', sa.String(length=50), nullable=False),
+        sa.Column('certificate_number', sa.String(length=100), nullable=True),
+        sa.Column('location_address', sa.Text(), nullable=False),
+        sa.Column('network_type', sa.String(length=20), nullable=False),
+        sa.Column('client_name', sa.String(length=255), nullable=False),
+        sa.Column('inspection_type', sa.String(length=50), nullable=False),
+        sa.Column('inspection_date', sa.Date(), nullable=False),
+        sa.Column('instrument_model', sa.String(length=100), nullable=True),
+        sa.Column('calibration_valid_until', sa.Date(), nullable=True),
+        sa.Column('inspector_name', sa.String(length=255), nullable=False),
+        sa.Column('professional_summary', sa.Text(), nullable=True),
+        sa.Column('defect_list', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('protocol_type', sa.String(length=20), nullable=True),
+        sa.Column('gas_provider_required', sa.Boolean(), nullable=True),
+        sa.Column('gas_meter_number', sa.String(length=50), nullable=True),
+        sa.Column('gas_appliance_type', sa.String(length=100), nullable=True),
+        sa.Column('pe_conductor_size', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('eph_conductor_size', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('pen_separation_point', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('serial_number')
+    )
+    _create_or_complete('template_texts',
+        sa.Column('id', sa.String(length=20), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('earthing_measurements',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('measurement_method', sa.String(length=50), nullable=True),
+        sa.Column('ra_value', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('rb_value', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('rc_value', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('soil_resistivity', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('soil_type', sa.String(length=50), nullable=True),
+        sa.Column('limit_value', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('temperature', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('humidity', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('weather_conditions', sa.String(length=100), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('eph_measurements',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('element_name', sa.String(length=255), nullable=True),
+        sa.Column('element_type', sa.String(length=50), nullable=True),
+        sa.Column('connection_point', sa.String(length=255), nullable=True),
+        sa.Column('continuity_resistance', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('point_number', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('insulation_measurements',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('circuit_name', sa.String(length=255), nullable=True),
+        sa.Column('breaker_type', sa.String(length=50), nullable=True),
+        sa.Column('breaker_value', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('wire_material', sa.String(length=50), nullable=True),
+        sa.Column('wire_cross_section', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('zs_value_ohm', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('du_value_percent', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('fire_rating', sa.String(length=100), nullable=True),
+        sa.Column('ln_value_mohm', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('lpe_value_mohm', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('npe_value_mohm', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('loop_impedance_measurements',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('point_number', sa.Integer(), nullable=True),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('value_ohm', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('protocol_defects',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('defect_type_id', sa.String(length=20), nullable=True),
+        sa.Column('custom_description', sa.Text(), nullable=True),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('severity_override', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['defect_type_id'], ['defect_types.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('rcd_tests',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('circuit_name', sa.String(length=200), nullable=True),
+        sa.Column('breaker_type', sa.String(length=10), nullable=True),
+        sa.Column('breaker_value', sa.String(length=20), nullable=True),
+        sa.Column('wire_material', sa.String(length=10), nullable=True),
+        sa.Column('wire_cross_section', sa.String(length=20), nullable=True),
+        sa.Column('test_type', sa.String(length=50), nullable=True),
+        sa.Column('rated_current_ma', sa.String(length=20), nullable=True),
+        sa.Column('current_description', sa.String(length=100), nullable=True),
+        sa.Column('trip_time_ms', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('rpe_measurements',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('point_number', sa.Integer(), nullable=True),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('value_ohm', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('summary_results',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_id', sa.Uuid(), nullable=True),
+        sa.Column('test_name', sa.String(length=100), nullable=True),
+        sa.Column('result', sa.String(length=50), nullable=True),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_id'], ['protocols.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_or_complete('defect_images',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('protocol_defect_id', sa.Uuid(), nullable=True),
+        sa.Column('image_path', sa.String(length=500), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['protocol_defect_id'], ['protocol_defects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    for name in reversed(TABLES):
+        op.drop_table(name)
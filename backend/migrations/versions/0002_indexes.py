@@ -0,0 +1,46 @@
+"""A models.py / init.sql indexei
+
+Revision ID: 0002_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_indexes'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('idx_protocols_date', 'protocols', ['inspection_date']),
+    ('idx_protocols_created', 'protocols', ['created_at', 'id']),
+    ('idx_protocols_type_created', 'protocols', ['protocol_type', 'created_at', 'id']),
+    ('idx_protocols_status_created', 'protocols', ['status', 'created_at', 'id']),
+    ('idx_template_texts_category', 'template_texts', ['category']),
+    ('idx_earthing_protocol', 'earthing_measurements', ['protocol_id']),
+    ('idx_eph_protocol', 'eph_measurements', ['protocol_id']),
+    ('idx_insulation_protocol', 'insulation_measurements', ['protocol_id']),
+    ('idx_loop_protocol', 'loop_impedance_measurements', ['protocol_id']),
+    ('idx_protocol_defects_protocol', 'protocol_defects', ['protocol_id']),
+    ('idx_protocol_defects_type', 'protocol_defects', ['defect_type_id']),
+    ('idx_rcd_protocol', 'rcd_tests', ['protocol_id']),
+    ('idx_rpe_protocol', 'rpe_measurements', ['protocol_id']),
+    ('idx_summary_protocol', 'summary_results', ['protocol_id']),
+    ('idx_defect_images_defect', 'defect_images', ['protocol_defect_id']),
+)
+
+
+def upgrade() -> None:
+    # init.sql and schema_check.check_indexes may have created some of them already
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,74 @@
+"""Teljes szöveges keresési index (protocol_search) és feltöltése
+
+A DDL és a feltöltés SQL-je a revízió része (a search.py későbbi változásai nem
+módosíthatják, mit csinál ez a revízió egy új telepítésen). A dokumentum
+ugyanazokból a mezőkből áll, mint a search.protocol_document eredménye.
+
+Revision ID: 0003_search
+Revises: 0002_indexes
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_search'
+down_revision: Union[str, None] = '0002_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS protocol_search USING fts5("
+    "protocol_id UNINDEXED, document, tokenize = 'unicode61 remove_diacritics 2')",
+)
+POSTGRES_DDL = (
+    """CREATE TABLE IF NOT EXISTS protocol_search (
+        protocol_id UUID PRIMARY KEY REFERENCES protocols(id) ON DELETE CASCADE,
+        document TEXT NOT NULL,
+        document_tsv TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_protocol_search_tsv ON protocol_search USING GIN(document_tsv)",
+)
+
+# The text fields of every protocol and of its defects, one row per non-empty field
+DOCUMENT_PARTS = """
+    SELECT protocol_id, part FROM (
+        SELECT id AS protocol_id, 0 AS seq, serial_number AS part FROM protocols
+        UNION ALL SELECT id, 1, client_name FROM protocols
+        UNION ALL SELECT id, 2, location_address FROM protocols
+        UNION ALL SELECT id, 3, professional_summary FROM protocols
+        UNION ALL SELECT d.protocol_id, 4, d.defect_type_id FROM protocol_defects d
+        UNION ALL SELECT d.protocol_id, 5, t.name FROM protocol_defects d JOIN defect_types t ON t.id = d.defect_type_id
+        UNION ALL SELECT d.protocol_id, 6, d.location FROM protocol_defects d
+        UNION ALL SELECT d.protocol_id, 7, d.custom_description FROM protocol_defects d
+    ) parts
+    WHERE protocol_id IS NOT NULL AND part IS NOT NULL AND part <> ''
+    ORDER BY protocol_id, seq
+"""
+SQLITE_BACKFILL = f"""
+    INSERT INTO protocol_search (protocol_id, document)
+    SELECT protocol_id, group_concat(part, char(10)) FROM ({DOCUMENT_PARTS}) GROUP BY protocol_id
+"""
+POSTGRES_BACKFILL = f"""
+    INSERT INTO protocol_search (protocol_id, document, document_tsv)
+    SELECT protocol_id, document, to_tsvector('simple', document) FROM (
+        SELECT protocol_id, string_agg(part, E'\\n') AS document FROM ({DOCUMENT_PARTS}) ordered GROUP BY protocol_id
+    ) documents
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    sqlite = bind.dialect.name == "sqlite"
+    for ddl in SQLITE_DDL if sqlite else POSTGRES_DDL:
+        op.execute(ddl)
+    # init.sql creates the table on new PostgreSQL databases; fill it only while it is empty
+    if bind.exec_driver_sql("SELECT COUNT(*) FROM protocol_search").scalar() == 0:
+        op.execute(SQLITE_BACKFILL if sqlite else POSTGRES_BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS protocol_search")
@@ -0,0 +1,49 @@
+"""Mérési sorok sorrendje (position oszlop)
+
+A sorok eddig a beszúrás sorrendjében jöttek vissza; a meglévő sorok a
+fizikai sorrendjük (SQLite rowid, PostgreSQL ctid) szerint kapnak pozíciót,
+models.POSITION_STEP (1024) lépésközzel.
+
+Revision ID: 0004_positions
+Revises: 0003_search
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_positions'
+down_revision: Union[str, None] = '0003_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'rpe_measurements', 'insulation_measurements', 'loop_impedance_measurements', 'rcd_tests',
+    'summary_results', 'earthing_measurements', 'eph_measurements',
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    physical_order = "ctid" if bind.dialect.name == "postgresql" else "rowid"
+    for table in TABLES:
+        # init.sql already creates the column on new PostgreSQL databases
+        if 'position' in {column['name'] for column in inspector.get_columns(table)}:
+            continue
+        op.add_column(table, sa.Column('position', sa.Integer(), server_default='0', nullable=False))
+        op.execute(
+            f"UPDATE {table} SET position = numbered.row_index FROM ("
+            f"SELECT id, (ROW_NUMBER() OVER (PARTITION BY protocol_id ORDER BY {physical_order}) - 1) * 1024 AS row_index "
+            f"FROM {table}) AS numbered WHERE numbered.id = {table}.id"
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('position')
@@ -0,0 +1,35 @@
+"""Sorozatszám előtag keresés indexe (PostgreSQL text_pattern_ops)
+
+A sorozatszám szűrő LIKE 'előtag%' feltétel; nem "C" kollációjú PostgreSQL
+adatbázisban ezt csak text_pattern_ops index tudja kiszolgálni. SQLite-on a
+LIKE ... ESCAPE nem használ indexet, ott nincs mit létrehozni.
+
+Revision ID: 0005_serial_pattern
+Revises: 0004_positions
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_serial_pattern'
+down_revision: Union[str, None] = '0004_positions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # init.sql already creates it on new databases
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_protocols_serial_pattern "
+        "ON protocols (serial_number text_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_protocols_serial_pattern")
@@ -1,12 +1,38 @@
-from sqlalchemy import Column, String, Date, Text, ForeignKey, Integer, Numeric, Boolean, DateTime, Uuid
+from sqlalchemy import Column, String, Date, Text, ForeignKey, Integer, Numeric, Boolean, DateTime, Uuid, Index
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.orderinglist import ordering_list
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 import uuid
 
 
+# SQLite's CURRENT_TIMESTAMP has no fractional part; bind values in the same text
+# format, otherwise comparisons with the stored string (keyset cursors) are off
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
+# Measurement rows are numbered with gaps, so inserting or moving one row
+# in the middle of a list rewrites only that row (crud.assign_positions)
+POSITION_STEP = 1024
+
+
+def _measurement_list():
+    """Lista gyűjtemény: ORM-mel hozzáfűzött sorok a listaindexből kapnak pozíciót"""
+    return ordering_list("position", ordering_func=lambda index, collection: index * POSITION_STEP)
+
+
 class Protocol(Base):
     __tablename__ = "protocols"
+    __table_args__ = (
+        Index('idx_protocols_date', 'inspection_date'),
+        # Keyset pagination of the list: newest first, optionally narrowed by type or status
+        Index('idx_protocols_created', 'created_at', 'id'),
+        Index('idx_protocols_type_created', 'protocol_type', 'created_at', 'id'),
+        Index('idx_protocols_status_created', 'status', 'created_at', 'id'),
+    )
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     serial_number = Column(String(50), nullable=False, unique=True)
@@ -22,7 +48,7 @@ class Protocol(Base):
     professional_summary = Column(Text)
     defect_list = Column(Text)
     status = Column(String(20), default='draft')
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # EPH specific fields
@@ -35,18 +61,19 @@ class Protocol(Base):
     pen_separation_point = Column(String(255))  # PE-N szétválasztás helye
     
     # Relationships
-    rpe_measurements = relationship("RpeMeasurement", back_populates="protocol", cascade="all, delete-orphan")
-    insulation_measurements = relationship("InsulationMeasurement", back_populates="protocol", cascade="all, delete-orphan")
-    loop_impedance_measurements = relationship("LoopImpedanceMeasurement", back_populates="protocol", cascade="all, delete-orphan")
-    rcd_tests = relationship("RcdTest", back_populates="protocol", cascade="all, delete-orphan")
-    summary_results = relationship("SummaryResult", back_populates="protocol", cascade="all, delete-orphan")
-    earthing_measurements = relationship("EarthingMeasurement", back_populates="protocol", cascade="all, delete-orphan")
-    eph_measurements = relationship("EphMeasurement", back_populates="protocol", cascade="all, delete-orphan")
+    rpe_measurements = relationship("RpeMeasurement", back_populates="protocol", cascade="all, delete-orphan", order_by="RpeMeasurement.position", collection_class=_measurement_list())
+    insulation_measurements = relationship("InsulationMeasurement", back_populates="protocol", cascade="all, delete-orphan", order_by="InsulationMeasurement.position", collection_class=_measurement_list())
+    loop_impedance_measurements = relationship("LoopImpedanceMeasurement", back_populates="protocol", cascade="all, delete-orphan", order_by="LoopImpedanceMeasurement.position", collection_class=_measurement_list())
+    rcd_tests = relationship("RcdTest", back_populates="protocol", cascade="all, delete-orphan", order_by="RcdTest.position", collection_class=_measurement_list())
+    summary_results = relationship("SummaryResult", back_populates="protocol", cascade="all, delete-orphan", order_by="SummaryResult.position", collection_class=_measurement_list())
+    earthing_measurements = relationship("EarthingMeasurement", back_populates="protocol", cascade="all, delete-orphan", order_by="EarthingMeasurement.position", collection_class=_measurement_list())
+    eph_measurements = relationship("EphMeasurement", back_populates="protocol", cascade="all, delete-orphan", order_by="EphMeasurement.position", collection_class=_measurement_list())
     protocol_defects = relationship("ProtocolDefect", back_populates="protocol", cascade="all, delete-orphan")
 
 
 class RpeMeasurement(Base):
     __tablename__ = "rpe_measurements"
+    __table_args__ = (Index('idx_rpe_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -54,6 +81,7 @@ class RpeMeasurement(Base):
     location = Column(String(255))
     value_ohm = Column(Numeric(10, 4))
     passed = Column(Boolean)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="rpe_measurements")
@@ -61,6 +89,7 @@ class RpeMeasurement(Base):
 
 class InsulationMeasurement(Base):
     __tablename__ = "insulation_measurements"
+    __table_args__ = (Index('idx_insulation_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -76,6 +105,7 @@ class InsulationMeasurement(Base):
     lpe_value_mohm = Column(Numeric(10, 2))
     npe_value_mohm = Column(Numeric(10, 2))
     passed = Column(Boolean)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="insulation_measurements")
@@ -83,6 +113,7 @@ class InsulationMeasurement(Base):
 
 class LoopImpedanceMeasurement(Base):
     __tablename__ = "loop_impedance_measurements"
+    __table_args__ = (Index('idx_loop_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -90,6 +121,7 @@ class LoopImpedanceMeasurement(Base):
     location = Column(String(255))
     value_ohm = Column(Numeric(10, 4))
     passed = Column(Boolean)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="loop_impedance_measurements")
@@ -97,6 +129,7 @@ class LoopImpedanceMeasurement(Base):
 
 class RcdTest(Base):
     __tablename__ = "rcd_tests"
+    __table_args__ = (Index('idx_rcd_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -110,6 +143,7 @@ class RcdTest(Base):
     current_description = Column(String(100), nullable=True)
     trip_time_ms = Column(Numeric(10, 2))
     passed = Column(Boolean)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="rcd_tests")
@@ -117,12 +151,14 @@ class RcdTest(Base):
 
 class SummaryResult(Base):
     __tablename__ = "summary_results"
+    __table_args__ = (Index('idx_summary_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
     test_name = Column(String(100))
     result = Column(String(50))
     comment = Column(Text)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="summary_results")
@@ -131,6 +167,7 @@ class SummaryResult(Base):
 class EarthingMeasurement(Base):
     """Földelési ellenállás mérések táblája"""
     __tablename__ = "earthing_measurements"
+    __table_args__ = (Index('idx_earthing_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -157,6 +194,7 @@ class EarthingMeasurement(Base):
     weather_conditions = Column(String(100))
     
     notes = Column(Text)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="earthing_measurements")
@@ -165,6 +203,7 @@ class EarthingMeasurement(Base):
 class EphMeasurement(Base):
     """EPH bekötések folytonosság mérések táblája"""
     __tablename__ = "eph_measurements"
+    __table_args__ = (Index('idx_eph_protocol', 'protocol_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -182,6 +221,7 @@ class EphMeasurement(Base):
     point_number = Column(Integer)
     
     notes = Column(Text)
+    position = Column(Integer, nullable=False, server_default="0")  # Sorrend a listában
     created_at = Column(DateTime, server_default=func.now())
     
     protocol = relationship("Protocol", back_populates="eph_measurements")
@@ -208,6 +248,10 @@ class DefectType(Base):
 class ProtocolDefect(Base):
     """Jegyzőkönyvhöz rendelt hibák táblája"""
     __tablename__ = "protocol_defects"
+    __table_args__ = (
+        Index('idx_protocol_defects_protocol', 'protocol_id'),
+        Index('idx_protocol_defects_type', 'defect_type_id'),
+    )
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_id = Column(Uuid(as_uuid=True), ForeignKey("protocols.id", ondelete="CASCADE"))
@@ -226,6 +270,7 @@ class ProtocolDefect(Base):
 class DefectImage(Base):
     """Hibákhoz csatolt képek táblája"""
     __tablename__ = "defect_images"
+    __table_args__ = (Index('idx_defect_images_defect', 'protocol_defect_id'),)
     
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     protocol_defect_id = Column(Uuid(as_uuid=True), ForeignKey("protocol_defects.id", ondelete="CASCADE"))
@@ -241,6 +286,7 @@ class DefectImage(Base):
 class TemplateText(Base):
     """Sablon szövegek táblája"""
     __tablename__ = "template_texts"
+    __table_args__ = (Index('idx_template_texts_category', 'category'),)
     
     id = Column(String(20), primary_key=True)  # pl. "BEV-001"
     category = Column(String(50), nullable=False)  # bevezetes, modszer, megallapitas, zaro, nyilatkozat
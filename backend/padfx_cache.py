@@ -0,0 +1,69 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+import padfx_pool
+from file_cache import CACHE_DIR, DiskLRUCache
+from padfx_mapping import TABLE_SCHEMAS
+
+# Bump when an importer or the field mapping changes, so old parse results are not served
+PARSER_VERSION = "3"
+
+# Parse results (gzip-compressed JSON), capped at PADFX_CACHE_MAX_MB
+parse_cache = DiskLRUCache(
+    CACHE_DIR / "padfx",
+    max_bytes=int(os.environ.get("PADFX_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    suffix=".json.gz",
+)
+
+
+def cache_key(content_hash: str, raw: bool = False) -> str:
+    """Kulcs a feltöltött fájl SHA-256 hash értékéből, a feldolgozó verziójából és a raw módból"""
+    return hashlib.sha256(f"parser:{PARSER_VERSION}:{int(raw)}:{content_hash}".encode()).hexdigest()
+
+
+def load(key: str) -> Optional[bytes]:
+    """Gyorsítótárazott JSON válasz, vagy None"""
+    path = parse_cache.get(key)
+    if path is None:
+        return None
+    try:
+        return gzip.decompress(path.read_bytes())
+    except (OSError, EOFError):
+        # Evicted by another worker in the meantime, or a damaged entry
+        return None
+
+
+def store(key: str, body: bytes):
+    parse_cache.put(key, gzip.compress(body, compresslevel=6))
+
+
+def result_from_json(body: bytes) -> dict:
+    """JSON válasz visszaalakítása: a táblasorok ismét schemas.*Create objektumok"""
+    result = json.loads(body)
+    result["tables"] = {
+        table: [TABLE_SCHEMAS[table].model_validate(row) for row in rows]
+        for table, rows in result["tables"].items()
+    }
+    return result
+
+
+async def parse_json(path: Path, content_hash: str, raw: bool = False) -> bytes:
+    """Mérési fájl feldolgozásának JSON válasza a gyorsítótárból, vagy a worker poolból (és mentés)"""
+    key = cache_key(content_hash, raw)
+    body = await run_in_threadpool(load, key)
+    if body is None:
+        body = await padfx_pool.parse_json(path, raw)
+        await run_in_threadpool(store, key, body)
+    return body
+
+
+async def parse(path: Path, content_hash: str) -> dict:
+    """Mint a parse_json, de mentésre kész táblasorokkal"""
+    body = await parse_json(path, content_hash)
+    return await run_in_threadpool(result_from_json, body)
@@ -0,0 +1,235 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+import schemas
+
+# Measured values look like "0.45Ohm", ">199.9MOhm", "0,45 Ω", "18.2ms"
+_VALUE_RE = re.compile(
+    r"^\s*(?P<cmp>[<>]=?)?\s*(?P<num>[-+]?\d+(?:[.,]\d+)?)\s*(?P<prefix>[GMkmµu]?)(?P<unit>Ohm|ohm|Ω|s|A|V|%)?\s*$"
+)
+_PREFIXES = {"": 1.0, "G": 1e9, "M": 1e6, "k": 1e3, "m": 1e-3, "µ": 1e-6, "u": 1e-6}
+_BASE_UNITS = {"Ohm": "Ohm", "ohm": "Ohm", "Ω": "Ohm", "s": "s", "A": "A", "V": "V", "%": "%"}
+
+
+@dataclass(frozen=True)
+class Unit:
+    """Céloszlop mértékegysége: alapegység és szorzó (pl. MΩ = Ohm, 1e6)"""
+    base: str
+    scale: float = 1.0
+
+
+OHM = Unit("Ohm")
+MEGAOHM = Unit("Ohm", 1e6)
+MILLISECOND = Unit("s", 1e-3)
+
+
+@dataclass(frozen=True)
+class ResultField:
+    result_id: str  # <R Id="..."> within the measurement
+    field: str  # schemas.*Create field
+
+
+@dataclass(frozen=True)
+class MidMapping:
+    mid: str
+    table: str  # crud.MEASUREMENT_MODELS key
+    label: str
+    fields: Tuple[ResultField, ...]
+
+
+# Target tables and the schema the mapped rows are validated with
+TABLE_SCHEMAS = {
+    "rpe_measurements": schemas.RpeMeasurementCreate,
+    "insulation_measurements": schemas.InsulationMeasurementCreate,
+    "loop_impedance_measurements": schemas.LoopImpedanceMeasurementCreate,
+    "rcd_tests": schemas.RcdTestCreate,
+    "earthing_measurements": schemas.EarthingMeasurementCreate,
+}
+
+# Target unit of the numeric fields; other fields are taken over as text
+FIELD_UNITS: Dict[str, Dict[str, Unit]] = {
+    "rpe_measurements": {"value_ohm": OHM},
+    "insulation_measurements": {
+        "zs_value_ohm": OHM, "ln_value_mohm": MEGAOHM, "lpe_value_mohm": MEGAOHM, "npe_value_mohm": MEGAOHM,
+    },
+    "loop_impedance_measurements": {"value_ohm": OHM},
+    "rcd_tests": {"trip_time_ms": MILLISECOND},
+    "earthing_measurements": {"ra_value": OHM, "rb_value": OHM, "rc_value": OHM},
+}
+
+# Per-circuit tables: consecutive readings of one circuit fill the same row
+CIRCUIT_TABLES = {"insulation_measurements", "rcd_tests"}
+
+
+@dataclass(frozen=True)
+class Reading:
+    """Normalizált mérés, amit minden importer ad: áramkör, cél tábla és nyers értékek mezőnként.
+
+    table=None: a forrás mérés típusa (kind) nem ismert, az "unmapped" összesítőbe kerül.
+    """
+    circuit: str  # "Elosztó / F1"
+    table: Optional[str]  # TABLE_SCHEMAS key
+    values: Dict[str, str]  # schemas.*Create field -> raw reading, e.g. ">199.9MOhm"
+    kind: str = ""  # Source measurement type (PADFX MID, CSV table column)
+
+# MID -> target table registry. Only the MIDs identified in our Metrel exports are
+# listed; anything else is reported back as unmapped instead of guessed.
+# MID 2 (Riso) is deliberately missing: which of its results is L-N, L-PE and N-PE
+# has not been confirmed. The MIDs of the Rpe (continuity), RCD and earthing
+# (Ra/Rb/Rc) measurements are not identified either; until they are, their readings
+# show up under "unmapped" (MID -> count) and the import tells the user about them.
+MID_MAPPINGS: Dict[str, MidMapping] = {
+    m.mid: m for m in (
+        MidMapping("20", "insulation_measurements", "Z-Loop (Zs)", (
+            ResultField("43", "zs_value_ohm"),
+        )),
+        MidMapping("16", "loop_impedance_measurements", "Z-Line", (
+            ResultField("205", "value_ohm"),
+        )),
+    )
+}
+
+
+@lru_cache(maxsize=4096)
+def parse_value(raw: str, unit: Unit) -> Optional[float]:
+    """Mért érték átváltása a cél mértékegységre (None, ha nem értelmezhető).
+
+    Mértékegység nélküli szám a cél mértékegységben értendő (pl. CSV oszlop "120" MΩ).
+    """
+    match = _VALUE_RE.match(raw)
+    if match is None:
+        return None
+    base = _BASE_UNITS.get(match["unit"])
+    if base is not None and base != unit.base:
+        return None
+    value = float(match["num"].replace(",", "."))
+    if base is None:
+        if match["prefix"]:
+            return None  # A lone prefix letter is not a unit
+        return round(value, 6)
+    return round(value * _PREFIXES[match["prefix"]] / unit.scale, 6)
+
+
+def comparator(raw: str) -> Optional[str]:
+    """A mért érték relációs jele (">199.9MOhm" -> ">"), ha a műszer méréshatáron kívül volt"""
+    match = _VALUE_RE.match(raw)
+    return match["cmp"] if match is not None else None
+
+
+def parse_values(raws: Iterable[Optional[str]], unit: Unit) -> List[Optional[float]]:
+    """Egy oszlop összes értékének átváltása egyszerre (ismétlődő értékek gyorsítótárból)"""
+    return [parse_value(raw, unit) if raw else None for raw in raws]
+
+
+def padfx_readings(circuits: Iterable[Tuple[str, list]]) -> Iterator[Reading]:
+    """PADFX áramkörök (útvonal, mérések) átalakítása Reading rekordokká a MID regiszter alapján"""
+    for circuit_name, measurements in circuits:
+        for m in measurements:
+            mapping = MID_MAPPINGS.get(m['type'])
+            if mapping is None:
+                yield Reading(circuit_name, None, {}, m['type'])
+                continue
+            results = m['results']
+            values = {}
+            for result in mapping.fields:
+                raw = results.get(result.result_id)
+                if raw is not None:
+                    values[result.field] = raw
+            yield Reading(circuit_name, mapping.table, values, m['type'])
+
+
+def map_readings(readings: Iterable[Reading]) -> dict:
+    """Reading rekordok leképezése mentésre kész schemas.*Create sorokra.
+
+    Visszatérés: {"tables": {tábla: [sor]}, "unmapped": {típus: darab}, "invalid": {tábla: darab},
+    "out_of_range": [{"table", "row", "field", "raw"}]}. Az out_of_range a relációs jellel
+    mért értékeket sorolja fel (">199.9MOhm"): a mentett szám ezeknél csak korlát.
+    """
+    pending: Dict[str, List[dict]] = {table: [] for table in TABLE_SCHEMAS}
+    unmapped = Counter()
+    invalid = Counter()
+    circuit = None
+    circuit_rows = {}
+
+    for reading in readings:
+        table = reading.table
+        if table not in pending:
+            unmapped[reading.kind] += 1
+            continue
+        if reading.circuit != circuit:
+            circuit = reading.circuit
+            circuit_rows = {}
+        if table in CIRCUIT_TABLES:
+            row = circuit_rows.get(table)
+            if row is None:
+                row = circuit_rows[table] = {"circuit_name": circuit}
+                pending[table].append(row)
+        else:
+            row = {"location": circuit}
+            if "point_number" in TABLE_SCHEMAS[table].model_fields:
+                row["point_number"] = len(pending[table]) + 1
+            pending[table].append(row)
+        row.update(reading.values)
+
+    tables = {}
+    out_of_range = []
+    for table, rows in pending.items():
+        if not rows:
+            continue
+        bounds = [{} for _ in rows]
+        # Convert column by column so repeated readings hit the parse cache
+        for key, unit in FIELD_UNITS[table].items():
+            if not any(key in row for row in rows):
+                continue
+            for row, bound, value in zip(rows, bounds, parse_values((row.get(key) for row in rows), unit)):
+                if key in row:
+                    if value is not None and comparator(row[key]):
+                        bound[key] = row[key]
+                    row[key] = value
+
+        schema = TABLE_SCHEMAS[table]
+        created = []
+        for row, bound in zip(rows, bounds):
+            try:
+                created.append(schema(**row))
+            except ValidationError:
+                invalid[table] += 1  # e.g. a required value was not readable
+                continue
+            out_of_range.extend(
+                {"table": table, "row": len(created) - 1, "field": key, "raw": raw} for key, raw in bound.items()
+            )
+        tables[table] = created
+
+    return {"tables": tables, "unmapped": dict(unmapped), "invalid": dict(invalid), "out_of_range": out_of_range}
+
+
+def import_result(readings: Iterable[Reading], raw_nodes: Optional[list] = None) -> dict:
+    """Az import végpontok válasza: táblasorok, darabszámok és a kihagyott mérések összesítője"""
+    mapped = map_readings(readings)
+    result = {
+        "status": "success",
+        "tables": mapped["tables"],
+        "counts": {table: len(rows) for table, rows in mapped["tables"].items()},
+        "unmapped": mapped["unmapped"],
+        "invalid": mapped["invalid"],
+        "out_of_range": mapped["out_of_range"],
+    }
+    if raw_nodes is not None:
+        result["raw_nodes"] = raw_nodes
+    return result
+
+
+def circuit_summary(tables: dict) -> List[dict]:
+    """Áramkörönkénti összesítő: hány sor került az egyes táblákba"""
+    summary = {}
+    for table, rows in tables.items():
+        for row in rows:
+            name = getattr(row, "circuit_name", None) or getattr(row, "location", None)
+            entry = summary.setdefault(name, {"circuit_name": name, "rows": {}})
+            entry["rows"][table] = entry["rows"].get(table, 0) + 1
+    return list(summary.values())
@@ -1,106 +1,142 @@
 import xml.etree.ElementTree as ET
 import zipfile
 import io
+import os
+from contextlib import contextmanager
 
-def parse_padfx_content(file_bytes: bytes):
+from padfx_mapping import import_result, padfx_readings
+
+# Upper limit for the uncompressed DataSource.padf member (zip bomb guard)
+PADFX_XML_MAX_BYTES = int(os.environ.get("PADFX_XML_MAX_MB", "200")) * 1024 * 1024
+
+
+@contextmanager
+def open_padf(source):
+    """A DataSource.padf XML tag megnyitása folyamként (útvonal vagy bináris fájl objektum)"""
     try:
-        # PZIP -> extract DataSource.padf
-        with zipfile.ZipFile(io.BytesIO(file_bytes), 'r') as zip_ref:
-            if 'DataSource.padf' not in zip_ref.namelist():
+        # PZIP -> stream DataSource.padf
+        with zipfile.ZipFile(source, 'r') as zip_ref:
+            try:
+                info = zip_ref.getinfo('DataSource.padf')
+            except KeyError:
                 raise ValueError("A feltöltött fájl nem tartalmaz DataSource.padf XML adatot.")
-            xml_content = zip_ref.read('DataSource.padf')
+            if info.file_size > PADFX_XML_MAX_BYTES:
+                raise ValueError("A DataSource.padf kicsomagolt mérete túl nagy.")
+            with zip_ref.open(info) as xml_file:
+                yield xml_file
     except zipfile.BadZipFile:
         raise ValueError("Érvénytelen ZIP / PADFX formátum.")
 
-    # Parse XML
-    tree = ET.parse(io.BytesIO(xml_content))
-    root = tree.getroot()
 
-    nodes = {}
-    data_node = root.find('Data')
-    if data_node is None:
+def _read_so(so):
+    """Egy <SO> elem adatai: azonosító, név, szülő azonosító és mérések"""
+    measurements = []
+    ms_node = so.find('Ms')
+    if ms_node is not None:
+        for m in ms_node.findall('M'):
+            # Results
+            results = {}
+            rs_node = m.find('Rs')
+            if rs_node is not None:
+                for r in rs_node.findall('R'):
+                    results[r.get('Id')] = r.findtext('V', default='')
+            measurements.append({
+                'type': m.findtext('MID', default='Unknown'),
+                'results': results,
+            })
+    return so.get('Id'), so.findtext('N', default='Unknown'), so.findtext('PID', default='-1'), measurements
+
+
+def iter_padf_objects(xml_file):
+    """Az <SO> elemek feldolgozása egyenként (iterparse).
+
+    Csak a gyökér alatti (első) <Data> közvetlen <SO> gyerekei számítanak (a PADF
+    az objektumokat laposan tárolja, a hierarchia a PID-ben van). A feldolgozott
+    elemek lekerülnek a részfáról, így a memóriaigény nem nő az objektumok számával.
+    Hiányzó <Data> tag esetén a bejárás végén ValueError.
+    """
+    stack = []
+    data = None
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if data is None and len(stack) == 1 and elem.tag == 'Data':
+                data = elem
+            stack.append(elem)
+            continue
+        stack.pop()
+        if len(stack) == 2 and stack[-1] is data and elem.tag == 'SO':
+            yield _read_so(elem)
+            data.remove(elem)
+        elif len(stack) == 1 and elem is not data:
+            # Other top-level sections are not needed either
+            stack[0].remove(elem)
+    if data is None:
         raise ValueError("A PADF fájl nem tartalmaz strukturált adatokat (<Data> tag).")
 
-    for so in data_node.findall('SO'):
-        node_id = so.get('Id')
-        name = so.findtext('N', default='Unknown')
-        pid = so.findtext('PID', default='-1')
-        
-        # Extract Measurements
-        measurements = []
-        ms_node = so.find('Ms')
-        if ms_node is not None:
-            for m in ms_node.findall('M'):
-                m_type = m.findtext('MID', default='Unknown')
-                # Results
-                results = {}
-                rs_node = m.find('Rs')
-                if rs_node is not None:
-                    for r in rs_node.findall('R'):
-                        r_id = r.get('Id')
-                        r_val = r.findtext('V', default='')
-                        results[r_id] = r_val
-
-                measurements.append({
-                    'type': m_type,
-                    'results': results,
-                })
-                
-        nodes[node_id] = {
-            'id': node_id,
-            'name': name,
-            'pid': pid,
-            'measurements': measurements,
-            'children': []
-        }
-
-    # Build Tree to group measurements by Object
-    root_nodes = []
-    for node_id, node in nodes.items():
-        pid = node['pid']
-        if pid in nodes:
-            nodes[pid]['children'].append(node)
-        else:
-            root_nodes.append(node)
-
-    # Flatten structured measurements for frontend
-    extracted_circuits = []
-    
-    # Rpe, Zs, Insulation results mapping by MID / R IDs based on the previous manual analysis
-    # MID=20 -> Zs / Loop (R_id 43 is Ohm)
-    # MID=16 -> Line / ZLine (R_id 205 is Ohm)
-    # MID=2 -> Insulation (R_id 1 is Ohm, 2 is Ohm, 3 is Ohm, wait MID=2 is Riso)
-    # Actually, let's just dump all measurements with their associated Object name
-    
-    def walk_tree(node, path=""):
-        current_path = f"{path} / {node['name']}".strip(" / ")
-        
-        for m in node['measurements']:
-            m_type = m['type']
-            results = m['results']
-            
-            # Simple heuristic mapping for the frontend to digest
-            circuit_data = {
-                "circuit_name": current_path,
-                "raw_mid": m_type,
-                "raw_results": results
-            }
-            
-            # Parse Zs (Loop Impedance) MID 20 (Z-Loop) or 16 (Z-Line)
-            if m_type == '20':
-                circuit_data['zs_value_ohm'] = results.get('43', '').replace('Ohm', '')
-            
-            # Additional mappings can be added here
-            extracted_circuits.append(circuit_data)
-
-        for child in node['children']:
-            walk_tree(child, current_path)
-
-    for rn in root_nodes:
-        walk_tree(rn)
-
-    return {
-        "status": "success",
-        "circuits": extracted_circuits,
-        "raw_nodes": root_nodes
-    }
+
+def iter_padfx_circuits(objects, raw_nodes=None):
+    """(útvonal, mérések) párok generátorként; az útvonal a szülő nevek " / " elválasztva.
+
+    Az objektumok dokumentum sorrendben jönnek; ha egy szülő később szerepel a
+    fájlban, mint a gyereke, a gyerek méréseit a bejárás végéig visszatartjuk.
+    Ha raw_nodes lista meg van adva, a régi beágyazott fa is felépül benne.
+    """
+    names = {}
+    parents = {}
+    deferred = []
+    nodes = {}
+
+    def path_of(node_id, final=False):
+        parts = []
+        seen = set()
+        while node_id in names and node_id not in seen:
+            seen.add(node_id)
+            parts.append(names[node_id])
+            node_id = parents[node_id]
+        if node_id != '-1' and node_id not in seen and not final:
+            return None  # Parent not read yet
+        return " / ".join(reversed(parts))
+
+    for node_id, name, pid, measurements in objects:
+        names[node_id] = name
+        parents[node_id] = pid
+        if raw_nodes is not None:
+            nodes[node_id] = {'id': node_id, 'name': name, 'pid': pid, 'measurements': measurements, 'children': []}
+        if not measurements and raw_nodes is None:
+            continue
+        path = path_of(node_id)
+        if path is None:
+            deferred.append((node_id, measurements))
+            continue
+        yield path, measurements
+
+    for node_id, measurements in deferred:
+        yield path_of(node_id, final=True), measurements
+
+    if raw_nodes is not None:
+        # Build Tree to group measurements by Object
+        for node_id, node in nodes.items():
+            if node['pid'] in nodes:
+                nodes[node['pid']]['children'].append(node)
+            else:
+                raw_nodes.append(node)
+
+
+def parse_padfx_content(file_bytes: bytes, raw: bool = False):
+    return parse_padfx_file(io.BytesIO(file_bytes), raw=raw)
+
+
+def read_padfx(source, raw_nodes=None):
+    """PADFX mérések Reading rekordokként, folyamként (importer plugin)"""
+    with open_padf(source) as xml_file:
+        yield from padfx_readings(iter_padfx_circuits(iter_padf_objects(xml_file), raw_nodes))
+
+
+def parse_padfx_file(source, raw: bool = False):
+    """PADFX feldolgozása fájl útvonalból vagy bináris fájl objektumból.
+
+    A mérések a MID regiszter alapján mentésre kész táblasorokká alakulnak
+    (lásd padfx_mapping). raw=True esetén a nyers objektum fa (raw_nodes) is a válaszba kerül.
+    """
+    raw_nodes = [] if raw else None
+    return import_result(read_padfx(source, raw_nodes), raw_nodes)
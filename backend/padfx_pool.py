@@ -0,0 +1,94 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+
+from importers import import_file_json
+
+# Size of the parse process pool (0: parse in the threadpool of the server process),
+# the number of files a worker parses before it is replaced, and the number of
+# parses that may be queued or running at once
+PADFX_WORKERS = int(os.environ.get("PADFX_WORKERS", str(min(2, os.cpu_count() or 1))))
+PADFX_TASKS_PER_CHILD = int(os.environ.get("PADFX_TASKS_PER_CHILD", "50"))
+PADFX_QUEUE_LIMIT = int(os.environ.get("PADFX_QUEUE_LIMIT", "16"))
+
+
+class ParseQueueFull(Exception):
+    """A PADFX feldolgozási sor megtelt"""
+
+
+class ParseWorkerDied(Exception):
+    """A feldolgozó worker folyamat váratlanul leállt (szerver oldali hiba, nem a fájlé)"""
+
+
+_executor = None
+_pending = 0
+_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: workers must not inherit the server's threads and DB connections.
+            # Workers are recycled, so memory held after a huge file is given back.
+            _executor = ProcessPoolExecutor(
+                max_workers=PADFX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=PADFX_TASKS_PER_CHILD or None,
+            )
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def parse_json(path: Path, raw: bool = False) -> bytes:
+    """Mérési fájl (PADFX, CSV, XML) feldolgozása a worker poolban, az eseményhurok blokkolása nélkül.
+
+    A kész JSON választ adja vissza: egy nagy fájl eredményének kódolása
+    (jsonable_encoder) másodpercekig foglalná az eseményhurkot, ezért ez is a workerben történik.
+    """
+    global _pending
+    with _lock:
+        if _pending >= PADFX_QUEUE_LIMIT:
+            raise ParseQueueFull()
+        _pending += 1
+    try:
+        if PADFX_WORKERS <= 0:
+            return await run_in_threadpool(import_file_json, path, raw)
+        executor = get_executor()
+        try:
+            future = executor.submit(import_file_json, str(path), raw)
+        except BrokenProcessPool:
+            # An earlier parse broke this pool: retry once on a fresh one
+            _discard_executor(executor)
+            executor = get_executor()
+            future = executor.submit(import_file_json, str(path), raw)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory): start a fresh pool for the next request
+            _discard_executor(executor)
+            raise ParseWorkerDied() from e
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,309 @@
+import io
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from uuid import UUID
+
+from database import SessionLocal
+import crud
+from docx_cache import open_protocol_docx, protocol_filename, render_protocol_docx
+import docx_templates
+from file_cache import CACHE_DIR
+
+# Size of the render process pool and the number of unfinished jobs it may hold
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", str(min(2, os.cpu_count() or 1))))
+RENDER_QUEUE_LIMIT = int(os.environ.get("RENDER_QUEUE_LIMIT", "32"))
+# Finished jobs are forgotten after this many seconds
+RENDER_JOB_TTL = int(os.environ.get("RENDER_JOB_TTL", "3600"))
+# Maximum number of protocols in one ZIP export
+EXPORT_MAX_PROTOCOLS = int(os.environ.get("EXPORT_MAX_PROTOCOLS", "500"))
+# Job states as JSON files: with several uvicorn workers (WEB_CONCURRENCY) the status
+# and download requests may reach a worker other than the one that started the job
+JOBS_DIR = CACHE_DIR / "render_jobs"
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+class RenderQueueFull(Exception):
+    """A renderelési sor megtelt"""
+
+
+@dataclass
+class RenderJob:
+    id: str
+    protocol_id: UUID
+    future: Future
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() is not None else "done"
+
+    @property
+    def error(self) -> Optional[str]:
+        if self.future.done() and self.future.exception() is not None:
+            return str(self.future.exception())
+        return None
+
+    @property
+    def result(self):
+        """(docx útvonal, fájlnév) a kész jobhoz"""
+        return self.future.result() if self.status == "done" else None
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_jobs: Dict[str, RenderJob] = {}
+_lock = threading.Lock()
+
+
+def render_in_worker(protocol_id: str):
+    """Jegyzőkönyv betöltése és renderelése a worker folyamatban (a DOCX gyorsítótárba)"""
+    db = SessionLocal()
+    try:
+        protocol = crud.get_protocol(db, UUID(protocol_id))
+        if protocol is None:
+            raise LookupError("Jegyzőkönyv nem található")
+        return str(render_protocol_docx(protocol)), protocol_filename(protocol)
+    finally:
+        db.close()
+
+
+def export_in_worker(protocol_id: str):
+    """Jegyzőkönyv renderelése a worker folyamatban; a dokumentum bájtjai jönnek vissza.
+
+    A ZIP export nem az útvonalat kapja: azt egy párhuzamos renderelés a
+    gyorsítótárból addigra kiürítheti.
+    """
+    db = SessionLocal()
+    try:
+        protocol = crud.get_protocol(db, UUID(protocol_id))
+        if protocol is None:
+            raise LookupError("Jegyzőkönyv nem található")
+        with open_protocol_docx(protocol) as docx_file:
+            return docx_file.read(), protocol_filename(protocol)
+    finally:
+        db.close()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: workers must not inherit the server's threads and DB connections.
+            # They get the server's templates, so the rendered document matches the
+            # template fingerprint in the cache key even if the file changed on disk.
+            _executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=docx_templates.install_templates,
+                initargs=(docx_templates.template_sources(),),
+            )
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(fn, *args) -> Future:
+    """Feladat a process poolba; elhalt worker (BrokenProcessPool) után új pool indul"""
+    executor = get_executor()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        executor = get_executor()
+        future = executor.submit(fn, *args)
+
+    def discard_if_broken(done: Future):
+        # A worker died (e.g. killed for memory): the next render starts a fresh pool
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            _discard_executor(executor)
+
+    future.add_done_callback(discard_if_broken)
+    return future
+
+
+def _prune():
+    now = time.time()
+    for job_id, job in list(_jobs.items()):
+        if job.future.done() and now - job.created_at > RENDER_JOB_TTL:
+            del _jobs[job_id]
+    if JOBS_DIR.is_dir():
+        for entry in os.scandir(JOBS_DIR):
+            try:
+                if now - entry.stat().st_mtime > RENDER_JOB_TTL:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass  # Pruned by another worker
+
+
+def _store(job: RenderJob):
+    """A job állapotának kiírása a közös JOBS_DIR-be (atomi csere)"""
+    state = {"protocol_id": str(job.protocol_id), "created_at": job.created_at, "status": "queued"}
+    if job.future.done():
+        state["status"] = job.status
+        if job.status == "done":
+            state["result"] = list(job.result) if job.result is not None else None
+        else:
+            state["error"] = job.error
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=JOBS_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, JOBS_DIR / f"{job.id}.json")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _load(job_id: str) -> Optional[RenderJob]:
+    """Másik uvicorn worker által indított job a tárolt állapotából"""
+    if not _JOB_ID_RE.fullmatch(job_id):
+        return None
+    try:
+        state = json.loads((JOBS_DIR / f"{job_id}.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if time.time() - state["created_at"] > RENDER_JOB_TTL:
+        return None
+    future = Future()
+    if state["status"] == "done":
+        future.set_result(tuple(state["result"]) if state["result"] is not None else None)
+    elif state["status"] == "failed":
+        future.set_exception(RuntimeError(state["error"]))
+    # Unfinished jobs of another worker are reported as queued
+    return RenderJob(id=job_id, protocol_id=UUID(state["protocol_id"]), future=future, created_at=state["created_at"])
+
+
+def _add_job(protocol_id: UUID, future: Future) -> RenderJob:
+    job = RenderJob(id=uuid.uuid4().hex, protocol_id=protocol_id, future=future)
+    _jobs[job.id] = job
+    if not future.done():
+        _store(job)
+    # Called right away if the future is already done
+    future.add_done_callback(lambda done: _store(job))
+    return job
+
+
+def submit(protocol_id: UUID) -> RenderJob:
+    """Renderelési job indítása a process poolban"""
+    with _lock:
+        _prune()
+        pending = sum(1 for job in _jobs.values() if not job.future.done())
+        if pending >= RENDER_QUEUE_LIMIT:
+            raise RenderQueueFull()
+    # Submitted outside the lock: the done callback of a broken pool takes it
+    future = _submit(render_in_worker, str(protocol_id))
+    with _lock:
+        return _add_job(protocol_id, future)
+
+
+def completed(protocol_id: UUID, result) -> RenderJob:
+    """Kész job rögzítése (pl. ha a dokumentum már a gyorsítótárban van)"""
+    future = Future()
+    future.set_result(result)
+    with _lock:
+        _prune()
+        return _add_job(protocol_id, future)
+
+
+def get(job_id: str) -> Optional[RenderJob]:
+    with _lock:
+        job = _jobs.get(job_id)
+    return job if job is not None else _load(job_id)
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+class _ZipStream(io.RawIOBase):
+    """Nem kereshető írási cél a zipfile számára: a kiírt bájtok darabonként üríthetők"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, used: set) -> str:
+    """Archívumon belül egyedi fájlnév: ismétlődésnél _2, _3, ... utótag a kiterjesztés előtt"""
+    stem, dot, extension = filename.rpartition(".")
+    if not dot:
+        stem, extension = filename, ""
+    name, counter = filename, 1
+    while name in used:
+        counter += 1
+        name = f"{stem}_{counter}{dot}{extension}"
+    used.add(name)
+    return name
+
+
+def export_zip(protocol_ids: List[UUID]) -> Iterator[bytes]:
+    """Jegyzőkönyvek párhuzamos renderelése és ZIP-be csomagolása folyamatos kiírással.
+
+    Egyszerre legfeljebb RENDER_WORKERS * 2 renderelés van folyamatban, az
+    elkészült fájlok azonnal bekerülnek az archívumba, így sem az archívum,
+    sem az összes dokumentum nincs egyszerre a memóriában. Ha a kliens
+    megszakítja a letöltést, a még el nem indult renderelések törlődnek.
+    """
+    stream = _ZipStream()
+    errors = []
+    remaining = [str(protocol_id) for protocol_id in protocol_ids]
+    in_flight = {}
+    names = set()
+
+    try:
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            while remaining or in_flight:
+                while remaining and len(in_flight) < RENDER_WORKERS * 2:
+                    protocol_id = remaining.pop(0)
+                    in_flight[_submit(export_in_worker, protocol_id)] = protocol_id
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    protocol_id = in_flight.pop(future)
+                    try:
+                        docx_bytes, filename = future.result()
+                        # Two protocols can have the same file name (e.g. serials differing only in "/" and "_")
+                        archive.writestr(_unique_name(filename, names), docx_bytes)
+                    except Exception as e:
+                        errors.append(f"{protocol_id}: {e}")
+                    yield stream.drain()
+            if errors:
+                archive.writestr("HIBAK.txt", "\n".join(errors))
+        yield stream.drain()
+    finally:
+        # Client disconnected (generator closed): queued renders are dropped, running ones finish unread
+        for future in in_flight:
+            future.cancel()
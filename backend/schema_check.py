@@ -0,0 +1,46 @@
+import logging
+from typing import List
+
+from sqlalchemy import Index, inspect
+
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def missing_indexes(engine) -> List[Index]:
+    """A modellekben deklarált, de az adatbázisból hiányzó indexek.
+
+    Egy index akkor számít meglévőnek, ha azonos nevű vagy azonos oszlopokra
+    épülő index már van a táblán (pl. korábban más néven létrehozva).
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables or not table.indexes:
+            continue
+        present = inspector.get_indexes(table.name)
+        names = {index["name"] for index in present}
+        column_sets = {tuple(index["column_names"]) for index in present}
+        for index in table.indexes:
+            if index.name in names or tuple(column.name for column in index.columns) in column_sets:
+                continue
+            missing.append(index)
+    return missing
+
+
+def check_indexes(engine, create: bool = True) -> List[str]:
+    """Indítási ellenőrzés: hiányzó indexek naplózása és (alapból) létrehozása.
+
+    A create_all csak új táblákkal együtt hoz létre indexet, a korábban
+    létrehozott adatbázisokba itt kerülnek be.
+    """
+    missing = missing_indexes(engine)
+    for index in missing:
+        columns = ", ".join(column.name for column in index.columns)
+        logger.warning("Hiányzó index: %s ON %s(%s)%s", index.name, index.table.name, columns,
+                       " - létrehozás..." if create else "")
+        if create:
+            index.create(bind=engine, checkfirst=True)
+    return [index.name for index in missing]
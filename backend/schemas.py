@@ -57,6 +57,15 @@ class EphElementType(str, Enum):
     OTHER = "other"
 
 
+def reject_null(*fields):
+    """Részleges frissítéshez: a felsorolt mezők elhagyhatók, de null értékre nem állíthatók"""
+    def check(cls, v):
+        if v is None:
+            raise ValueError("A mező nem lehet üres")
+        return v
+    return field_validator(*fields)(check)
+
+
 # Rpe Measurement schemas
 class RpeMeasurementBase(BaseModel):
     point_number: int
@@ -66,7 +75,16 @@ class RpeMeasurementBase(BaseModel):
 
 
 class RpeMeasurementCreate(RpeMeasurementBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class RpeMeasurementUpdate(BaseModel):
+    point_number: Optional[int] = None
+    location: Optional[str] = None
+    value_ohm: Optional[float] = None
+    passed: Optional[bool] = None
+
+    not_null = reject_null('point_number', 'location', 'value_ohm', 'passed')
 
 
 class RpeMeasurement(RpeMeasurementBase):
@@ -94,7 +112,24 @@ class InsulationMeasurementBase(BaseModel):
 
 
 class InsulationMeasurementCreate(InsulationMeasurementBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class InsulationMeasurementUpdate(BaseModel):
+    circuit_name: Optional[str] = None
+    breaker_type: Optional[str] = None
+    breaker_value: Optional[float] = None
+    wire_material: Optional[str] = None
+    wire_cross_section: Optional[float] = None
+    zs_value_ohm: Optional[float] = None
+    du_value_percent: Optional[float] = None
+    fire_rating: Optional[str] = None
+    ln_value_mohm: Optional[float] = None
+    lpe_value_mohm: Optional[float] = None
+    npe_value_mohm: Optional[float] = None
+    passed: Optional[bool] = None
+
+    not_null = reject_null('circuit_name', 'passed')
 
 
 class InsulationMeasurement(InsulationMeasurementBase):
@@ -114,7 +149,16 @@ class LoopImpedanceMeasurementBase(BaseModel):
 
 
 class LoopImpedanceMeasurementCreate(LoopImpedanceMeasurementBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class LoopImpedanceMeasurementUpdate(BaseModel):
+    point_number: Optional[int] = None
+    location: Optional[str] = None
+    value_ohm: Optional[float] = None
+    passed: Optional[bool] = None
+
+    not_null = reject_null('point_number', 'location', 'value_ohm', 'passed')
 
 
 class LoopImpedanceMeasurement(LoopImpedanceMeasurementBase):
@@ -140,7 +184,22 @@ class RcdTestBase(BaseModel):
 
 
 class RcdTestCreate(RcdTestBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class RcdTestUpdate(BaseModel):
+    circuit_name: Optional[str] = None
+    breaker_type: Optional[str] = None
+    breaker_value: Optional[str] = None
+    wire_material: Optional[str] = None
+    wire_cross_section: Optional[str] = None
+    test_type: Optional[str] = None
+    rated_current_ma: Optional[str] = None
+    current_description: Optional[str] = None
+    trip_time_ms: Optional[float] = None
+    passed: Optional[bool] = None
+
+    not_null = reject_null('test_type', 'passed')
 
 
 class RcdTest(RcdTestBase):
@@ -159,7 +218,15 @@ class SummaryResultBase(BaseModel):
 
 
 class SummaryResultCreate(SummaryResultBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class SummaryResultUpdate(BaseModel):
+    test_name: Optional[str] = None
+    result: Optional[str] = None
+    comment: Optional[str] = None
+
+    not_null = reject_null('test_name', 'result')
 
 
 class SummaryResult(SummaryResultBase):
@@ -196,7 +263,24 @@ class EarthingMeasurementBase(BaseModel):
 
 
 class EarthingMeasurementCreate(EarthingMeasurementBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class EarthingMeasurementUpdate(BaseModel):
+    measurement_method: Optional[str] = None
+    ra_value: Optional[float] = None
+    rb_value: Optional[float] = None
+    rc_value: Optional[float] = None
+    soil_resistivity: Optional[float] = None
+    soil_type: Optional[str] = None
+    limit_value: Optional[float] = None
+    passed: Optional[bool] = None  # Ha nincs megadva, Ra vagy a határérték változásakor újraszámolódik
+    temperature: Optional[float] = None
+    humidity: Optional[float] = None
+    weather_conditions: Optional[str] = None
+    notes: Optional[str] = None
+
+    not_null = reject_null('limit_value')
 
 
 class EarthingMeasurement(EarthingMeasurementBase):
@@ -219,7 +303,19 @@ class EphMeasurementBase(BaseModel):
 
 
 class EphMeasurementCreate(EphMeasurementBase):
-    pass
+    id: Optional[UUID] = None  # Meglévő sor azonosítója (frissítéskor)
+
+
+class EphMeasurementUpdate(BaseModel):
+    point_number: Optional[int] = None
+    element_name: Optional[str] = None
+    element_type: Optional[str] = None
+    connection_point: Optional[str] = None
+    continuity_resistance: Optional[float] = None
+    passed: Optional[bool] = None
+    notes: Optional[str] = None
+
+    not_null = reject_null('element_name', 'connection_point', 'passed')
 
 
 class EphMeasurement(EphMeasurementBase):
@@ -394,3 +490,22 @@ class TemplateTextBase(BaseModel):
 class TemplateText(TemplateTextBase):
     class Config:
         from_attributes = True
+
+
+# Batch export schemas (Tömeges exportálás)
+class ProtocolExportRequest(BaseModel):
+    ids: Optional[List[UUID]] = None
+    client_name: Optional[str] = None
+    date_from: Optional[date] = None  # Vizsgálat dátuma ettől
+    date_to: Optional[date] = None  # Vizsgálat dátuma eddig
+    protocol_type: Optional[str] = None
+    status: Optional[str] = None
+
+
+# Render job schemas (Háttérben futó dokumentum generálás)
+class RenderJob(BaseModel):
+    id: str
+    protocol_id: UUID
+    status: str  # queued, running, done, failed
+    error: Optional[str] = None
+    download_url: Optional[str] = None
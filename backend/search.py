@@ -0,0 +1,178 @@
+import re
+from typing import Iterable, List
+from uuid import UUID
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+import models
+
+# One search document per protocol: its own text fields plus every defect's
+# type id/name, location and description. SQLite: FTS5 virtual table,
+# PostgreSQL: tsvector column with a GIN index (see init.sql). The table is
+# created by the 0003_search migration, which keeps its own copy of this DDL.
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS protocol_search USING fts5("
+    "protocol_id UNINDEXED, document, tokenize = 'unicode61 remove_diacritics 2')"
+)
+_POSTGRES_DDL = (
+    """CREATE TABLE IF NOT EXISTS protocol_search (
+        protocol_id UUID PRIMARY KEY REFERENCES protocols(id) ON DELETE CASCADE,
+        document TEXT NOT NULL,
+        document_tsv TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_protocol_search_tsv ON protocol_search USING GIN(document_tsv)",
+)
+
+_TERM_RE = re.compile(r"\w+")
+
+
+def _is_sqlite(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def _key(bind, protocol_id: UUID):
+    # Uuid columns are stored as 32 hex characters on SQLite
+    return protocol_id.hex if _is_sqlite(bind) else protocol_id
+
+
+def protocol_document(conn, protocol_id: UUID):
+    """Keresési dokumentum összeállítása egy jegyzőkönyvhöz (None, ha már nem létezik)"""
+    protocol = conn.execute(
+        select(
+            models.Protocol.serial_number,
+            models.Protocol.client_name,
+            models.Protocol.location_address,
+            models.Protocol.professional_summary,
+        ).where(models.Protocol.id == protocol_id)
+    ).first()
+    if protocol is None:
+        return None
+    defects = conn.execute(
+        select(
+            models.ProtocolDefect.defect_type_id,
+            models.DefectType.name,
+            models.ProtocolDefect.location,
+            models.ProtocolDefect.custom_description,
+        )
+        .outerjoin(models.DefectType, models.ProtocolDefect.defect_type_id == models.DefectType.id)
+        .where(models.ProtocolDefect.protocol_id == protocol_id)
+    ).all()
+    parts = list(protocol)
+    for defect in defects:
+        parts.extend(defect)
+    return "\n".join(part for part in parts if part)
+
+
+def reindex_protocols(conn, protocol_ids: Iterable[UUID]):
+    """Keresési dokumentumok frissítése (törölt jegyzőkönyvnél a dokumentum is törlődik)"""
+    for protocol_id in protocol_ids:
+        key = _key(conn, protocol_id)
+        conn.execute(text("DELETE FROM protocol_search WHERE protocol_id = :id"), {"id": key})
+        document = protocol_document(conn, protocol_id)
+        if document is None:
+            continue
+        if _is_sqlite(conn):
+            conn.execute(
+                text("INSERT INTO protocol_search (protocol_id, document) VALUES (:id, :doc)"),
+                {"id": key, "doc": document},
+            )
+        else:
+            conn.execute(
+                text(
+                    "INSERT INTO protocol_search (protocol_id, document, document_tsv) "
+                    "VALUES (:id, :doc, to_tsvector('simple', :doc))"
+                ),
+                {"id": key, "doc": document},
+            )
+
+
+def create_search_table(conn):
+    """Keresési tábla létrehozása, ha még nincs"""
+    if _is_sqlite(conn):
+        conn.execute(text(_SQLITE_DDL))
+    else:
+        for ddl in _POSTGRES_DDL:
+            conn.execute(text(ddl))
+
+
+def rebuild_search_index(conn):
+    """A teljes keresési index újraépítése"""
+    conn.execute(text("DELETE FROM protocol_search"))
+    ids = conn.execute(select(models.Protocol.id)).scalars().all()
+    reindex_protocols(conn, ids)
+    return len(ids)
+
+
+def ensure_search_index(conn):
+    """Keresési tábla létrehozása; üres index esetén feltöltés a meglévő jegyzőkönyvekből"""
+    create_search_table(conn)
+    indexed = conn.execute(text("SELECT COUNT(*) FROM protocol_search")).scalar()
+    has_protocols = conn.execute(select(models.Protocol.id).limit(1)).first() is not None
+    if not indexed and has_protocols:
+        rebuild_search_index(conn)
+
+
+def search_protocol_ids(db: Session, q: str, limit: int = 50) -> List[UUID]:
+    """Jegyzőkönyv azonosítók relevancia szerint; minden szóra (szó elejére) illeszkedni kell"""
+    terms = _TERM_RE.findall(q)
+    if not terms:
+        return []
+    if _is_sqlite(db.get_bind()):
+        # Every whitespace-separated word must match as a (prefix) phrase, so "HIBA-014" stays together
+        match = " ".join('"' + word.replace('"', "") + '"*' for word in q.split() if _TERM_RE.search(word))
+        rows = db.execute(
+            text("SELECT protocol_id FROM protocol_search WHERE protocol_search MATCH :q ORDER BY rank LIMIT :limit"),
+            {"q": match, "limit": limit},
+        ).scalars()
+        return [UUID(hex=row) for row in rows]
+    query = " & ".join(f"{term}:*" for term in terms)
+    rows = db.execute(
+        text(
+            "SELECT protocol_id FROM protocol_search, to_tsquery('simple', :q) query "
+            "WHERE document_tsv @@ query ORDER BY ts_rank(document_tsv, query) DESC LIMIT :limit"
+        ),
+        {"q": query, "limit": limit},
+    ).scalars()
+    return list(rows)
+
+
+def _changed_protocol_ids(session: Session, conn) -> set:
+    ids = set()
+    defect_types = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, models.Protocol):
+            ids.add(obj.id)
+        elif isinstance(obj, models.ProtocolDefect):
+            ids.add(obj.protocol_id)
+        elif isinstance(obj, models.DefectType) and obj not in session.new:
+            defect_types.add(obj.id)
+    if defect_types:
+        ids.update(conn.execute(
+            select(models.ProtocolDefect.protocol_id).where(models.ProtocolDefect.defect_type_id.in_(defect_types))
+        ).scalars())
+    ids.discard(None)
+    return ids
+
+
+def _after_flush(session: Session, flush_context):
+    # Same connection and transaction as the flush: the index commits or rolls back with the data
+    conn = session.connection()
+    ids = _changed_protocol_ids(session, conn)
+    if ids:
+        reindex_protocols(conn, ids)
+
+
+def install(session_factory):
+    """Keresési index karbantartása a session_factory minden flush-ánál"""
+    event.listen(session_factory, "after_flush", _after_flush)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    print("Keresési index újraépítése...")
+    with engine.begin() as conn:
+        create_search_table(conn)
+        count = rebuild_search_index(conn)
+    print(f"Kész, {count} jegyzőkönyv indexelve.")
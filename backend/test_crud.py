@@ -0,0 +1,311 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+import models
+import schemas
+import crud
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def make_protocol(db, serial_number, rows):
+    """Jegyzőkönyv létrehozása `rows` darab méréssel minden táblában"""
+    defect_type = db.get(models.DefectType, "HIBA-001")
+    if defect_type is None:
+        defect_type = models.DefectType(id="HIBA-001", name="Hiányzó FI-relé", category="aramutes_veszelye", severity="kritikus")
+        db.add(defect_type)
+
+    protocol = models.Protocol(
+        serial_number=serial_number,
+        location_address="Budapest, Teszt utca 1.",
+        network_type="TN-S",
+        client_name="Teszt Elek",
+        inspection_type="Első ellenőrzés (VBF)",
+        inspection_date=date(2026, 2, 20),
+        inspector_name="Kovács Béla",
+    )
+    for i in range(rows):
+        protocol.rpe_measurements.append(models.RpeMeasurement(point_number=i, location=f"Pont {i}", value_ohm=0.1, passed=True))
+        protocol.insulation_measurements.append(models.InsulationMeasurement(circuit_name=f"Kör {i}", ln_value_mohm=200, passed=True))
+        protocol.loop_impedance_measurements.append(models.LoopImpedanceMeasurement(point_number=i, location=f"Pont {i}", value_ohm=0.4, passed=True))
+        protocol.rcd_tests.append(models.RcdTest(test_type="1×IΔn", trip_time_ms=20, passed=True))
+        protocol.summary_results.append(models.SummaryResult(test_name=f"Vizsgálat {i}", result="MEGFELELT"))
+        protocol.earthing_measurements.append(models.EarthingMeasurement(ra_value=5, passed=True))
+        protocol.eph_measurements.append(models.EphMeasurement(element_name=f"Elem {i}", connection_point="EPH sín", passed=True))
+        defect = models.ProtocolDefect(defect_type=defect_type, location=f"Hely {i}")
+        defect.images.append(models.DefectImage(image_path=f"defect_images/{i}.jpg"))
+        defect.images.append(models.DefectImage(image_path=f"defect_images/{i}b.jpg"))
+        protocol.protocol_defects.append(defect)
+    db.add(protocol)
+    db.commit()
+    return protocol.id
+
+
+def count_get_protocol_statements(engine, db, protocol_id):
+    db.expunge_all()
+    with StatementCounter(engine) as counter:
+        protocol = crud.get_protocol(db, protocol_id)
+        schemas.Protocol.model_validate(protocol)
+    return counter.count
+
+
+def test_get_protocol_statement_count_is_constant(engine, db):
+    small_id = make_protocol(db, "2026/001", rows=1)
+    large_id = make_protocol(db, "2026/002", rows=25)
+
+    small = count_get_protocol_statements(engine, db, small_id)
+    large = count_get_protocol_statements(engine, db, large_id)
+
+    assert small == large
+    # 1 protocol + 7 measurement tables + defects (with type) + images
+    assert large == 10
+
+
+def test_get_protocol_defects_statement_count_is_constant(engine, db):
+    small_id = make_protocol(db, "2026/001", rows=1)
+    large_id = make_protocol(db, "2026/002", rows=25)
+
+    counts = []
+    for protocol_id in (small_id, large_id):
+        db.expunge_all()
+        with StatementCounter(engine) as counter:
+            defects = crud.get_protocol_defects(db, protocol_id)
+            [schemas.ProtocolDefect.model_validate(d) for d in defects]
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1] == 2
+
+
+def test_bulk_insert_sends_one_statement_per_table(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=0)
+    items = [schemas.InsulationMeasurementCreate(circuit_name=f"Kör {i}", ln_value_mohm=200) for i in range(300)]
+
+    with StatementCounter(engine) as counter:
+        crud.bulk_insert_measurements(db, protocol_id, 'insulation_measurements', items)
+    db.commit()
+
+    assert counter.count == 1
+    protocol = crud.get_protocol(db, protocol_id)
+    assert [m.circuit_name for m in protocol.insulation_measurements] == [f"Kör {i}" for i in range(300)]
+    assert len({m.id for m in protocol.insulation_measurements}) == 300
+
+
+def test_bulk_insert_checks_earthing_limit(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=0)
+    items = [
+        schemas.EarthingMeasurementCreate(ra_value=12.0),
+        schemas.EarthingMeasurementCreate(ra_value=4.0, limit_value=5.0),
+        schemas.EarthingMeasurementCreate(ra_value=4.0, passed=False),
+    ]
+
+    crud.bulk_insert_measurements(db, protocol_id, 'earthing_measurements', items)
+    db.commit()
+
+    protocol = crud.get_protocol(db, protocol_id)
+    assert [m.passed for m in protocol.earthing_measurements] == [False, True, False]
+
+
+def test_sync_measurements_writes_only_the_edit(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=0)
+    crud.bulk_insert_measurements(db, protocol_id, 'insulation_measurements', [
+        schemas.InsulationMeasurementCreate(circuit_name=f"Kör {i}", zs_value_ohm=0.35, ln_value_mohm=200) for i in range(300)
+    ])
+    db.commit()
+    rows = crud.get_protocol(db, protocol_id).insulation_measurements
+    items = [schemas.InsulationMeasurementCreate.model_validate(row, from_attributes=True) for row in rows]
+    original_ids = [row.id for row in rows]
+
+    items[10].ln_value_mohm = 150
+    del items[20]
+    items.append(schemas.InsulationMeasurementCreate(circuit_name="Új kör"))
+
+    with StatementCounter(engine) as counter:
+        result = crud.sync_measurements(db, protocol_id, 'insulation_measurements', items)
+    db.commit()
+
+    assert result == (1, 1, 1)
+    # select + delete + update + insert
+    assert counter.count == 4
+    rows = crud.get_protocol(db, protocol_id).insulation_measurements
+    assert len(rows) == 300
+    assert [row.id for row in rows[:299]] == original_ids[:20] + original_ids[21:]
+    assert float(rows[10].ln_value_mohm) == 150
+    assert rows[-1].circuit_name == "Új kör"
+
+
+def test_sync_measurements_keeps_the_list_order(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=0)
+    crud.bulk_insert_measurements(db, protocol_id, 'insulation_measurements', [
+        schemas.InsulationMeasurementCreate(circuit_name=f"Kör {i}") for i in range(5)
+    ])
+    db.commit()
+    rows = crud.get_protocol(db, protocol_id).insulation_measurements
+    items = [schemas.InsulationMeasurementCreate.model_validate(row, from_attributes=True) for row in rows]
+
+    # Insert in the middle and move the last row to the front
+    items.insert(2, schemas.InsulationMeasurementCreate(circuit_name="Új kör"))
+    items.insert(0, items.pop())
+    result = crud.sync_measurements(db, protocol_id, 'insulation_measurements', items)
+    db.commit()
+
+    assert result == (1, 1, 0)
+    expected = ["Kör 4", "Kör 0", "Kör 1", "Új kör", "Kör 2", "Kör 3"]
+    assert [row.circuit_name for row in crud.get_protocol(db, protocol_id).insulation_measurements] == expected
+
+
+def test_assign_positions_renumbers_only_without_a_gap():
+    step = models.POSITION_STEP
+    assert crud.assign_positions([None, None]) == [0, step]
+    assert crud.assign_positions([0, None, step]) == [0, step // 2, step]
+    assert crud.assign_positions([step, 0, 2 * step]) == [-step, 0, 2 * step]
+    assert crud.assign_positions([0, 1, None, 2]) == [0, step, 2 * step, 3 * step]
+
+
+def test_create_and_import_append_at_the_end(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=2)
+    crud.create_measurement(db, protocol_id, 'rpe_measurements', schemas.RpeMeasurementCreate(point_number=9, location="Új", value_ohm=0.1))
+    crud.import_measurements(db, protocol_id, {'rpe_measurements': [
+        schemas.RpeMeasurementCreate(point_number=1, location="Import", value_ohm=0.2)
+    ]})
+    db.commit()
+
+    rows = crud.get_protocol(db, protocol_id).rpe_measurements
+    assert [row.location for row in rows] == ["Pont 0", "Pont 1", "Új", "Import"]
+
+
+def test_sync_measurements_without_changes_writes_nothing(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=5)
+    protocol = crud.get_protocol(db, protocol_id)
+    items = [schemas.RpeMeasurementCreate.model_validate(row, from_attributes=True) for row in protocol.rpe_measurements]
+
+    with StatementCounter(engine) as counter:
+        result = crud.sync_measurements(db, protocol_id, 'rpe_measurements', items)
+
+    assert result == (0, 0, 0)
+    assert counter.count == 1
+
+
+def test_sync_measurements_ignores_foreign_ids(engine, db):
+    first_id = make_protocol(db, "2026/001", rows=1)
+    second_id = make_protocol(db, "2026/002", rows=1)
+    foreign = crud.get_protocol(db, first_id).eph_measurements[0]
+    item = schemas.EphMeasurementCreate(id=foreign.id, element_name="Gázcső")
+
+    result = crud.sync_measurements(db, second_id, 'eph_measurements', [item])
+    db.commit()
+
+    assert result == (1, 0, 1)
+    assert crud.get_protocol(db, first_id).eph_measurements[0].element_name == "Elem 0"
+    assert crud.get_protocol(db, second_id).eph_measurements[0].id != foreign.id
+
+
+def test_update_measurement_rechecks_earthing_limit(engine, db):
+    protocol_id = make_protocol(db, "2026/001", rows=0)
+    row = crud.create_measurement(db, protocol_id, 'earthing_measurements', schemas.EarthingMeasurementCreate(ra_value=4.0))
+    assert row.passed is True
+
+    changes = schemas.EarthingMeasurementUpdate(ra_value=12.5).model_dump(exclude_unset=True)
+    row = crud.update_measurement(db, row, 'earthing_measurements', changes)
+    assert row.passed is False
+
+    changes = schemas.EarthingMeasurementUpdate(limit_value=20.0).model_dump(exclude_unset=True)
+    row = crud.update_measurement(db, row, 'earthing_measurements', changes)
+    assert row.passed is True
+
+    changes = schemas.EarthingMeasurementUpdate(notes="Száraz talaj").model_dump(exclude_unset=True)
+    row = crud.update_measurement(db, row, 'earthing_measurements', changes)
+    assert row.passed is True and row.notes == "Száraz talaj"
+
+
+def test_import_measurements_continues_point_numbers(db):
+    protocol_id = make_protocol(db, "VBF-2026-IMP", rows=3)
+    tables = {
+        "insulation_measurements": [schemas.InsulationMeasurementCreate(circuit_name="F1", zs_value_ohm=0.5)],
+        "loop_impedance_measurements": [
+            schemas.LoopImpedanceMeasurementCreate(point_number=1, location="F1", value_ohm=0.3),
+            schemas.LoopImpedanceMeasurementCreate(point_number=2, location="F2", value_ohm=0.4),
+        ],
+    }
+
+    counts = crud.import_measurements(db, protocol_id, tables)
+    db.commit()
+
+    assert counts == {"insulation_measurements": 1, "loop_impedance_measurements": 2}
+    protocol = crud.get_protocol(db, protocol_id)
+    assert len(protocol.insulation_measurements) == 4
+    assert sorted(row.point_number for row in protocol.loop_impedance_measurements) == [0, 1, 2, 3, 4]
+
+
+def test_keyset_pages_cover_every_protocol_once(db):
+    for i in range(5):
+        make_protocol(db, f"VBF-2026-{i:03d}", rows=0)  # Same created_at second: id breaks the tie
+    make_protocol(db, "EPH-2026-001", rows=0)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = crud.list_protocols_page(crud.filter_protocols(db.query(models.Protocol), serial_number="VBF-"), 2, cursor)
+        seen += [p.serial_number for p in page]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [f"VBF-2026-{i:03d}" for i in range(5)]
+
+
+def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        crud.list_protocols_page(db.query(models.Protocol), 10, "nem-kurzor")
+
+
+def test_text_filters_match_wildcards_literally(db):
+    first = db.get(models.Protocol, make_protocol(db, "VBF-2026-101", rows=0))
+    first.client_name, first.location_address = "Kft_1", "Fő út 10%"
+    second = db.get(models.Protocol, make_protocol(db, "VBF-2026-102", rows=0))
+    second.client_name, second.location_address = "Kft21", "Fő út 100"
+    db.flush()
+
+    def serials(**filters):
+        return [p.serial_number for p in crud.filter_protocols(db.query(models.Protocol), **filters)]
+
+    assert serials(client_name="kft_") == ["VBF-2026-101"]
+    assert serials(location_address="10%") == ["VBF-2026-101"]
+    assert sorted(serials(client_name="kft")) == ["VBF-2026-101", "VBF-2026-102"]
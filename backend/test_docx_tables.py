@@ -0,0 +1,32 @@
+import io
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+from docx_tables import HEADER_FILL, add_measurement_table
+
+
+def test_table_round_trips_through_saved_document():
+    doc = Document()
+    rows = [["F1", "L-N: 199.9\nL-PE: -", "<E30 & más>"], ["F2", "", "Megfelel"]]
+    add_measurement_table(doc, ["Áramkör", "Riso (MΩ)", "Tűz.o."], rows, font_size=8.5, header_font_size=9)
+    doc.add_paragraph("Között")
+    add_measurement_table(doc, ["Pont", "Zs (Ω)"], [["1", "0.45"]], font_size=8.5)
+    # Appended in document order, the section properties stay last
+    assert [child.tag for child in doc.element.body] == [qn("w:tbl"), qn("w:p"), qn("w:tbl"), qn("w:sectPr")]
+    buf = io.BytesIO()
+    doc.save(buf)
+
+    first, second = Document(io.BytesIO(buf.getvalue())).tables
+    assert [[cell.text for cell in row.cells] for row in first.rows] == [["Áramkör", "Riso (MΩ)", "Tűz.o."], *rows]
+    assert [[cell.text for cell in row.cells] for row in second.rows] == [["Pont", "Zs (Ω)"], ["1", "0.45"]]
+
+    header = first.rows[0].cells[0]
+    assert header._tc.tcPr.find(qn("w:shd")).get(qn("w:fill")) == HEADER_FILL
+    assert header.paragraphs[0].style.font.size == Pt(9)
+    assert first.rows[1].cells[1].paragraphs[0].style.font.size == Pt(8.5)
+    assert first.rows[1].cells[0]._tc.tcPr.find(qn("w:shd")) is None
+    assert first._tbl.tblPr.find(qn("w:tblBorders")) is not None
+    # Both tables share the 8.5 pt paragraph style
+    assert second.rows[1].cells[0].paragraphs[0].style.style_id == first.rows[1].cells[0].paragraphs[0].style.style_id
@@ -0,0 +1,93 @@
+import io
+from datetime import date
+
+from docx import Document
+from docx.oxml.ns import qn
+
+import docx_templates
+import models
+
+
+def make_template(path):
+    doc = Document()
+    p = doc.add_paragraph("Jegyzőkönyv: ")
+    # Word often splits a placeholder into several runs
+    p.add_run("{{serial_")
+    p.add_run("number}}").bold = True
+    p.add_run(" ({{inspection_date}})")
+    doc.add_paragraph("{{location_address}}")
+    table = doc.add_table(rows=2, cols=3)
+    for cell, text in zip(table.rows[0].cells, ["#", "Áramkör", "Riso (MΩ)"]):
+        cell.text = text
+    for cell, text in zip(table.rows[1].cells, ["{{ins.index}}", "{{ins.circuit_name}}", "{{ins.riso}}"]):
+        cell.text = text
+    doc.add_paragraph("{{defects_section}}")
+    doc.add_paragraph("{{unknown}} marad")
+    doc.save(path)
+
+
+def make_protocol(protocol_type="vbf"):
+    return models.Protocol(
+        protocol_type=protocol_type,
+        serial_number="T/001",
+        location_address="Budapest\nTeszt utca 1.",
+        inspection_date=date(2026, 1, 2),
+        insulation_measurements=[
+            models.InsulationMeasurement(circuit_name=f"F{n}", ln_value_mohm=199.9, lpe_value_mohm=150, passed=True)
+            for n in (1, 2)
+        ],
+        protocol_defects=[models.ProtocolDefect(custom_description="Hiányzó fedlap", location="Elosztó", images=[])],
+    )
+
+
+def test_template_is_filled_and_rows_repeat(tmp_path, monkeypatch):
+    make_template(tmp_path / "vbf.docx")
+    monkeypatch.setattr(docx_templates, "TEMPLATES_DIR", tmp_path)
+    monkeypatch.setattr(docx_templates, "_templates", {})
+
+    doc = Document(io.BytesIO(docx_templates.render_template_docx(make_protocol())))
+    texts = [p.text for p in doc.paragraphs]
+
+    assert texts[0] == "Jegyzőkönyv: T/001 (2026.01.02.)"
+    assert doc.paragraphs[0].runs[1].text == "T/001"
+    assert texts[1] == "Budapest\nTeszt utca 1."
+    assert "Hibák összesítő táblázata" in texts
+    assert "{{defects_section}}" not in texts
+    assert texts[-1] == "{{unknown}} marad"
+
+    rows = [[cell.text for cell in row.cells] for row in doc.tables[0].rows]
+    assert rows[0] == ["#", "Áramkör", "Riso (MΩ)"]
+    assert [row[:2] for row in rows[1:]] == [["1", "F1"], ["2", "F2"]]
+    assert rows[1][2].startswith("L-N: 199.9\n")
+    # The defects section follows with its own table
+    assert "Hiányzó fedlap" in [cell.text for cell in doc.tables[1].rows[1].cells]
+
+    # No eph.docx: the code-built generator is used
+    assert docx_templates.render_template_docx(make_protocol("eph")) is None
+    assert docx_templates.template_fingerprint("eph") == ""
+    assert len(docx_templates.template_fingerprint("vbf")) == 64
+
+
+def test_defects_section_styles_are_added_to_the_template(tmp_path, monkeypatch):
+    doc = Document()
+    doc.add_paragraph("{{defects_section}}")
+    styles = doc.styles.element
+    for style in list(styles.iter(qn("w:style"))):
+        if style.get(qn("w:styleId")) in ("Heading3", "Heading3Char"):
+            styles.remove(style)
+        elif style.get(qn("w:styleId")) == "Heading2":
+            # A Hungarian Word template names the built-in "heading 2" style differently
+            style.set(qn("w:styleId"), "Cmsor2")
+    doc.save(tmp_path / "vbf.docx")
+    monkeypatch.setattr(docx_templates, "TEMPLATES_DIR", tmp_path)
+    monkeypatch.setattr(docx_templates, "_templates", {})
+
+    rendered = Document(io.BytesIO(docx_templates.render_template_docx(make_protocol())))
+
+    headings = {p.text: p.style for p in rendered.paragraphs if p.style.name.startswith("Heading")}
+    assert headings["Hibák összesítő táblázata"].style_id == "Cmsor2"
+    assert headings["1. Egyéb hiba"].style_id == "Heading3"
+    assert headings["1. Egyéb hiba"].base_style.name == "Normal"
+    style_ids = [style.style_id for style in rendered.styles]
+    assert style_ids.count("Heading3") == 1 and "Heading3Char" in style_ids
+    assert "Heading2" not in style_ids
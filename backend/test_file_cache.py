@@ -0,0 +1,54 @@
+import os
+import time
+
+from file_cache import DiskLRUCache
+
+
+def test_get_counts_hits_and_misses(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=1024, suffix=".bin")
+
+    assert cache.get("abc") is None
+    path = cache.put("abc", b"data")
+
+    assert cache.get("abc") == path
+    assert path.read_bytes() == b"data"
+    assert cache.stats() == {"hits": 1, "misses": 1, "max_bytes": 1024}
+
+
+def test_put_evicts_least_recently_used(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=1000)
+    now = time.time()
+    for age, key in enumerate(["old", "used", "new"]):
+        cache.put(key, b"x" * 100)
+        os.utime(cache.path_for(key), (now - 100 + age, now - 100 + age))
+
+    # Reading "old" makes "used" and "new" the least recently used entries
+    cache.max_bytes = 250
+    cache.get("old")
+    cache.put("newest", b"x" * 100)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["newest", "old"]
+
+
+def test_entry_larger_than_the_limit_survives_its_own_put(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=10)
+    cache.put("old", b"x" * 5)
+
+    path = cache.put("big", b"x" * 100)
+
+    assert path.read_bytes() == b"x" * 100
+    assert not cache.path_for("old").exists()
+    # The next put evicts it like any other entry
+    cache.put("next", b"x" * 5)
+    assert not path.exists()
+
+
+def test_open_entry_stays_readable_after_eviction(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=10)
+    cache.put("a", b"document")
+    assert cache.open("missing") is None
+
+    with cache.open("a") as f:
+        cache.put("b", b"x" * 10)
+        assert not cache.path_for("a").exists()
+        assert f.read() == b"document"
@@ -0,0 +1,55 @@
+from PIL import Image
+
+from image_processing import (
+    PRINT_MAX_PX, create_print_derivative, derivative_path, is_derivative, print_image_path,
+    remove_image_files, thumbnail_path
+)
+
+
+def test_print_derivative_is_downscaled_rgb_jpeg(tmp_path):
+    original = tmp_path / "photo.png"
+    Image.new("RGBA", (4000, 3000), (255, 0, 0, 0)).save(original)
+
+    target = create_print_derivative(original)
+
+    assert target == tmp_path / "photo.print.jpg"
+    with Image.open(target) as img:
+        assert (img.format, img.mode) == ("JPEG", "RGB")
+        assert img.size == (PRINT_MAX_PX, round(PRINT_MAX_PX * 3 / 4))
+        # Transparent pixels end up white, not black
+        assert img.getpixel((10, 10)) == (255, 255, 255)
+
+
+def test_exif_orientation_is_applied(tmp_path):
+    original = tmp_path / "portrait.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90° clockwise
+    Image.new("RGB", (600, 400)).save(original, exif=exif)
+
+    with Image.open(create_print_derivative(original)) as img:
+        assert img.size == (400, 600)
+
+
+def test_thumbnails_are_made_once_and_removed_with_the_original(tmp_path):
+    original = tmp_path / "photo.jpg"
+    Image.new("RGB", (1200, 800)).save(original)
+
+    thumb = thumbnail_path(original, 128)
+    with Image.open(thumb) as img:
+        assert img.size == (128, 85)
+    mtime = thumb.stat().st_mtime_ns
+    assert thumbnail_path(original, 128).stat().st_mtime_ns == mtime
+    assert print_image_path(original) == derivative_path(original, "print")
+
+    assert is_derivative(thumb) and is_derivative(derivative_path(original, "print"))
+    assert not is_derivative(original)
+
+    remove_image_files(original)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_broken_image_falls_back_to_the_original(tmp_path):
+    original = tmp_path / "broken.jpg"
+    original.write_bytes(b"not an image")
+
+    assert print_image_path(original) == original
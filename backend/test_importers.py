@@ -0,0 +1,71 @@
+import pytest
+
+from importers import detect_format, import_file
+from test_padfx_parser import make_padfx, measurement
+
+
+def test_format_is_detected_from_magic_bytes(tmp_path):
+    padfx = make_padfx(f'<SO Id="c1"><N>F1</N><PID>-1</PID><Ms>{measurement("16", r205="0.31Ohm")}</Ms></SO>')
+
+    assert detect_format(padfx[:64]).name == "padfx"
+    assert detect_format(b"\xef\xbb\xbftable;circuit;value_ohm\n").name == "csv"
+    assert detect_format(b'<?xml version="1.0"?>\n<Readings>').name == "xml"
+    with pytest.raises(ValueError):
+        detect_format(b"circuit,value\nF1,0.3\n")
+
+    # The extension does not matter, only the content
+    path = tmp_path / "export.csv"
+    path.write_bytes(padfx)
+    assert import_file(path)["counts"] == {"loop_impedance_measurements": 1}
+
+
+def test_csv_and_xml_give_the_same_rows(tmp_path):
+    csv_path = tmp_path / "m.csv"
+    csv_path.write_text(
+        "table,circuit,zs_value_ohm,ln_value_mohm,value_ohm\n"
+        "insulation_measurements,Elosztó / F1,\"0,45\",,\n"
+        "insulation_measurements,Elosztó / F1,,>199.9MOhm,\n"
+        "loop_impedance_measurements,Elosztó / F1,,,0.31Ohm\n"
+        "phase_rotation,Elosztó / F1,,,\n",
+        encoding="utf-8",
+    )
+    xml_path = tmp_path / "m.xml"
+    xml_path.write_text(
+        '<?xml version="1.0" encoding="utf-8"?><Readings>'
+        '<Reading table="insulation_measurements" circuit="Elosztó / F1" zs_value_ohm="0,45"/>'
+        '<Reading table="insulation_measurements" circuit="Elosztó / F1" ln_value_mohm="&gt;199.9MOhm"/>'
+        '<Reading table="loop_impedance_measurements" circuit="Elosztó / F1" value_ohm="0.31Ohm"/>'
+        '<Reading table="phase_rotation" circuit="Elosztó / F1"/>'
+        '</Readings>',
+        encoding="utf-8",
+    )
+
+    csv_result = import_file(csv_path)
+    xml_result = import_file(xml_path)
+
+    assert (csv_result["format"], xml_result["format"]) == ("csv", "xml")
+    for result in (csv_result, xml_result):
+        assert result["counts"] == {"insulation_measurements": 1, "loop_impedance_measurements": 1}
+        assert result["unmapped"] == {"phase_rotation": 1}
+        circuit = result["tables"]["insulation_measurements"][0]
+        assert (circuit.circuit_name, circuit.zs_value_ohm, circuit.ln_value_mohm) == ("Elosztó / F1", 0.45, 199.9)
+        # The comparator is not lost: 199.9 is only the lower bound of the reading
+        assert result["out_of_range"] == [
+            {"table": "insulation_measurements", "row": 0, "field": "ln_value_mohm", "raw": ">199.9MOhm"},
+        ]
+        loop = result["tables"]["loop_impedance_measurements"][0]
+        assert (loop.point_number, loop.location, loop.value_ohm) == (1, "Elosztó / F1", 0.31)
+
+
+def test_xml_reads_only_direct_readings(tmp_path):
+    path = tmp_path / "m.xml"
+    path.write_text(
+        '<?xml version="1.0"?><Readings>'
+        '<Group><Reading table="loop_impedance_measurements" circuit="Beágyazott" value_ohm="0.9"/></Group>'
+        '<Reading table="loop_impedance_measurements" circuit="F1" value_ohm="0.31"/>'
+        '</Readings>',
+        encoding="utf-8",
+    )
+
+    rows = import_file(path)["tables"]["loop_impedance_measurements"]
+    assert [row.location for row in rows] == ["F1"]
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+
+def test_measurement_row_routes(client, protocol):
+    base = f"/api/protocols/{protocol['id']}/rpe-measurements"
+    row_id = protocol["rpe_measurements"][0]["id"]
+
+    created = client.post(base, json={"point_number": 2, "location": "Fürdő", "value_ohm": 0.2})
+    assert created.status_code == 200, created.text
+    assert [row["location"] for row in client.get(base).json()] == ["Konyha", "Fürdő"]
+
+    patched = client.patch(f"{base}/{row_id}", json={"value_ohm": 0.3})
+    assert patched.status_code == 200
+    assert (patched.json()["location"], patched.json()["value_ohm"]) == ("Konyha", 0.3)
+
+    assert client.delete(f"{base}/{created.json()['id']}").status_code == 200
+    assert client.patch(f"{base}/{created.json()['id']}", json={"value_ohm": 1}).status_code == 404
+    assert client.get("/api/protocols/00000000-0000-0000-0000-000000000000/rpe-measurements").status_code == 404
+
+
+def test_null_on_required_field_is_rejected_before_writing(client, protocol):
+    url = f"/api/protocols/{protocol['id']}"
+    rpe = f"{url}/rpe-measurements/{protocol['rpe_measurements'][0]['id']}"
+    insulation = f"{url}/insulation-measurements/{protocol['insulation_measurements'][0]['id']}"
+
+    assert client.patch(rpe, json={"location": None}).status_code == 422
+    assert client.patch(rpe, json={"passed": None}).status_code == 422
+    assert client.patch(insulation, json={"circuit_name": None}).status_code == 422
+    # Optional columns may still be cleared
+    cleared = client.patch(insulation, json={"ln_value_mohm": None})
+    assert cleared.status_code == 200 and cleared.json()["ln_value_mohm"] is None
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["rpe_measurements"][0]["location"] == "Konyha"
+
+
+def test_download_works_when_the_document_exceeds_the_cache(client, protocol, monkeypatch):
+    import docx_cache
+    monkeypatch.setattr(docx_cache.docx_cache, "max_bytes", 0)
+    url = f"/api/protocols/{protocol['id']}/download"
+
+    for _ in range(2):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.content[:2] == b"PK"
+        assert response.headers["content-length"] == str(len(response.content))
+        assert response.headers["content-disposition"].startswith("attachment; filename=")
+
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    # The cache is not reachable through /api/uploads
+    assert client.get(f"/api/uploads/docx_cache/{response.headers['etag'].strip(chr(34))}.docx").status_code == 404
+
+
+def test_defect_image_upload_and_thumbnails(client, protocol):
+    defect = client.post(f"/api/protocols/{protocol['id']}/defects", json={"location": "Fürdő", "custom_description": "x"})
+    image = client.post(
+        f"/api/protocols/{protocol['id']}/defects/{defect.json()['id']}/images",
+        files={"file": ("a.jpg", open(BACKEND_DIR / "mock_image.jpg", "rb"), "image/jpeg")},
+    )
+    assert image.status_code == 200
+    url = f"/api/uploads/{image.json()['image_path']}"
+    stem = url.rsplit(".", 1)[0]
+
+    # The print derivative and the 256 px thumbnail are made at upload time
+    assert client.get(f"{stem}.print.jpg").status_code == 200
+    assert client.get(f"{stem}.thumb256.jpg").status_code == 200
+
+    thumb = client.get(f"{url}?size=128")
+    assert thumb.status_code == 200 and "immutable" in thumb.headers["cache-control"]
+    assert client.get(f"{url}?size=128", headers={"If-None-Match": thumb.headers["etag"]}).status_code == 304
+    assert client.get(f"{url}?size=100").status_code == 400
+    # No thumbnails of thumbnails
+    assert client.get(f"{stem}.thumb256.jpg?size=256").status_code == 400
+    assert client.get(f"{stem}.thumb256.thumb256.jpg").status_code == 404
+
+    broken = client.post(
+        f"/api/protocols/{protocol['id']}/defects/{defect.json()['id']}/images",
+        files={"file": ("b.jpg", b"not an image", "image/jpeg")},
+    )
+    assert broken.status_code == 400
+
+
+def test_import_reports_the_skipped_measurement_types(client, protocol):
+    from test_padfx_parser import make_padfx, measurement
+    padfx = make_padfx(
+        f'<SO Id="c1"><N>F1</N><PID>-1</PID><Ms>'
+        f'{measurement("16", r205="0.31Ohm")}{measurement("2", r1="120MOhm")}{measurement("2", r1="99MOhm")}'
+        f'</Ms></SO>'
+    )
+
+    response = client.post(f"/api/protocols/{protocol['id']}/import", files={"file": ("m.padfx", padfx)})
+
+    assert response.status_code == 200
+    assert response.json()["counts"] == {"loop_impedance_measurements": 1}
+    # Readings of not yet identified MIDs are not dropped silently
+    assert response.json()["unmapped"] == {"2": 2}
+
+
+def test_oversized_upload_is_refused_from_its_content_length(client, protocol):
+    import uploads
+    body = b"\0" * (uploads.IMAGE_MAX_BYTES + 2 * uploads.MULTIPART_OVERHEAD)
+
+    # The defect does not exist: a 404 would mean the body was parsed and the endpoint ran
+    response = client.post(
+        f"/api/protocols/{protocol['id']}/defects/00000000-0000-0000-0000-000000000000/images",
+        files={"file": ("a.jpg", body, "image/jpeg")},
+    )
+    assert response.status_code == 413
+    assert response.json()["detail"] == uploads.too_large(uploads.IMAGE_MAX_BYTES).detail
@@ -0,0 +1,99 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+
+from database import Base
+import models  # noqa: F401 - registers the tables
+import migrate_db
+
+
+def schema_diff(engine):
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_object": migrate_db.include_object})
+        return compare_metadata(context, Base.metadata)
+
+
+def test_schema_version_is_the_head_revision():
+    script = ScriptDirectory.from_config(migrate_db.alembic_config())
+    assert script.get_heads() == [migrate_db.SCHEMA_VERSION]
+
+
+def test_fresh_database_matches_the_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+
+    assert migrate_db.ensure_schema(engine) is True
+    assert migrate_db.current_revision(engine) == migrate_db.SCHEMA_VERSION
+    assert schema_diff(engine) == []
+    assert "protocol_search" in inspect(engine).get_table_names()
+
+
+def test_current_schema_is_not_touched(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrate_db.ensure_schema(engine)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("upgrade on a current schema")
+
+    monkeypatch.setattr(migrate_db.command, "upgrade", fail)
+    assert migrate_db.ensure_schema(engine) is False
+
+
+def test_legacy_database_is_upgraded(tmp_path):
+    # Shape of an old vbf_database.db: rcd_tests and insulation_measurements
+    # without the columns update_db.py / migrate_db.py used to add by hand
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(bind=engine, tables=[models.Protocol.__table__])
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE rcd_tests (id CHAR(32) NOT NULL, protocol_id CHAR(32), test_type VARCHAR(50), "
+            "current_description VARCHAR(100), trip_time_ms NUMERIC(10, 2), passed BOOLEAN, "
+            "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), PRIMARY KEY (id), "
+            "FOREIGN KEY(protocol_id) REFERENCES protocols (id) ON DELETE CASCADE)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE insulation_measurements (id CHAR(32) NOT NULL, protocol_id CHAR(32), "
+            "circuit_name VARCHAR(255), ln_value_mohm NUMERIC(10, 2), passed BOOLEAN, "
+            "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), PRIMARY KEY (id), "
+            "FOREIGN KEY(protocol_id) REFERENCES protocols (id) ON DELETE CASCADE)"
+        )
+        conn.exec_driver_sql("INSERT INTO rcd_tests (id, test_type) VALUES ('0', '1×IΔn')")
+        conn.exec_driver_sql("INSERT INTO rcd_tests (id, test_type) VALUES ('1', '5×IΔn')")
+
+    migrate_db.ensure_schema(engine)
+
+    assert schema_diff(engine) == []
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT test_type, breaker_type FROM rcd_tests ORDER BY id").all() == [
+            ("1×IΔn", None), ("5×IΔn", None),
+        ]
+        # Existing rows are numbered in insertion order
+        assert conn.exec_driver_sql("SELECT id, position FROM rcd_tests ORDER BY id").all() == [
+            ("0", 0), ("1", models.POSITION_STEP),
+        ]
+
+
+def test_search_revision_indexes_existing_protocols(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.begin() as conn:
+        migrate_db.command.upgrade(migrate_db.alembic_config(conn), "0002_indexes")
+        conn.exec_driver_sql("INSERT INTO defect_types (id, name, category, severity) VALUES ('HIBA-014', 'Hiányzó EPH', 'x', 'y')")
+        conn.exec_driver_sql(
+            "INSERT INTO protocols (id, serial_number, location_address, network_type, client_name, inspection_type, "
+            "inspection_date, inspector_name) VALUES ('a1', '2026/001', 'Fő utca 1.', 'TN-S', '', 'VBF', '2026-02-20', 'K')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO protocol_defects (id, protocol_id, defect_type_id, location) VALUES ('d1', 'a1', 'HIBA-014', 'Fürdő')"
+        )
+        conn.exec_driver_sql("INSERT INTO protocols (id, serial_number, location_address, network_type, client_name, "
+                             "inspection_type, inspection_date, inspector_name) "
+                             "VALUES ('b2', '2026/002', 'Piac utca 5.', 'TN-S', 'Teszt Kft.', 'VBF', '2026-02-20', 'K')")
+
+    migrate_db.ensure_schema(engine)
+
+    with engine.connect() as conn:
+        # The same documents search.protocol_document builds
+        assert conn.exec_driver_sql("SELECT protocol_id, document FROM protocol_search ORDER BY protocol_id").all() == [
+            ("a1", "2026/001\nFő utca 1.\nHIBA-014\nHiányzó EPH\nFürdő"),
+            ("b2", "2026/002\nTeszt Kft.\nPiac utca 5."),
+        ]
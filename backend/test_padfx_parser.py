@@ -0,0 +1,182 @@
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+import padfx_cache
+import padfx_pool
+from file_cache import DiskLRUCache
+from importers import import_file_json
+
+from padfx_mapping import MEGAOHM, MILLISECOND, OHM, parse_value
+from padfx_parser import iter_padf_objects, parse_padfx_content
+
+
+def make_padfx(objects: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("DataSource.padf", f'<?xml version="1.0" encoding="utf-8"?><PADF><Data>{objects}</Data></PADF>')
+    return buf.getvalue()
+
+
+def measurement(mid: str, **results) -> str:
+    rs = "".join(f'<R Id="{rid[1:]}"><V>{value}</V></R>' for rid, value in results.items())
+    return f"<M><MID>{mid}</MID><Rs>{rs}</Rs></M>"
+
+
+@pytest.mark.parametrize("raw, unit, expected", [
+    ("0.45Ohm", OHM, 0.45),
+    ("0,45 Ω", OHM, 0.45),
+    (">199.9MOhm", MEGAOHM, 199.9),
+    ("550kOhm", MEGAOHM, 0.55),
+    ("18.2ms", MILLISECOND, 18.2),
+    ("120", MEGAOHM, 120.0),
+    ("12V", OHM, None),
+    ("---", OHM, None),
+])
+def test_parse_value_converts_to_target_unit(raw, unit, expected):
+    assert parse_value(raw, unit) == expected
+
+
+def test_measurements_map_to_table_rows():
+    data = make_padfx(
+        # The circuit comes before its distribution board in the file
+        f'<SO Id="c1"><N>F1</N><PID>b1</PID><Ms>'
+        f'{measurement("20", r43="0.52Ohm")}'
+        f'{measurement("2", r1=">199.9MOhm", r2="550kOhm", r3="120MOhm")}'
+        f'{measurement("16", r205="&lt;0.01Ohm")}'
+        f'{measurement("99", r1="1")}'
+        f'</Ms></SO>'
+        f'<SO Id="b1"><N>Elosztó</N><PID>-1</PID></SO>'
+    )
+
+    result = parse_padfx_content(data)
+
+    assert result["counts"] == {"insulation_measurements": 1, "loop_impedance_measurements": 1}
+    # Riso (MID 2) is not mapped until its result ids are confirmed
+    assert result["unmapped"] == {"2": 1, "99": 1}
+    circuit = result["tables"]["insulation_measurements"][0]
+    assert circuit.circuit_name == "Elosztó / F1"
+    assert (circuit.zs_value_ohm, circuit.ln_value_mohm, circuit.lpe_value_mohm, circuit.npe_value_mohm) == (0.52, None, None, None)
+    loop = result["tables"]["loop_impedance_measurements"][0]
+    assert (loop.point_number, loop.location, loop.value_ohm) == (1, "Elosztó / F1", 0.01)
+    assert result["out_of_range"] == [
+        {"table": "loop_impedance_measurements", "row": 0, "field": "value_ohm", "raw": "<0.01Ohm"},
+    ]
+    assert "raw_nodes" not in result
+
+
+def test_missing_data_section_is_rejected():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("DataSource.padf", "<PADF></PADF>")
+
+    with pytest.raises(ValueError):
+        parse_padfx_content(buf.getvalue())
+
+
+def test_pool_parse_keeps_event_loop_responsive(tmp_path):
+    path = tmp_path / "big.padfx"
+    path.write_bytes(make_padfx(
+        '<SO Id="c1"><N>F1</N><PID>-1</PID><Ms>'
+        + "".join(measurement("16", r205=f"0.{n}Ohm") for n in range(5000))
+        + "</Ms></SO>"
+    ))
+
+    async def run():
+        lags = []
+        done = asyncio.Event()
+
+        async def ticker():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - start - 0.01)
+
+        tick = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(padfx_pool.parse_json(path) for _ in range(4)))
+        done.set()
+        await tick
+        return results, max(lags)
+
+    try:
+        results, max_lag = asyncio.run(run())
+    finally:
+        padfx_pool.shutdown()
+
+    expected = {**jsonable_encoder(parse_padfx_content(path.read_bytes())), "format": "padfx"}
+    assert all(json.loads(result) == expected for result in results)
+    assert max_lag < 0.2
+
+
+def test_repeated_upload_is_served_from_parse_cache(tmp_path, monkeypatch):
+    path = tmp_path / "m.padfx"
+    path.write_bytes(make_padfx(f'<SO Id="c1"><N>F1</N><PID>-1</PID><Ms>{measurement("16", r205="0.31Ohm")}</Ms></SO>'))
+    monkeypatch.setattr(padfx_cache, "parse_cache", DiskLRUCache(tmp_path / "cache", 1024 * 1024, ".json.gz"))
+    parses = []
+
+    async def parse_json(path, raw=False):
+        parses.append(raw)
+        return import_file_json(path, raw)
+
+    monkeypatch.setattr(padfx_pool, "parse_json", parse_json)
+
+    async def run():
+        first = await padfx_cache.parse(path, "abc")
+        second = await padfx_cache.parse(path, "abc")
+        raw = await padfx_cache.parse_json(path, "abc", raw=True)
+        return first, second, raw
+
+    first, second, raw = asyncio.run(run())
+
+    assert parses == [False, True]
+    assert padfx_cache.parse_cache.stats()["hits"] == 1
+    assert first == second
+    assert second["tables"]["loop_impedance_measurements"][0].value_ohm == 0.31
+    assert "raw_nodes" in json.loads(raw)
+
+
+def test_only_direct_children_of_data_are_read_and_released():
+    count = 5000
+    xml = (
+        '<PADF><Meta><SO Id="m"><N>Meta</N><PID>-1</PID></SO></Meta><Data>'
+        + "".join(f'<SO Id="c{i}"><N>F{i}</N><PID>-1</PID><SO Id="n{i}"><N>Beágyazott</N></SO></SO>' for i in range(count))
+        + "</Data></PADF>"
+    )
+    objects = iter_padf_objects(io.BytesIO(xml.encode()))
+
+    ids = []
+    largest = 0
+    for node_id, *_ in objects:
+        ids.append(node_id)
+        # iterparse reads ahead one chunk, but processed <SO> elements do not pile up
+        largest = max(largest, len(objects.gi_frame.f_locals["data"]))
+
+    assert ids == [f"c{i}" for i in range(count)]
+    assert largest < count // 10
+
+
+def die(*args):
+    # Stands in for a worker killed during the parse (e.g. by the OOM killer)
+    os._exit(1)
+
+
+def test_dead_parse_worker_answers_503(client, monkeypatch):
+    padfx = make_padfx(f'<SO Id="c1"><N>F1</N><PID>-1</PID><Ms>{measurement("16", r205="0.31Ohm")}</Ms></SO>')
+    monkeypatch.setattr(padfx_pool, "PADFX_WORKERS", 1)
+    monkeypatch.setattr(padfx_pool, "import_file_json", die)
+    try:
+        response = client.post("/api/import", files={"file": ("m.padfx", padfx)})
+        assert response.status_code == 503
+        assert response.json()["detail"] == "A fájl feldolgozása szerverhiba miatt megszakadt, próbálja újra később."
+
+        # The next upload gets a fresh pool
+        monkeypatch.setattr(padfx_pool, "import_file_json", import_file_json)
+        assert client.post("/api/import", files={"file": ("m.padfx", padfx)}).status_code == 200
+    finally:
+        padfx_pool.shutdown()
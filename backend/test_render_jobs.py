@@ -0,0 +1,154 @@
+import io
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import docx_templates
+import render_jobs
+from test_docx_templates import make_template
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    yield
+    render_jobs.shutdown()
+
+
+def wait_for(client, job):
+    deadline = time.time() + 60
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.1)
+        job = client.get(f"/api/render-jobs/{job['id']}").json()
+    return job
+
+
+def test_render_job_lifecycle(client, protocol):
+    response = client.post(f"/api/protocols/{protocol['id']}/render")
+    assert response.status_code == 202
+    job = wait_for(client, response.json())
+
+    assert job["status"] == "done"
+    download = client.get(job["download_url"])
+    assert download.status_code == 200 and download.content[:2] == b"PK"
+
+    # The rendered document is cached: the next request is done without a worker
+    again = client.post(f"/api/protocols/{protocol['id']}/render").json()
+    assert again["status"] == "done" and again["id"] != job["id"]
+    assert client.get("/api/render-jobs/unknown").status_code == 404
+
+
+def test_full_queue_answers_503(client, protocol, monkeypatch):
+    monkeypatch.setattr(render_jobs, "RENDER_QUEUE_LIMIT", 0)
+    assert client.post(f"/api/protocols/{protocol['id']}/render").status_code == 503
+
+
+def test_download_of_unfinished_or_evicted_job(client):
+    with render_jobs._lock:
+        pending = render_jobs._add_job(uuid.uuid4(), Future())
+    gone = render_jobs.completed(uuid.uuid4(), (os.path.join(os.getcwd(), "missing.docx"), "x.docx"))
+
+    assert client.get(f"/api/render-jobs/{pending.id}/download").status_code == 409
+    assert client.get(f"/api/render-jobs/{gone.id}/download").status_code == 410
+    pending.future.set_result(None)
+
+
+def test_dead_worker_does_not_break_later_jobs(client, protocol):
+    # The worker exits without an answer, like an OOM-killed process
+    future = render_jobs._submit(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        future.result(timeout=60)
+
+    job = client.post(f"/api/protocols/{protocol['id']}/render").json()
+    assert wait_for(client, job)["status"] == "done"
+
+
+def test_export_zip_and_its_limits(client, protocol, monkeypatch):
+    response = client.post("/api/protocols/export", json={"ids": [protocol["id"]]})
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == [f"VBF_jegyzokonyv_{protocol['serial_number'].replace('/', '_')}.docx"]
+
+    # No ids and no filter would export the whole database
+    assert client.post("/api/protocols/export", json={}).status_code == 400
+    assert client.post("/api/protocols/export", json={"ids": []}).status_code == 400
+    monkeypatch.setattr(render_jobs, "EXPORT_MAX_PROTOCOLS", 0)
+    assert client.post("/api/protocols/export", json={"ids": [protocol["id"]]}).status_code == 400
+
+
+def test_closing_the_export_cancels_queued_renders(monkeypatch):
+    futures = []
+
+    def submit(fn, protocol_id):
+        future = Future()
+        if not futures:
+            future.set_result((b"docx", f"{protocol_id}.docx"))
+        futures.append(future)
+        return future
+
+    monkeypatch.setattr(render_jobs, "_submit", submit)
+    stream = render_jobs.export_zip([uuid.uuid4() for _ in range(10)])
+    next(stream)
+    stream.close()
+
+    assert len(futures) == render_jobs.RENDER_WORKERS * 2
+    assert all(future.cancelled() for future in futures[1:])
+
+
+def test_workers_render_with_the_servers_template(tmp_path, monkeypatch):
+    path = tmp_path / "vbf.docx"
+    make_template(path)
+    monkeypatch.setattr(docx_templates, "_templates", {"vbf": docx_templates.DocxTemplate.load(path), "eph": None})
+    expected = docx_templates.template_fingerprint("vbf")
+    # The file changes after the server loaded it; spawned workers would read it from TEMPLATES_DIR
+    path.write_bytes(b"not a template")
+    monkeypatch.setenv("TEMPLATES_DIR", str(tmp_path))
+
+    assert render_jobs._submit(docx_templates.template_fingerprint, "vbf").result(timeout=60) == expected
+
+
+def test_jobs_are_visible_to_other_uvicorn_workers(client, protocol):
+    job = wait_for(client, client.post(f"/api/protocols/{protocol['id']}/render").json())
+    with render_jobs._lock:
+        pending = render_jobs._add_job(uuid.uuid4(), Future())
+        # Another worker has its own, empty job table
+        render_jobs._jobs.clear()
+
+    assert client.get(f"/api/render-jobs/{job['id']}").json()["status"] == "done"
+    assert client.get(job["download_url"]).content[:2] == b"PK"
+    assert client.get(f"/api/render-jobs/{pending.id}").json()["status"] == "queued"
+    assert client.get(f"/api/render-jobs/{pending.id}/download").status_code == 409
+    assert client.get("/api/render-jobs/..%2F..%2Fsecret").status_code == 404
+    pending.future.set_result(None)
+
+
+def test_export_releases_the_db_connection_before_streaming(client, protocol, monkeypatch):
+    from database import engine
+    checked_out = []
+
+    def export_zip(protocol_ids):
+        checked_out.append(engine.pool.checkedout())
+        yield b""
+
+    monkeypatch.setattr(render_jobs, "export_zip", export_zip)
+    assert client.post("/api/protocols/export", json={"ids": [protocol["id"]]}).status_code == 200
+    assert checked_out == [0]
+
+
+def test_repeated_file_names_get_a_suffix_in_the_archive(monkeypatch):
+    def submit(fn, protocol_id):
+        future = Future()
+        future.set_result((b"docx", "VBF_jegyzokonyv_2026_001.docx"))
+        return future
+
+    monkeypatch.setattr(render_jobs, "_submit", submit)
+    data = b"".join(render_jobs.export_zip([uuid.uuid4() for _ in range(3)]))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == [
+            "VBF_jegyzokonyv_2026_001.docx", "VBF_jegyzokonyv_2026_001_2.docx", "VBF_jegyzokonyv_2026_001_3.docx",
+        ]
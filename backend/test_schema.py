@@ -0,0 +1,38 @@
+import re
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from database import Base
+import models  # noqa: F401 - registers the tables
+import migrate_db
+import schema_check
+
+INIT_SQL = Path(__file__).parent / "init.sql"
+INDEX_RE = re.compile(r"CREATE INDEX IF NOT EXISTS (\w+) ON (\w+)\s*\(([^)]*)\)")
+
+
+def test_models_declare_the_indexes_of_init_sql():
+    sql_indexes = {
+        name: (table, tuple(column.strip() for column in columns.split(",")))
+        for name, table, columns in INDEX_RE.findall(INIT_SQL.read_text(encoding="utf-8"))
+        if table != "protocol_search"  # Maintained by search.py, not an ORM table
+        and name not in migrate_db._UNMANAGED_INDEXES  # PostgreSQL-only, created by a migration
+    }
+    model_indexes = {
+        index.name: (table.name, tuple(column.name for column in index.columns))
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+    }
+
+    assert model_indexes == sql_indexes
+
+
+def test_check_indexes_adds_missing_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX idx_rpe_protocol")
+
+    assert schema_check.check_indexes(engine) == ["idx_rpe_protocol"]
+    assert schema_check.missing_indexes(engine) == []
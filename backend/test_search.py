@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+import models
+import search
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        search.ensure_search_index(conn)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    search.install(session_factory)
+    session = session_factory()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_protocol(db, serial_number, address, defects=()):
+    protocol = models.Protocol(
+        serial_number=serial_number,
+        location_address=address,
+        network_type="TN-S",
+        client_name="Teszt Elek",
+        inspection_type="Első ellenőrzés (VBF)",
+        inspection_date=date(2026, 2, 20),
+        inspector_name="Kovács Béla",
+    )
+    for defect_type_id, location in defects:
+        protocol.protocol_defects.append(models.ProtocolDefect(defect_type_id=defect_type_id, location=location))
+    db.add(protocol)
+    db.commit()
+    return protocol
+
+
+def test_search_matches_protocol_and_defect_text(db):
+    db.add(models.DefectType(id="HIBA-014", name="Hiányzó potenciálkiegyenlítés", category="aramutes_veszelye", severity="sulyos"))
+    bathroom = add_protocol(db, "2026/001", "Budapest, Fő utca 1.", [("HIBA-014", "Fürdőszoba")])
+    add_protocol(db, "2026/002", "Budapest, Fő utca 2.", [("HIBA-014", "Konyha")])
+    add_protocol(db, "2026/003", "Debrecen, Piac utca 5.")
+
+    assert len(search.search_protocol_ids(db, "fő utca")) == 2
+    assert search.search_protocol_ids(db, "HIBA-014 furdo") == [bathroom.id]
+    assert search.search_protocol_ids(db, "potenciál fürdő") == [bathroom.id]
+    assert search.search_protocol_ids(db, "!!!") == []
+
+
+def test_index_follows_updates_and_deletes(db):
+    protocol = add_protocol(db, "2026/010", "Szeged, Kárász utca 3.")
+
+    protocol.location_address = "Pécs, Király utca 9."
+    db.commit()
+    assert search.search_protocol_ids(db, "Kárász") == []
+    assert search.search_protocol_ids(db, "Király") == [protocol.id]
+
+    db.rollback()
+    protocol.client_name = "Visszavont Kft."
+    db.flush()
+    db.rollback()
+    assert search.search_protocol_ids(db, "Visszavont") == []
+
+    db.delete(protocol)
+    db.commit()
+    assert search.search_protocol_ids(db, "Király") == []
@@ -0,0 +1,79 @@
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+MB = 1024 * 1024
+
+# Upload size limits (MB): checked on the Content-Length first (UploadLimitMiddleware),
+# then while the file is copied, so nothing is held in memory
+PADFX_MAX_BYTES = int(os.environ.get("PADFX_MAX_MB", "50")) * MB
+IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_MB", "20")) * MB
+CHUNK_SIZE = MB
+# Room for the multipart boundaries, part headers and small form fields next to the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"A fájl túl nagy (legfeljebb {max_bytes // MB} MB)")
+
+
+class UploadLimitMiddleware:
+    """Túl nagy feltöltés elutasítása (413) a Content-Length alapján, még a törzs beolvasása előtt.
+
+    A multipart törzset a Starlette a végpont előtt teljes egészében lemezre menti;
+    Content-Length nélküli (chunked) kérésnél a save_upload darabonkénti ellenőrzése a védelem.
+    """
+
+    def __init__(self, app, limits: Iterable[Tuple[str, int]]):
+        self.app = app
+        self.limits = [(re.compile(pattern), max_bytes) for pattern, max_bytes in limits]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            max_bytes = next((limit for pattern, limit in self.limits if pattern.fullmatch(scope["path"])), None)
+            length = dict(scope["headers"]).get(b"content-length", b"")
+            if max_bytes is not None and length.isdigit() and int(length) > max_bytes + MULTIPART_OVERHEAD:
+                error = too_large(max_bytes)
+                response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+async def save_upload(file: UploadFile, target: Path, max_bytes: int, digest=None) -> Path:
+    """Feltöltött fájl darabonkénti mentése méretkorláttal (túllépéskor 413).
+
+    Ha digest (hashlib objektum) meg van adva, a tartalom hash értéke másolás közben készül.
+    """
+    written = 0
+    try:
+        if file.size is not None and file.size > max_bytes:
+            raise too_large(max_bytes)
+        # Reads and writes go to worker threads, the event loop is never blocked on disk I/O
+        async with aiofiles.open(target, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise too_large(max_bytes)
+                if digest is not None:
+                    digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        if await aiofiles.os.path.exists(target):
+            await aiofiles.os.remove(target)
+        raise
+    return target
+
+
+async def spool_upload(file: UploadFile, max_bytes: int, suffix: str = "", digest=None) -> Path:
+    """Feltöltés mentése ideiglenes fájlba; a hívó felel a törléséért"""
+    fd, tmp_path = tempfile.mkstemp(prefix="upload-", suffix=suffix)
+    os.close(fd)
+    return await save_upload(file, Path(tmp_path), max_bytes, digest)